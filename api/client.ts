@@ -40,4 +40,12 @@ api.interceptors.response.use(
     }
 );
 
+// Screenshots are stored content-addressed; steps carry `screenshot_hash` instead of base64,
+// plus a short-lived signed `screenshot_url` (relative to the API root) usable directly as <img> src
+export const stepScreenshotSrc = (step: { screenshot_url?: string | null; screenshot_data?: string | null }): string | null => {
+    if (step.screenshot_url) return `${API_URL}${step.screenshot_url}`;
+    if (step.screenshot_data) return `data:image/jpeg;base64,${step.screenshot_data}`;
+    return null;
+};
+
 export default api;
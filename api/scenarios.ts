@@ -109,6 +109,7 @@ export const scenariosApi = {
     },
     // New Persistence Methods
     getAll: async (projectId: string, pendingAsset: boolean = false): Promise<Scenario[]> => {
+        // List rows leave out test cases (getById loads them)
         const response = await api.get<any[]>('/scenarios/', { params: { project_id: projectId, pending_asset: pendingAsset } });
         return response.data.map(s => ({
             id: s.id,
@@ -116,6 +117,7 @@ export const scenariosApi = {
             title: s.title,
             description: s.description,
             testCases: s.testCases || s.test_cases || [],
+            testCaseCount: s.test_case_count ?? (s.testCases || s.test_cases)?.length,
             personaId: s.persona_id,
             isApproved: s.is_approved,
             platform: s.platform,
@@ -133,6 +135,33 @@ export const scenariosApi = {
             } : undefined
         }));
     },
+    getById: async (id: string): Promise<Scenario> => {
+        const response = await api.get<any>(`/scenarios/${id}`);
+        const s = response.data;
+        return {
+            id: s.id,
+            projectId: s.project_id,
+            title: s.title,
+            description: s.description,
+            testCases: s.testCases || s.test_cases || [],
+            testCaseCount: (s.testCases || s.test_cases || []).length,
+            personaId: s.persona_id,
+            isApproved: s.is_approved,
+            platform: s.platform,
+            target: s.target,
+            createdAt: s.created_at,
+            tags: s.tags,
+            category: s.category,
+            goldenScriptId: s.golden_script_id,
+            persona: s.persona ? {
+                ...s.persona,
+                projectId: s.persona.project_id,
+                skillLevel: s.persona.skill_level,
+                advancedLogic: s.persona.advanced_logic,
+                isActive: s.persona.is_active
+            } : undefined
+        };
+    },
     create: async (data: any): Promise<Scenario> => {
         const response = await api.post<any>('/scenarios/', data);
         return {
@@ -21,10 +21,14 @@ const mapScript = (s: any): TestScript => {
         projectId: s.project_id || s.projectId,
         runCount: s.run_count !== undefined ? s.run_count : s.runCount,
         successRate: s.success_rate !== undefined ? s.success_rate : s.successRate,
+        passRate7: s.pass_rate_7 !== undefined ? s.pass_rate_7 : s.passRate7,
+        passRate30: s.pass_rate_30 !== undefined ? s.pass_rate_30 : s.passRate30,
         isActive: s.is_active !== undefined ? s.is_active : s.isActive,
         isFavorite: s.is_favorite !== undefined ? s.is_favorite : s.isFavorite,
         lastRun: s.last_run || s.lastRun,
         captureScreenshots: s.capture_screenshots !== undefined ? s.capture_screenshots : false,
+        stepCount: s.step_count ?? s.stepCount ?? s.steps?.length,
+        datasetCount: s.dataset_count ?? s.datasetCount ?? s.dataset?.length,
         persona: mapPersona(s.persona)
     };
 };
@@ -36,6 +40,7 @@ const mapScenario = (s: any): Scenario => ({
     isApproved: s.is_approved !== undefined ? s.is_approved : s.isApproved,
     personaId: s.persona_id || s.personaId,
     testCases: s.test_cases || s.testCases || [],
+    testCaseCount: s.test_case_count ?? s.testCaseCount ?? (s.test_cases || s.testCases)?.length,
     goldenScriptId: s.golden_script_id || s.goldenScriptId,
     persona: mapPersona(s.persona)
 });
@@ -57,7 +62,8 @@ const mapHistory = (h: any): TestHistory => ({
     scheduleName: h.schedule_name || h.scheduleName,
     scriptOrigin: h.script_origin || h.scriptOrigin,
     jira_id: h.jira_id || h.jiraId,
-    runId: h.run_id || h.runId
+    runId: h.run_id || h.runId,
+    failedStepError: h.failed_step_error ?? h.failedStepError
 });
 
 export const testApi = {
@@ -71,6 +77,15 @@ export const testApi = {
         });
         return response.data.map(mapScript);
     },
+    // List rows carry no code/steps/dataset; fetch the full script before running, editing or viewing it
+    getScriptDetail: async (id: string) => {
+        const response = await api.get<any>(`/scripts/${id}`);
+        return mapScript(response.data);
+    },
+    withScriptBody: async (script: TestScript): Promise<TestScript> => {
+        if (script.code !== undefined || script.steps !== undefined) return script;
+        return testApi.getScriptDetail(script.id);
+    },
     createScript: async (data: any) => {
         const response = await api.post<any>('/scripts/', data);
         return mapScript(response.data);
@@ -95,6 +110,10 @@ export const testApi = {
         const response = await api.get<{ status: string; exit_code: number; log_exists: boolean }>(`/run/status/${run_id}`);
         return response.data;
     },
+    getRunTrace: async (run_id: string) => {
+        const response = await api.get<{ run_id: string; trace_id: string; duration_ms: number; spans: any[] }>(`/run/${run_id}/trace`);
+        return response.data;
+    },
     generateData: async (scenarios: any[], dataTypes: string[], count: number = 2) => {
         const response = await api.post<{ data: any[] }>('/ai/generate-data', { scenarios, data_types: dataTypes, count });
         return response.data;
@@ -110,6 +129,11 @@ export const testApi = {
         });
         return response.data.map(mapScenario);
     },
+    // List rows carry no test cases
+    getScenarioDetail: async (id: string) => {
+        const response = await api.get<any>(`/scenarios/${id}`);
+        return mapScenario(response.data);
+    },
     createScenario: async (data: any) => {
         const response = await api.post<any>('/scenarios/', data);
         return mapScenario(response.data);
@@ -137,6 +161,12 @@ export const testApi = {
         });
         return response.data;
     },
+    getStepTimings: async (projectId: string, params: { group_by?: 'action' | 'selector' | 'script'; days?: number; interval?: 'day' | 'week' | 'month'; script_id?: string; action?: string } = {}) => {
+        const response = await api.get<any[]>('/history/step-timings', {
+            params: { project_id: projectId, ...params }
+        });
+        return response.data;
+    },
     createHistory: async (data: any) => {
         const response = await api.post<TestHistory>('/history/', data);
         return response.data;
@@ -145,6 +175,10 @@ export const testApi = {
         const response = await api.get(`/history/${id}`);
         return mapHistory(response.data);
     },
+    getHistoryLogs: async (id: string, params: { offset?: number; limit?: number; level?: string; tail?: number } = {}) => {
+        const response = await api.get<any>(`/history/${id}/logs`, { params });
+        return response.data;
+    },
 
     retryTest: async (historyId: string): Promise<any> => {
         const response = await api.post(`/run/retry/${historyId}`);
@@ -0,0 +1,28 @@
+"""Add failure_signature to TestHistory
+
+Revision ID: 00a4cd4f9664
+Revises: 475e9c622008
+Create Date: 2026-10-19 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00a4cd4f9664'
+down_revision: Union[str, None] = '475e9c622008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('testhistory', sa.Column('failure_signature', sa.String(), nullable=True))
+    op.create_index(op.f('ix_testhistory_failure_signature'), 'testhistory', ['failure_signature'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_testhistory_failure_signature'), table_name='testhistory')
+    op.drop_column('testhistory', 'failure_signature')
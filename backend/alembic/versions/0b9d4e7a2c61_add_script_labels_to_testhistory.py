@@ -0,0 +1,38 @@
+"""Add script_origin and script_category to testhistory
+
+Revision ID: 0b9d4e7a2c61
+Revises: f2a6d0c93b57
+Create Date: 2026-10-19 17:22:08.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b9d4e7a2c61'
+down_revision: Union[str, None] = 'f2a6d0c93b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('testhistory', sa.Column('script_origin', sa.String(), nullable=True))
+    op.add_column('testhistory', sa.Column('script_category', sa.String(), nullable=True))
+
+    # Same values the former TestHistory.script_origin / script_category properties returned
+    op.execute("""
+        UPDATE testhistory h SET script_origin = s.origin, script_category = s.category
+        FROM testscript s WHERE s.id = h.script_id
+    """)
+    op.execute("""
+        UPDATE testhistory h SET script_category = 'Common'
+        WHERE NOT EXISTS (SELECT 1 FROM testscript s WHERE s.id = h.script_id)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('testhistory', 'script_category')
+    op.drop_column('testhistory', 'script_origin')
@@ -0,0 +1,140 @@
+"""Move inline step screenshots into the blob store
+
+Revision ID: 3f1c8b2d7e90
+Revises: 00a4cd4f9664
+Create Date: 2026-10-19 11:02:17.504311
+
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c8b2d7e90'
+down_revision: Union[str, None] = '00a4cd4f9664'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+
+# Frozen copy of the blob store layout at this revision (<root>/ab/cd/abcd...), so the
+# migration does not change when app.services.blob_store does
+SCREENSHOT_KEYS = ("screenshot_data", "screenshot")
+
+
+def _blob_root() -> Path:
+    from app.core.config import settings
+    return Path(settings.BLOB_STORE_DIR)
+
+
+def _blob_path(key: str) -> Path:
+    return _blob_root() / key[:2] / key[2:4] / key
+
+
+def _put_b64(data_b64: str):
+    if data_b64.startswith("data:") and "," in data_b64:
+        data_b64 = data_b64.split(",", 1)[1]
+    try:
+        raw = base64.b64decode(data_b64, validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    if not raw:
+        return None
+    key = hashlib.sha256(raw).hexdigest()
+    path = _blob_path(key)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+    return key
+
+
+def _externalize_steps(steps: list) -> list:
+    result = []
+    for step in steps:
+        if isinstance(step, dict) and any(isinstance(step.get(k), str) and step.get(k) for k in SCREENSHOT_KEYS):
+            step = dict(step)
+            for k in SCREENSHOT_KEYS:
+                value = step.get(k)
+                if isinstance(value, str) and value:
+                    key = _put_b64(value)
+                    if key:
+                        step["screenshot_hash"] = key
+                        step[k] = None
+        result.append(step)
+    return result
+
+
+def _get_b64(key: str):
+    path = _blob_path(key)
+    if len(key) != 64 or not path.exists():
+        return None
+    return base64.b64encode(path.read_bytes()).decode("utf-8")
+
+
+def _externalize_column(table: str, column: str) -> None:
+    """Rewrites `column` row by row, replacing base64 screenshots with blob keys."""
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        # Only rows that still carry inline screenshots; keyset over id keeps memory flat
+        rows = bind.execute(sa.text(
+            f"SELECT id, {column} FROM {table} "
+            f"WHERE id > :last_id AND CAST({column} AS TEXT) LIKE '%\"screenshot%' "
+            f"ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+
+        for row_id, steps in rows:
+            last_id = row_id
+            if isinstance(steps, str):
+                steps = json.loads(steps)
+            if not isinstance(steps, list):
+                continue
+            externalized = _externalize_steps(steps)
+            if externalized != steps:
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET {column} = CAST(:steps AS JSON) WHERE id = :id"),
+                    {"steps": json.dumps(externalized), "id": row_id}
+                )
+
+
+def _inline_column(table: str, column: str) -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        f"SELECT id, {column} FROM {table} WHERE CAST({column} AS TEXT) LIKE '%screenshot_hash%'"
+    )).fetchall()
+    for row_id, steps in rows:
+        if isinstance(steps, str):
+            steps = json.loads(steps)
+        if not isinstance(steps, list):
+            continue
+        for step in steps:
+            if isinstance(step, dict) and step.get("screenshot_hash"):
+                step["screenshot_data"] = _get_b64(step.pop("screenshot_hash"))
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {column} = CAST(:steps AS JSON) WHERE id = :id"),
+            {"steps": json.dumps(steps), "id": row_id}
+        )
+
+
+def upgrade() -> None:
+    _externalize_column('testhistory', 'step_results')
+    _externalize_column('aiexplorationsession', 'steps_data')
+
+
+def downgrade() -> None:
+    _inline_column('testhistory', 'step_results')
+    _inline_column('aiexplorationsession', 'steps_data')
@@ -0,0 +1,127 @@
+"""Add HistoryLogChunk and move inline history logs into it
+
+Revision ID: 8d2e4a61c5b7
+Revises: 3f1c8b2d7e90
+Create Date: 2026-10-19 11:48:05.271960
+
+"""
+import gzip
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4a61c5b7'
+down_revision: Union[str, None] = '3f1c8b2d7e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+# Frozen copy of the chunk format at this revision (gzip, which the app always reads), so
+# the migration does not change when app.services.log_store does
+CHUNK_LINES = 500
+
+
+def _normalize(logs) -> list:
+    entries = []
+    for entry in logs or []:
+        if not isinstance(entry, dict):
+            entry = {"msg": str(entry), "type": "info"}
+        msg = str(entry.get("msg") or "")
+        level = entry.get("type") or "info"
+        if "\n" in msg:
+            entries.extend({"msg": l, "type": level} for l in msg.splitlines() if l.strip())
+        else:
+            entries.append({"msg": msg, "type": level})
+    return entries
+
+
+def _write_chunks(bind, history_id: str, logs) -> None:
+    entries = _normalize(logs)
+    for index, start in enumerate(range(0, len(entries), CHUNK_LINES)):
+        lines = entries[start:start + CHUNK_LINES]
+        level_counts = {}
+        for entry in lines:
+            level_counts[entry["type"]] = level_counts.get(entry["type"], 0) + 1
+        payload = "\n".join(json.dumps(e, ensure_ascii=False) for e in lines).encode("utf-8")
+        bind.execute(
+            sa.text(
+                "INSERT INTO historylogchunk (history_id, chunk_index, first_line, line_count, level_counts, codec, data) "
+                "VALUES (:history_id, :chunk_index, :first_line, :line_count, CAST(:level_counts AS JSON), 'gzip', :data)"
+            ),
+            {
+                "history_id": history_id, "chunk_index": index, "first_line": start, "line_count": len(lines),
+                "level_counts": json.dumps(level_counts), "data": gzip.compress(payload, compresslevel=6),
+            }
+        )
+
+
+def _read_chunks(bind, history_id: str) -> list:
+    rows = bind.execute(sa.text(
+        "SELECT codec, data FROM historylogchunk WHERE history_id = :id ORDER BY chunk_index"
+    ), {"id": history_id}).fetchall()
+    logs = []
+    for codec, data in rows:
+        if codec == "zstd":
+            import zstandard
+            payload = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            payload = gzip.decompress(data)
+        logs.extend(json.loads(line) for line in payload.decode("utf-8").splitlines())
+    return logs
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('historylogchunk',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('history_id', sa.String(), nullable=False),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('first_line', sa.Integer(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.Column('level_counts', sa.JSON(), nullable=True),
+    sa.Column('codec', sa.String(), nullable=True),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_historylogchunk_history_id_chunk_index', 'historylogchunk', ['history_id', 'chunk_index'], unique=True)
+    # ### end Alembic commands ###
+
+    # Move existing inline logs into chunks
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, logs FROM testhistory "
+            "WHERE id > :last_id AND logs IS NOT NULL AND CAST(logs AS TEXT) NOT IN ('[]', 'null') "
+            "ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        for row_id, logs in rows:
+            last_id = row_id
+            if isinstance(logs, str):
+                logs = json.loads(logs)
+            _write_chunks(bind, row_id, logs)
+        bind.execute(
+            sa.text("UPDATE testhistory SET logs = CAST('[]' AS JSON) WHERE id IN :ids").bindparams(sa.bindparam("ids", expanding=True)),
+            {"ids": [r[0] for r in rows]}
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    history_ids = [r[0] for r in bind.execute(sa.text("SELECT DISTINCT history_id FROM historylogchunk")).fetchall()]
+    for history_id in history_ids:
+        logs = _read_chunks(bind, history_id)
+        bind.execute(
+            sa.text("UPDATE testhistory SET logs = CAST(:logs AS JSON) WHERE id = :id"),
+            {"logs": json.dumps(logs), "id": history_id}
+        )
+
+    op.drop_index('ix_historylogchunk_history_id_chunk_index', table_name='historylogchunk')
+    op.drop_table('historylogchunk')
@@ -0,0 +1,71 @@
+"""Add running pass/fail counters to TestScript
+
+Revision ID: b7e3f0a9d412
+Revises: 8d2e4a61c5b7
+Create Date: 2026-10-19 12:31:52.640118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f0a9d412'
+down_revision: Union[str, None] = '8d2e4a61c5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('testscript', sa.Column('pass_count', sa.Integer(), nullable=True))
+    op.add_column('testscript', sa.Column('fail_count', sa.Integer(), nullable=True))
+    op.add_column('testscript', sa.Column('recent_statuses', sa.String(), nullable=True))
+
+    # Backfill from history. Frozen SQL over the tables as they are at this revision; same
+    # result as history_service.rebuild_script_stats at the time (last 30 runs, oldest first)
+    op.execute(
+        "UPDATE testscript SET run_count = 0, pass_count = 0, fail_count = 0, "
+        "success_rate = 0.0, recent_statuses = ''"
+    )
+    op.execute("""
+        WITH totals AS (
+            SELECT script_id,
+                   COUNT(id) AS runs,
+                   SUM(CASE WHEN status = 'passed' THEN 1 ELSE 0 END) AS passed,
+                   MAX(run_date) AS last_run
+            FROM testhistory
+            WHERE script_id IS NOT NULL
+            GROUP BY script_id
+        ),
+        ranked AS (
+            SELECT script_id, status,
+                   ROW_NUMBER() OVER (PARTITION BY script_id ORDER BY run_date DESC) AS rn
+            FROM testhistory
+            WHERE script_id IS NOT NULL
+        ),
+        recent AS (
+            SELECT script_id,
+                   STRING_AGG(CASE WHEN status = 'passed' THEN 'P' ELSE 'F' END, '' ORDER BY rn DESC) AS statuses
+            FROM ranked
+            WHERE rn <= 30
+            GROUP BY script_id
+        )
+        UPDATE testscript SET
+            run_count = totals.runs,
+            pass_count = totals.passed,
+            fail_count = totals.runs - totals.passed,
+            success_rate = ROUND(totals.passed * 100.0 / totals.runs, 1),
+            recent_statuses = COALESCE(recent.statuses, ''),
+            last_run = COALESCE(totals.last_run, testscript.last_run)
+        FROM totals
+        LEFT JOIN recent ON recent.script_id = totals.script_id
+        WHERE testscript.id = totals.script_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('testscript', 'recent_statuses')
+    op.drop_column('testscript', 'fail_count')
+    op.drop_column('testscript', 'pass_count')
@@ -0,0 +1,95 @@
+"""Add ProjectStats dashboard aggregates
+
+Revision ID: c4a9e2f71b38
+Revises: b7e3f0a9d412
+Create Date: 2026-10-19 13:20:44.918302
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e2f71b38'
+down_revision: Union[str, None] = 'b7e3f0a9d412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_ORIGINS = ("AI", "STEP", "AI_EXPLORATION", "MANUAL")
+
+
+def _build_stats(bind, project_id: str) -> None:
+    """Frozen SQL copy of project_stats_service.rebuild at this revision."""
+    total, passed = bind.execute(sa.text(
+        "SELECT COUNT(id), COALESCE(SUM(CASE WHEN status = 'passed' THEN 1 ELSE 0 END), 0) "
+        "FROM testhistory WHERE project_id = :p"
+    ), {"p": project_id}).one()
+    runs_by_trigger = {
+        trigger or "manual": count for trigger, count in bind.execute(sa.text(
+            "SELECT trigger, COUNT(id) FROM testhistory WHERE project_id = :p GROUP BY trigger"
+        ), {"p": project_id}).fetchall()
+    }
+
+    # Latest run per active script
+    by_origin = {origin: 0 for origin in DEFAULT_ORIGINS}
+    for status, origin in bind.execute(sa.text(
+        "SELECT status, origin FROM ("
+        "  SELECT DISTINCT ON (h.script_id) h.status, s.origin "
+        "  FROM testhistory h JOIN testscript s ON s.id = h.script_id "
+        "  WHERE h.project_id = :p AND s.is_active = TRUE "
+        "  ORDER BY h.script_id, h.run_date DESC"
+        ") latest"
+    ), {"p": project_id}).fetchall():
+        if status == "failed":
+            origin = origin or "MANUAL"
+            by_origin[origin] = by_origin.get(origin, 0) + 1
+
+    total_assets, weekly_growth = bind.execute(sa.text(
+        "SELECT COUNT(id) FILTER (WHERE is_active = TRUE), "
+        "COUNT(id) FILTER (WHERE created_at >= now() - interval '7 days') "
+        "FROM testscript WHERE project_id = :p"
+    ), {"p": project_id}).one()
+
+    bind.execute(sa.text(
+        "INSERT INTO projectstats (project_id, total_runs, passed_runs, failed_runs, runs_by_trigger, "
+        "active_defects, active_defects_by_origin, total_assets, weekly_growth, assets_refreshed_at, needs_rebuild) "
+        "VALUES (:p, :total, :passed, :failed, CAST(:by_trigger AS JSON), :defects, CAST(:by_origin AS JSON), "
+        ":assets, :growth, now(), FALSE)"
+    ), {
+        "p": project_id, "total": total, "passed": int(passed), "failed": total - int(passed),
+        "by_trigger": json.dumps(runs_by_trigger), "defects": sum(by_origin.values()),
+        "by_origin": json.dumps(by_origin), "assets": total_assets, "growth": weekly_growth,
+    })
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('projectstats',
+    sa.Column('project_id', sa.String(), nullable=False),
+    sa.Column('total_runs', sa.Integer(), nullable=True),
+    sa.Column('passed_runs', sa.Integer(), nullable=True),
+    sa.Column('failed_runs', sa.Integer(), nullable=True),
+    sa.Column('runs_by_trigger', sa.JSON(), nullable=True),
+    sa.Column('active_defects', sa.Integer(), nullable=True),
+    sa.Column('active_defects_by_origin', sa.JSON(), nullable=True),
+    sa.Column('total_assets', sa.Integer(), nullable=True),
+    sa.Column('weekly_growth', sa.Integer(), nullable=True),
+    sa.Column('assets_refreshed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('needs_rebuild', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    # ### end Alembic commands ###
+
+    # Rows are otherwise built lazily on the first /history/summary call; build them now
+    bind = op.get_bind()
+    for (project_id,) in bind.execute(sa.text("SELECT id FROM project")).fetchall():
+        _build_stats(bind, project_id)
+
+
+def downgrade() -> None:
+    op.drop_table('projectstats')
@@ -0,0 +1,43 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: e5b2c7d94f10
+Revises: d81f5c3a0e26
+Create Date: 2026-10-19 14:47:12.083529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7d94f10'
+down_revision: Union[str, None] = 'd81f5c3a0e26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Row-value comparisons skip NULL sort keys, so legacy rows without a timestamp get one
+    op.execute("UPDATE testscript SET created_at = TIMESTAMPTZ '1970-01-01 00:00:00+00' WHERE created_at IS NULL")
+    op.execute("UPDATE scenario SET created_at = TIMESTAMPTZ '1970-01-01 00:00:00+00' WHERE created_at IS NULL")
+    op.execute("UPDATE testhistory SET run_date = TIMESTAMPTZ '1970-01-01 00:00:00+00' WHERE run_date IS NULL")
+
+    op.create_index('ix_testhistory_project_id_run_date_id', 'testhistory', ['project_id', 'run_date', 'id'], unique=False)
+    op.create_index('ix_testhistory_script_id_run_date_id', 'testhistory', ['script_id', 'run_date', 'id'], unique=False)
+    op.create_index('ix_testscript_project_id_created_at_id', 'testscript', ['project_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_scenario_project_id_created_at_id', 'scenario', ['project_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_testobject_project_id_id', 'testobject', ['project_id', 'id'], unique=False)
+    op.create_index('ix_testaction_project_id_id', 'testaction', ['project_id', 'id'], unique=False)
+    op.create_index('ix_testdataset_project_id_id', 'testdataset', ['project_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_testdataset_project_id_id', table_name='testdataset')
+    op.drop_index('ix_testaction_project_id_id', table_name='testaction')
+    op.drop_index('ix_testobject_project_id_id', table_name='testobject')
+    op.drop_index('ix_scenario_project_id_created_at_id', table_name='scenario')
+    op.drop_index('ix_testscript_project_id_created_at_id', table_name='testscript')
+    op.drop_index('ix_testhistory_script_id_run_date_id', table_name='testhistory')
+    op.drop_index('ix_testhistory_project_id_run_date_id', table_name='testhistory')
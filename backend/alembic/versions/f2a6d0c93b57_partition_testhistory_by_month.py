@@ -0,0 +1,148 @@
+"""Partition testhistory by month and add testhistoryarchive
+
+Revision ID: f2a6d0c93b57
+Revises: e5b2c7d94f10
+Create Date: 2026-10-19 16:05:41.519270
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6d0c93b57'
+down_revision: Union[str, None] = 'e5b2c7d94f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Created ahead of the current month; app.services.history_archive keeps this window rolling
+MONTHS_AHEAD = 3
+
+# (name, columns) of the plain indexes on testhistory, recreated on the new parent table
+HISTORY_INDEXES = [
+    ('ix_testhistory_id', ['id']),
+    ('ix_testhistory_project_id', ['project_id']),
+    ('ix_testhistory_script_id', ['script_id']),
+    ('ix_testhistory_run_id', ['run_id']),
+    ('ix_testhistory_failure_signature', ['failure_signature']),
+    ('ix_testhistory_project_id_run_date_id', ['project_id', 'run_date', 'id']),
+    ('ix_testhistory_script_id_run_date_id', ['script_id', 'run_date', 'id']),
+]
+
+
+def _month_start(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    years, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def _create_history_indexes() -> None:
+    for name, columns in HISTORY_INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON testhistory ({', '.join(columns)})")
+
+
+def upgrade() -> None:
+    op.create_table('testhistoryarchive',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('project_id', sa.String(), nullable=True),
+        sa.Column('script_id', sa.String(), nullable=True),
+        sa.Column('run_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('trigger', sa.String(), nullable=True),
+        sa.Column('partition', sa.String(), nullable=True),
+        sa.Column('codec', sa.String(), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_testhistoryarchive_project_id'), 'testhistoryarchive', ['project_id'], unique=False)
+    op.create_index(op.f('ix_testhistoryarchive_script_id'), 'testhistoryarchive', ['script_id'], unique=False)
+    op.create_index(op.f('ix_selfhealinglog_history_id'), 'selfhealinglog', ['history_id'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Declarative partitioning is Postgres-only; other backends keep a plain table
+        return
+
+    # A partitioned table cannot have a unique key on id alone, so nothing can reference it
+    op.execute("""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN SELECT conrelid::regclass AS tbl, conname FROM pg_constraint
+                     WHERE contype = 'f' AND confrelid = 'testhistory'::regclass LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.tbl, r.conname);
+            END LOOP;
+        END $$;
+    """)
+
+    op.execute("UPDATE testhistory SET run_date = now() WHERE run_date IS NULL")
+    op.execute("ALTER TABLE testhistory RENAME TO testhistory_unpartitioned")
+    op.execute(
+        "CREATE TABLE testhistory (LIKE testhistory_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (run_date)"
+    )
+    op.execute("ALTER TABLE testhistory ALTER COLUMN run_date SET NOT NULL")
+
+    # One partition per month from the oldest real run (1970 placeholders from the keyset
+    # backfill go to the DEFAULT partition) through MONTHS_AHEAD months from now
+    oldest = bind.execute(sa.text(
+        "SELECT min(run_date) FROM testhistory_unpartitioned WHERE run_date >= TIMESTAMPTZ '2000-01-01 00:00:00+00'"
+    )).scalar()
+    current = _month_start(datetime.now(timezone.utc))
+    month = _month_start(oldest) if oldest else current
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE testhistory_p{month:%Y%m} PARTITION OF testhistory "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE testhistory_default PARTITION OF testhistory DEFAULT")
+
+    op.execute("INSERT INTO testhistory SELECT * FROM testhistory_unpartitioned")
+    op.execute("DROP TABLE testhistory_unpartitioned")
+
+    op.execute("ALTER TABLE testhistory ADD CONSTRAINT testhistory_pkey PRIMARY KEY (id, run_date)")
+    op.execute(
+        "ALTER TABLE testhistory ADD CONSTRAINT testhistory_schedule_id_fkey "
+        "FOREIGN KEY (schedule_id) REFERENCES testschedule (id)"
+    )
+    _create_history_indexes()
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Archived rows are not restored; they stay in testhistoryarchive until it is dropped below
+        op.execute("ALTER TABLE testhistory RENAME TO testhistory_partitioned")
+        op.execute("CREATE TABLE testhistory (LIKE testhistory_partitioned INCLUDING DEFAULTS)")
+        op.execute("INSERT INTO testhistory SELECT * FROM testhistory_partitioned")
+        op.execute("DROP TABLE testhistory_partitioned CASCADE")
+        op.execute("ALTER TABLE testhistory ALTER COLUMN run_date DROP NOT NULL")
+        op.execute("ALTER TABLE testhistory ADD CONSTRAINT testhistory_pkey PRIMARY KEY (id)")
+        op.execute(
+            "ALTER TABLE testhistory ADD CONSTRAINT testhistory_schedule_id_fkey "
+            "FOREIGN KEY (schedule_id) REFERENCES testschedule (id)"
+        )
+        _create_history_indexes()
+        # NOT VALID: healing logs / AI sessions of archived runs no longer have a parent row
+        op.execute(
+            "ALTER TABLE selfhealinglog ADD CONSTRAINT selfhealinglog_history_id_fkey "
+            "FOREIGN KEY (history_id) REFERENCES testhistory (id) NOT VALID"
+        )
+        op.execute(
+            "ALTER TABLE aiexplorationsession ADD CONSTRAINT aiexplorationsession_history_id_fkey "
+            "FOREIGN KEY (history_id) REFERENCES testhistory (id) NOT VALID"
+        )
+
+    op.drop_index(op.f('ix_selfhealinglog_history_id'), table_name='selfhealinglog')
+    op.drop_index(op.f('ix_testhistoryarchive_script_id'), table_name='testhistoryarchive')
+    op.drop_index(op.f('ix_testhistoryarchive_project_id'), table_name='testhistoryarchive')
+    op.drop_table('testhistoryarchive')
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import login, users, projects, customers, scripts, scenarios, history, schedules, ai, run, personas, exploration, assets, inspector, device_farm, knowledge
+from app.api.api_v1.endpoints import login, users, projects, customers, scripts, scenarios, history, schedules, ai, run, personas, exploration, assets, inspector, device_farm, knowledge, blobs, debug
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
@@ -19,3 +19,5 @@ api_router.include_router(assets.router, prefix="/assets", tags=["assets"])
 api_router.include_router(inspector.router, prefix="/inspector", tags=["inspector"])
 api_router.include_router(device_farm.router, prefix="/device-farm", tags=["device_farm"])
 api_router.include_router(knowledge.router, prefix="/knowledge", tags=["knowledge"])
+api_router.include_router(blobs.router, prefix="/blobs", tags=["blobs"])
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
@@ -13,6 +13,7 @@ router = APIRouter()
 
 # --- Tool Definitions ---
 from app.core.config import settings
+from app.services.telemetry import agenerate_content, generate_content
 
 def get_golden_scripts(filter_tag: str = None):
     """Get the list of all certified Golden Script test assets."""
@@ -98,7 +99,8 @@ async def chat_with_oracle(
         # Determine model
         model_name = settings.GEMINI_MODEL
         
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "ai.chat_with_oracle",
             model=model_name,
             contents=contents,
             config=config
@@ -196,7 +198,8 @@ async def generate_test_data(
         Return ONLY the JSON array.
         """
 
-        response = client.models.generate_content(
+        response = generate_content(
+            client, "ai.generate_test_data",
             model=settings.GEMINI_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
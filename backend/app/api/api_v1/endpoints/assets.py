@@ -1,7 +1,8 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.crud.base import keyset_paginate, NEXT_CURSOR_HEADER
 from app.models.test import TestObject, TestAction, TestDataset
 from app.schemas.test_asset import (
     TestObjectCreate, TestObjectUpdate, TestObjectResponse,
@@ -17,11 +18,13 @@ router = APIRouter()
 
 @router.get("/objects", response_model=List[TestObjectResponse])
 def read_test_objects(
+    response: Response,
     project_id: str,
     platform: Optional[str] = Query(None),
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     Retrieve test objects (selectors) by project.
@@ -32,7 +35,12 @@ def read_test_objects(
             query = query.filter(TestObject.platform.in_([platform, "COMMON"]))
         else:
             query = query.filter(TestObject.platform == platform)
-    return query.offset(skip).limit(limit).all()
+    if skip and not cursor:
+        return query.offset(skip).limit(limit).all()
+    items, next_cursor = keyset_paginate(query, [TestObject.id], cursor=cursor, limit=limit, descending=False)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
 
 @router.post("/objects", response_model=TestObjectResponse)
 def create_test_object(
@@ -86,11 +94,13 @@ def update_test_object(
 
 @router.get("/actions", response_model=List[TestActionResponse])
 def read_test_actions(
+    response: Response,
     project_id: Optional[str] = None,
     platform: Optional[str] = Query(None),
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     Retrieve test actions.
@@ -110,7 +120,12 @@ def read_test_actions(
         else:
             query = query.filter(TestAction.platform == platform)
        
-    return query.offset(skip).limit(limit).all()
+    if skip and not cursor:
+        return query.offset(skip).limit(limit).all()
+    items, next_cursor = keyset_paginate(query, [TestAction.id], cursor=cursor, limit=limit, descending=False)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
 
 @router.post("/actions", response_model=TestActionResponse)
 def create_test_action(
@@ -164,11 +179,13 @@ def update_test_action(
 
 @router.get("/data", response_model=List[TestDatasetResponse])
 def read_test_datasets(
+    response: Response,
     project_id: str,
     platform: Optional[str] = Query(None),
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     Retrieve test datasets by project.
@@ -179,7 +196,12 @@ def read_test_datasets(
             query = query.filter(TestDataset.platform.in_([platform, "COMMON"]))
         else:
             query = query.filter(TestDataset.platform == platform)
-    return query.offset(skip).limit(limit).all()
+    if skip and not cursor:
+        return query.offset(skip).limit(limit).all()
+    items, next_cursor = keyset_paginate(query, [TestDataset.id], cursor=cursor, limit=limit, descending=False)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
 
 @router.post("/data", response_model=TestDatasetResponse)
 def create_test_dataset(
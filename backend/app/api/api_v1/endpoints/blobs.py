@@ -0,0 +1,49 @@
+import time
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.services.blob_store import blob_store
+
+router = APIRouter()
+
+# Keys are content hashes, so a blob never changes once written; cacheable until the URL expires
+CACHE_CONTROL = "private, max-age={max_age}, immutable"
+
+
+def _media_type(header: bytes) -> str:
+    if header.startswith(b"\x89PNG"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+@router.get("/{key}")
+def read_blob(
+    key: str,
+    request: Request,
+    expires: int,
+    sig: str,
+):
+    """
+    Serves a stored blob (e.g. a step screenshot referenced by `screenshot_hash`).
+    Authorized by the short-lived signed URL handed out with the history step
+    (`screenshot_url`), so it works directly as an <img> src without a session token.
+    """
+    if not blob_store.verify_signature(key, expires, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired blob URL")
+    path = blob_store.path_for(key)
+    if not path or not path.exists():
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    etag = f'"{key}"'
+    headers = {"Cache-Control": CACHE_CONTROL.format(max_age=max(0, expires - int(time.time()))), "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    with open(path, "rb") as f:
+        header = f.read(12)
+    return FileResponse(path, media_type=_media_type(header), headers=headers)
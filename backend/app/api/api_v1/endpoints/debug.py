@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from app import models
+from app.api import deps
+from app.core import profiler
+
+router = APIRouter()
+
+# One profile at a time; overlapping samplers would mostly measure each other
+_profile_lock = threading.Lock()
+
+
+def _background_loops() -> dict:
+    """Event loop of the shared Playwright runtime thread, if it is running."""
+    from app.services.playwright_runtime import THREAD_NAME, playwright_runtime
+
+    loop = playwright_runtime.loop
+    return {THREAD_NAME: loop} if loop is not None else {}
+
+
+@router.get("/profile", response_model=Any)
+async def profile(
+    seconds: float = 5.0,
+    hz: int = 100,
+    format: str = "json",
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Samples all Python threads of the backend process for `seconds` and measures the
+    lag of the API event loop and the Playwright runtime loop meanwhile.
+
+    format=collapsed returns only the collapsed stacks (feed to flamegraph.pl or
+    speedscope); json adds per-thread top frames and event-loop lag.
+    """
+    if not 0 < seconds <= 60:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 60]")
+    if not 1 <= hz <= 1000:
+        raise HTTPException(status_code=400, detail="hz must be in [1, 1000]")
+    if format not in ("json", "collapsed"):
+        raise HTTPException(status_code=400, detail="format must be json or collapsed")
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already being recorded")
+
+    try:
+        loops = {"api": asyncio.get_running_loop(), **_background_loops()}
+        result = await run_in_threadpool(profiler.sample, seconds, hz, loops)
+    finally:
+        _profile_lock.release()
+
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"] + "\n")
+    return result
+
+
+@router.get("/governor", response_model=Any)
+def governor_state(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Admission state of the resource governor: admitted and queued sessions by kind,
+    what is holding the queue back and current Chromium usage against the budgets.
+    """
+    from app.services.resource_governor import resource_governor
+    return resource_governor.state()
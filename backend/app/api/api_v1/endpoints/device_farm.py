@@ -1,7 +1,7 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import List
 from app.services.device_service import device_service
-from app.services.app_runner import app_step_runner
+from app.services.app_executor import app_runner_registry
 import asyncio
 import subprocess
 
@@ -16,8 +16,8 @@ async def get_devices():
     adb_devices = device_service.get_connected_devices()
     mapped_devices = []
     
-    # Check if there is an active Appium session
-    active_device_id = app_step_runner.current_device_id
+    # Devices with an active Appium session (inspector/exploration or a running test)
+    active_device_ids = app_runner_registry.active_device_ids()
 
     for dev in adb_devices:
         # device_service returns dicts with id, status, alias, model, etc.
@@ -25,7 +25,7 @@ async def get_devices():
         status = "Available" if dev.get("status") == "device" else "Offline"
         
         # Override status if this device is currently strictly "In-Use" by our Appium runner
-        if status == "Available" and active_device_id == dev["id"]:
+        if status == "Available" and dev["id"] in active_device_ids:
             status = "In-Use"
         
         # Determine OS version (optional, we could fetch via getprop, but keeping it fast for now or mock if not fetched)
@@ -5,12 +5,16 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from app.api import deps
+import asyncio
+import time
 import uuid
 
 from app.services.crawler import CrawlerService
-from app.services.app_runner import app_step_runner
+from app.services.app_executor import async_app_step_runner
 from app.services.device_service import device_service
+from app.services.progress_tracker import ProgressTracker, fingerprint_state, NO_PROGRESS, STUCK
 from app.core.config import settings
+from app.services.telemetry import generate_content
 from selenium.common.exceptions import InvalidSessionIdException
 import logging
 logger = logging.getLogger(__name__)
@@ -18,6 +22,18 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 crawler_service = CrawlerService()
 
+# Loop / no-progress detection per exploration session. Dropped on /stop, when the session
+# ends or errors out, and after PROGRESS_TRACKER_TTL_SECONDS without a step (abandoned sessions)
+_progress_trackers: Dict[str, ProgressTracker] = {}
+PROGRESS_TRACKER_TTL_SECONDS = 1800
+
+
+def _tracker_for(session_id: str) -> ProgressTracker:
+    now = time.monotonic()
+    for stale_id in [sid for sid, t in _progress_trackers.items() if now - t.last_seen > PROGRESS_TRACKER_TTL_SECONDS]:
+        _progress_trackers.pop(stale_id, None)
+    return _progress_trackers.setdefault(session_id, ProgressTracker())
+
 # --- Pydantic Models ---
 
 class SaveRequest(BaseModel):
@@ -77,6 +93,27 @@ class ExplorationStep(BaseModel):
     actual_observed_text: str = ""
     screenshot_data: Optional[str] = None
 
+# --- Helpers ---
+
+async def _capture_app_state(title: str, capture_screenshot: bool) -> Dict[str, Any]:
+    """Fetches the Appium page source and (optionally) the screenshot concurrently."""
+    if capture_screenshot:
+        xml_source, screenshot = await asyncio.gather(
+            async_app_step_runner.get_clean_source(),
+            async_app_step_runner.get_screenshot()
+        )
+    else:
+        xml_source, screenshot = await async_app_step_runner.get_clean_source(), None
+
+    state = {
+        "title": title,
+        "url": "App Interface",
+        "html_structure": xml_source
+    }
+    if capture_screenshot:
+        state["screenshot"] = screenshot or ""
+    return state
+
 # --- API Endpoints ---
 
 @router.post("/start")
@@ -86,7 +123,6 @@ async def start_session(req: StartRequest):
     """
     session_id = str(uuid.uuid4())
     
-    import asyncio
     print(f"[DEBUG] Current Event Loop Type: {type(asyncio.get_running_loop())}")
 
     try:
@@ -108,27 +144,20 @@ async def start_session(req: StartRequest):
             if req.app_package:
                 caps["appPackage"] = req.app_package
                 
-            success, err = app_step_runner.start_session(caps)
+            success, err = await async_app_step_runner.start_session(caps)
             if not success:
                 raise HTTPException(status_code=500, detail=f"Appium session failed: {err}")
                 
             # Explicitly bring the app to the foreground if a package was provided
-            if req.app_package and app_step_runner.driver:
+            if req.app_package and async_app_step_runner.driver:
                 try:
-                    app_step_runner.driver.activate_app(req.app_package)
+                    await async_app_step_runner.activate_app(req.app_package)
                 except Exception as activate_e:
                     print(f"Warning: Core activate_app failed for {req.app_package}: {activate_e}")
                 
             # Add a small delay and capture state
             await asyncio.sleep(4)
-            xml_source = app_step_runner.get_clean_source()
-            initial_state = {
-                "title": f"App ({req.app_package or 'Device'})",
-                "url": "App Interface",
-                "html_structure": xml_source
-            }
-            if req.capture_screenshots:
-                initial_state["screenshot"] = app_step_runner.get_screenshot() or ""
+            initial_state = await _capture_app_state(f"App ({req.app_package or 'Device'})", req.capture_screenshots)
             return {"session_id": session_id, "state": initial_state}
             
         else:
@@ -148,24 +177,38 @@ async def next_step(req: StepRequest):
     # 1. Get Current State (or result of last action)
     try:
         if req.platform.upper() == "APP":
-            xml_source = app_step_runner.get_clean_source()
-            state = {
-                "title": "Mobile App UI",
-                "url": "App Interface",
-                "html_structure": xml_source
-            }
-            if req.capture_screenshots:
-                state["screenshot"] = app_step_runner.get_screenshot() or ""
+            state = await _capture_app_state("Mobile App UI", req.capture_screenshots)
         else:
             state = await crawler_service.get_state(req.session_id)
-            if not req.capture_screenshots and "screenshot" in state:
-                state["screenshot"] = "" # Clear if not requested to save bandwidth
     except (ValueError, InvalidSessionIdException):
+         _progress_trackers.pop(req.session_id, None)
          raise HTTPException(status_code=404, detail="Mobile session expired or Appium connection lost. Please restart the session.")
     except Exception as e:
         logger.error(f"Error captured in exploration step: {e}")
+        _progress_trackers.pop(req.session_id, None)
         raise HTTPException(status_code=500, detail=str(e))
 
+    tracker = _tracker_for(req.session_id)
+    verdict = tracker.observe(fingerprint_state(state.get("html_structure"), state.get("url"), state.get("screenshot")))
+    if req.platform.upper() != "APP" and not req.capture_screenshots and "screenshot" in state:
+        state["screenshot"] = "" # Clear if not requested to save bandwidth
+
+    # Agent is going in circles: stop here instead of paying for another LLM call
+    if verdict["status"] == STUCK and not req.override_step:
+        _progress_trackers.pop(req.session_id, None)
+        return ExplorationStep(
+            step_number=len(req.history) + 1,
+            observation=f"No progress detected ({verdict['reason']}, {verdict['stall_count']} consecutive actions without a new screen).",
+            thought="같은 화면이 반복되어 더 이상 진행할 수 없다고 판단했습니다. 세션을 조기 종료합니다.",
+            action_type="finish",
+            description="진행 없음 감지 - 조기 종료",
+            status="Failed"
+        )
+
+    progress_str = ""
+    if verdict["status"] == NO_PROGRESS:
+        progress_str = ProgressTracker.hint_for(verdict)
+
     # 2. Build Prompt
     # Sanitize credentials
     user_context_str = "No user credentials provided."
@@ -194,6 +237,7 @@ async def next_step(req: StepRequest):
     
     History:
     {req.history}
+    {progress_str}
     
     Task:
     Determine the NEXT interaction to move towards the goal.
@@ -257,7 +301,8 @@ async def next_step(req: StepRequest):
         client = genai.Client(api_key=settings.GOOGLE_API_KEY)
         
         def _call_llm():
-            return client.models.generate_content(
+            return generate_content(
+                client, "exploration.next_step",
                 model=settings.GEMINI_MODEL,
                 contents=prompt,
                 config=types.GenerateContentConfig(
@@ -306,7 +351,7 @@ async def next_step(req: StepRequest):
                     "selector_value": target,
                     "option": plan.action_value
                 }
-                action_res = app_step_runner.execute_step(step_dict)
+                action_res = await async_app_step_runner.execute_step(step_dict)
             else:
                 action_res = await crawler_service.perform_action(
                     req.session_id, 
@@ -341,17 +386,21 @@ async def next_step(req: StepRequest):
         # Finally, attach screenshot after action if requested
         if req.capture_screenshots:
             if req.platform.upper() == "APP":
-                plan.screenshot_data = app_step_runner.get_screenshot() or ""
+                plan.screenshot_data = await async_app_step_runner.get_screenshot() or ""
             else:
                 final_state = await crawler_service.get_state(req.session_id)
                 plan.screenshot_data = final_state.get("screenshot", "")
 
+    if plan.status in ("Completed", "Failed"):
+        # Session is over; an error raised above leaves the tracker to the TTL sweep
+        _progress_trackers.pop(req.session_id, None)
     return plan
 
 @router.post("/stop")
 async def stop_session(req: StopRequest):
+    _progress_trackers.pop(req.session_id, None)
     if req.platform.upper() == "APP":
-        app_step_runner.stop_session()
+        await async_app_step_runner.stop_session()
     else:
         await crawler_service.close_session(req.session_id)
     return {"status": "cost-stopped"}
@@ -365,6 +414,7 @@ async def save_history(req: SaveRequest):
     from app.db.session import SessionLocal
     from app.models.ai import AiExplorationSession
     from app.services.asset_manager import AssetManager
+    from app.services.blob_store import blob_store
     import uuid
 
     db = SessionLocal()
@@ -384,7 +434,7 @@ async def save_history(req: SaveRequest):
             target_url=req.url,
             goal=req.goal,
             persona_id=req.persona_id,
-            steps_data=req.history,
+            steps_data=blob_store.externalize_steps(req.history),
             final_score=final_score
         )
         db.add(ai_session)
@@ -496,7 +546,8 @@ async def analyze_report(req: ReportRequest):
     """
 
     def _call_llm_report():
-        return client.models.generate_content(
+        return generate_content(
+            client, "exploration.analyze_report",
             model=settings.GEMINI_MODEL,
             contents=prompt,
              config=types.GenerateContentConfig(
@@ -1,14 +1,15 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session, joinedload
 
 from app import crud, models, schemas
 from app.schemas import self_healing
 from app.api import deps
+from app.crud.base import NEXT_CURSOR_HEADER, parse_fields, list_item
 from app.models.test import TestHistory, TestScript, SelfHealingLog
 from app.models.project import ProjectInsight
-from app.schemas.test_history import TestHistoryCreate, TestHistorySummary, ProjectInsightCreate, ProjectInsight as ProjectInsightSchema
+from app.schemas.test_history import TestHistoryCreate, TestHistorySummary, FailureCluster, StepTimingStat, HistoryLogPage, ProjectInsightCreate, ProjectInsight as ProjectInsightSchema
 import uuid
 
 router = APIRouter()
@@ -60,23 +61,43 @@ def get_latest_insight(
         .order_by(ProjectInsight.created_at.desc())\
         .first()
 
-@router.get("/", response_model=List[schemas.TestHistory])
+@router.get("/", response_model=List[schemas.TestHistoryListItem], response_model_exclude_unset=True)
 def read_history(
+    response: Response,
     db: Session = Depends(deps.get_db),
     project_id: str = "",
     script_id: str = "",
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve test history.
+    Retrieve test history, newest first.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page;
+    `skip` is still accepted for old clients but gets slower with depth.
+    Heavy columns (logs, step_results, failure_analysis) come from GET /history/{id}
+    or can be opted into with `fields=step_results,failure_analysis`.
     """
-    if script_id:
-        return crud.history.get_by_script(db, script_id=script_id, skip=skip, limit=limit)
-    if project_id:
-        return crud.history.get_by_project(db, project_id=project_id, skip=skip, limit=limit)
-    return []
+    include = parse_fields(fields, crud.history.HEAVY_FIELDS)
+    next_cursor = None
+    if skip and not cursor:
+        if script_id:
+            items = crud.history.get_by_script(db, script_id=script_id, skip=skip, limit=limit, include=include)
+        elif project_id:
+            items = crud.history.get_by_project(db, project_id=project_id, skip=skip, limit=limit, include=include)
+        else:
+            return []
+    elif script_id:
+        items, next_cursor = crud.history.get_page_by_script(db, script_id=script_id, cursor=cursor, limit=limit, include=include)
+    elif project_id:
+        items, next_cursor = crud.history.get_page_by_project(db, project_id=project_id, cursor=cursor, limit=limit, include=include)
+    else:
+        return []
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [list_item(h, schemas.TestHistoryListItem, crud.history.HEAVY_FIELDS, include) for h in items]
 
 @router.get("/active-defects", response_model=List[schemas.TestHistory])
 def read_active_defects(
@@ -87,19 +108,19 @@ def read_active_defects(
     """
     Retrieve all active defects (latest failure for each script) in a project.
     """
-    from app.models.test import TestHistory
-    from sqlalchemy import desc
+    from app.models.test import TestHistory, ScriptLatestResult
     
     if not project_id:
         return []
         
-    # Get only the latest run for each script, where the latest run was FAILED, AND script is ACTIVE
-    all_recent = db.query(TestHistory).join(TestHistory.script).distinct(TestHistory.script_id).filter(
-        TestHistory.project_id == project_id,
+    # Latest run per script comes from the maintained scriptlatestresult table (FAILED + script ACTIVE)
+    active_defects = db.query(TestHistory).join(
+        ScriptLatestResult, ScriptLatestResult.history_id == TestHistory.id
+    ).join(TestScript, TestScript.id == ScriptLatestResult.script_id).filter(
+        ScriptLatestResult.project_id == project_id,
+        ScriptLatestResult.status == "failed",
         TestScript.is_active == True
-    ).options(joinedload(TestHistory.script)).order_by(TestHistory.script_id, desc(TestHistory.run_date)).all()
-    
-    active_defects = [h for h in all_recent if h.script_id and h.status == 'failed']
+    ).options(joinedload(TestHistory.healing_logs)).all()
     return active_defects
 
 @router.get("/summary", response_model=schemas.TestHistorySummary)
@@ -110,72 +131,68 @@ def read_history_summary(
 ) -> Any:
     """
     Get summary statistics for history.
+    Served from the maintained per-project aggregate row (see project_stats).
     """
-    from app.models.test import TestHistory, TestScript
-    from datetime import datetime, timedelta
-    
+    from app.services.project_stats import project_stats_service
+
     if not project_id:
         return {
             "total": 0, "passed": 0, "failed": 0, "rate": 0, 
             "pipelineRuns": 0, "scheduledRuns": 0,
             "total_assets": 0, "active_defects": 0, "weekly_growth": 0
         }
-    
-    # 1. Base Execution Stats
-    total = db.query(TestHistory).filter(TestHistory.project_id == project_id).count()
-    passed = db.query(TestHistory).filter(TestHistory.project_id == project_id, TestHistory.status == 'passed').count()
-    failed = total - passed
-    rate = round((passed / total) * 100, 1) if total > 0 else 0
-    pipelineRuns = db.query(TestHistory).filter(TestHistory.project_id == project_id, TestHistory.trigger == 'pipeline').count()
-    scheduledRuns = db.query(TestHistory).filter(TestHistory.project_id == project_id, TestHistory.trigger == 'scheduled').count()
-    
-    # 2. Asset Stats (Golden Asset Fleet) - Only Active Assets
-    total_assets = db.query(TestScript).filter(TestScript.project_id == project_id, TestScript.is_active == True).count()
-    
-    # Weekly growth: Created in the last 7 days
-    weekly_growth = 0
-    try:
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        weekly_growth = db.query(TestScript).filter(
-            TestScript.project_id == project_id,
-            TestScript.created_at >= seven_days_ago
-        ).count()
-    except Exception as e:
-        print(f"DEBUG: Failed to calculate weekly growth: {e}")
-        weekly_growth = 0
 
-    # 3. Active Defects (Latest run is failed) - Only for Active Assets
-    # Optimized: Use DISTINCT ON to get only the latest history record for each script
-    # This avoids fetching all history records and processing them in Python.
-    from sqlalchemy import desc
-    all_recent = db.query(TestHistory).join(TestHistory.script).distinct(TestHistory.script_id).filter(
-        TestHistory.project_id == project_id,
-        TestScript.is_active == True
-    ).options(joinedload(TestHistory.script)).order_by(TestHistory.script_id, desc(TestHistory.run_date)).all()
-    
-    active_defects = 0
-    active_defects_by_origin = {"AI": 0, "STEP": 0, "AI_EXPLORATION": 0, "MANUAL": 0}
-    
-    for h in all_recent:
-        if not h.script_id: continue
-        if h.status == 'failed':
-            active_defects += 1
-            if h.script:
-                origin = h.script.origin or "MANUAL"
-                active_defects_by_origin[origin] = active_defects_by_origin.get(origin, 0) + 1
-    
-    return {
-        "total": total,
-        "passed": passed,
-        "failed": failed,
-        "rate": rate,
-        "pipelineRuns": pipelineRuns,
-        "scheduledRuns": scheduledRuns,
-        "total_assets": total_assets,
-        "active_defects": active_defects,
-        "weekly_growth": weekly_growth,
-        "active_defects_by_origin": active_defects_by_origin
-    }
+    return project_stats_service.get_summary(db, project_id)
+
+@router.get("/failure-clusters", response_model=List[FailureCluster])
+def read_failure_clusters(
+    db: Session = Depends(deps.get_db),
+    project_id: str = "",
+    run_id: Optional[str] = None,
+    schedule_id: Optional[str] = None,
+    hours: int = 24,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Group failed runs by failure signature, so a batch failing for one root cause
+    shows up as a single cluster instead of N separate defects.
+    """
+    from app.services.failure_clustering import failure_cluster_service
+
+    if not project_id:
+        return []
+    return failure_cluster_service.list_clusters(
+        db, project_id, run_id=run_id, schedule_id=schedule_id, hours=hours
+    )
+
+@router.get("/step-timings", response_model=List[StepTimingStat])
+def read_step_timings(
+    db: Session = Depends(deps.get_db),
+    project_id: str = "",
+    group_by: str = "action",
+    days: int = 30,
+    interval: Optional[str] = None,
+    script_id: Optional[str] = None,
+    action: Optional[str] = None,
+    limit: int = 200,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Where step time goes (locate / action / settle / assert / screenshot / encode),
+    aggregated per action type, selector or script, optionally per day/week/month.
+    """
+    from app.services.step_timing import step_timing_service, GROUP_KEYS, INTERVALS
+
+    if group_by not in GROUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUP_KEYS)}")
+    if interval and interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of: {', '.join(INTERVALS)}")
+    if not project_id:
+        return []
+    return step_timing_service.aggregate(
+        db, project_id, group_by=group_by, days=days, interval=interval,
+        script_id=script_id, action=action, limit=min(limit, 1000)
+    )
 
 @router.post("/", response_model=schemas.TestHistory)
 def create_history_entry(
@@ -187,29 +204,8 @@ def create_history_entry(
     """
     Record new test history.
     """
+    # Script/Asset statistics are updated incrementally inside create (history_service.record_run)
     history = crud.history.create(db, obj_in=history_in)
-    
-    # Update Script/Asset Statistics
-    if history_in.script_id:
-        from app.models.test import TestScript
-        
-        script = db.query(TestScript).filter(TestScript.id == history_in.script_id).first()
-        if script:
-            # 1. Get all history for stats
-            all_history = crud.history.get_by_script(db, script_id=history_in.script_id, limit=1000)
-            total_runs = len(all_history)
-            passed = sum(1 for h in all_history if h.status == 'passed')
-            success_rate = round((passed / total_runs) * 100, 1) if total_runs > 0 else 0
-            
-            # 2. Update Target
-            script.run_count = total_runs
-            script.success_rate = success_rate
-            script.last_run = history.run_date
-            
-            db.add(script)
-            db.commit()
-            print(f"DEBUG: Updated stats for {history_in.script_id}: runs={total_runs}, rate={success_rate}%")
-
     return history
 
 @router.get("/{history_id}", response_model=Any)
@@ -220,30 +216,88 @@ def read_history_detail(
 ) -> Any:
     """
     Get history by ID with full details (including AI session if exists).
+    Runs moved out of expired partitions are served from the archive (`archived: true`).
     """
+    from app.models.ai import AiExplorationSession
+    from app.services.blob_store import blob_store
+    from app.services.history_archive import history_archive_service
+
     history = crud.history.get(db, id=history_id)
-    if not history:
-        raise HTTPException(status_code=404, detail="History not found")
+    if history:
+        # Manually construct response to include ai_session since Pydantic schema might be distinct
+        # Or rely on ORM lazy loading if schema supports it.
+        # Let's return a dict merge.
+        resp = {c.name: getattr(history, c.name) for c in history.__table__.columns}
+        ai_session = history.ai_session
+    else:
+        resp = history_archive_service.get_archived(db, history_id)
+        if not resp:
+            raise HTTPException(status_code=404, detail="History not found")
+        ai_session = db.query(AiExplorationSession).filter(
+            AiExplorationSession.history_id == history_id
+        ).first()
     
-    # Manually construct response to include ai_session since Pydantic schema might be distinct
-    # Or rely on ORM lazy loading if schema supports it.
-    # Let's return a dict merge.
-    resp = {c.name: getattr(history, c.name) for c in history.__table__.columns}
-    
-    if history.ai_session:
+    resp["step_results"] = blob_store.sign_steps(resp.get("step_results"))
+
+    if ai_session:
         resp["ai_session"] = {
-            "id": history.ai_session.id,
-            "target_url": history.ai_session.target_url,
-            "goal": history.ai_session.goal,
-            "steps_data": history.ai_session.steps_data,
-            "final_score": history.ai_session.final_score,
-            "is_assetized": history.ai_session.is_assetized,
-            "generated_scenario_id": history.ai_session.generated_scenario_id,
-            "generated_script_id": history.ai_session.generated_script_id
+            "id": ai_session.id,
+            "target_url": ai_session.target_url,
+            "goal": ai_session.goal,
+            "steps_data": ai_session.steps_data,
+            "final_score": ai_session.final_score,
+            "is_assetized": ai_session.is_assetized,
+            "generated_scenario_id": ai_session.generated_scenario_id,
+            "generated_script_id": ai_session.generated_script_id
         }
         
     return resp
 
+@router.get("/{history_id}/logs", response_model=HistoryLogPage)
+def read_history_logs(
+    history_id: str,
+    offset: int = 0,
+    limit: int = 500,
+    level: Optional[str] = None,
+    tail: Optional[int] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Page through a run's execution log. `level` filters (info/error/success/cmd),
+    `tail` returns the last N lines. Only the chunks covering the page are decompressed.
+    """
+    from app.services.log_store import log_store
+
+    offset, limit = max(offset, 0), min(max(limit, 1), 5000)
+    page = log_store.read(db, history_id, offset=offset, limit=limit, level=level, tail=tail)
+    if page is not None:
+        return page
+
+    # Runs recorded before chunked storage keep their logs inline
+    from app.services.history_archive import history_archive_service
+
+    history = crud.history.get(db, id=history_id)
+    if history:
+        inline_logs = history.logs
+    else:
+        archived = history_archive_service.get_archived(db, history_id)
+        if not archived:
+            raise HTTPException(status_code=404, detail="History not found")
+        inline_logs = archived.get("logs")
+    lines = [{"line": i + 1, **l} for i, l in enumerate(inline_logs or [])]
+    level_counts = {}
+    for l in lines:
+        level_counts[l.get("type")] = level_counts.get(l.get("type"), 0) + 1
+    if level:
+        lines = [l for l in lines if l.get("type") == level]
+    if tail is not None:
+        offset, limit = max(len(lines) - tail, 0), tail
+    return {
+        "history_id": history_id, "total": len(lines), "offset": offset, "limit": limit,
+        "level": level, "level_counts": level_counts, "items": lines[offset:offset + limit]
+    }
+
 @router.get("/healing/{log_id}", response_model=self_healing.SelfHealingLog)
 def read_healing_status(
     *,
@@ -301,30 +355,17 @@ def read_pending_healing(
     db: Session = Depends(deps.get_db),
     project_id: str
 ) -> Any:
-    # 1. Fetch only the LATEST state for each unique script in this project
-    # Optimized: Use DISTINCT ON to de-dupe at the database level.
-    from sqlalchemy import desc
-    all_recent_history = db.query(TestHistory).distinct(TestHistory.script_id).filter(
-        TestHistory.project_id == project_id
-    ).options(joinedload(TestHistory.script)).order_by(TestHistory.script_id, desc(TestHistory.run_date)).all()
-    
-    pending = []
-    
-    for history in all_recent_history:
-        if not history.script_id:
-            continue
-            
-        # Check if the LATEST state is 'failed' and AI-Healing is enabled
-        if history.status == "failed" and history.script and history.script.enable_ai_test:
-            # 3. Exclude if healing is already successful for THIS specific failure
-            already_healed = db.query(SelfHealingLog).filter(
-                SelfHealingLog.history_id == history.id,
-                SelfHealingLog.status == "success"
-            ).first()
-            
-            if not already_healed:
-                pending.append(history)
-                
+    # Scripts whose LATEST run failed, with AI-Healing enabled and not yet healed for that failure
+    from sqlalchemy import or_
+    from app.models.test import ScriptLatestResult
+    pending = db.query(TestHistory).join(
+        ScriptLatestResult, ScriptLatestResult.history_id == TestHistory.id
+    ).join(TestScript, TestScript.id == ScriptLatestResult.script_id).filter(
+        ScriptLatestResult.project_id == project_id,
+        ScriptLatestResult.status == "failed",
+        TestScript.enable_ai_test == True,
+        or_(ScriptLatestResult.healing_status.is_(None), ScriptLatestResult.healing_status != "success")
+    ).options(joinedload(TestHistory.healing_logs)).all()
     return pending
 
 @router.post("/{history_id}/jira", response_model=schemas.TestHistory)
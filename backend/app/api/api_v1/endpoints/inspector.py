@@ -3,7 +3,7 @@ import logging
 import re
 from typing import Any, Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from app.services.app_runner import app_step_runner
+from app.services.app_executor import async_app_step_runner
 from app.services.web_inspector import web_inspector_service
 from app.services.device_service import device_service
 from sqlalchemy.orm import Session
@@ -88,12 +88,12 @@ def connect_device(
         else:
             logger.warning(f"Project {project_id} not found or has no mobile_config")
 
-    success, error = app_step_runner.start_session(capabilities)
+    success, error = async_app_step_runner.start_session_blocking(capabilities)
     if success:
         return {
             "success": True, 
             "message": f"Connected to {device_id} with app configuration",
-            "window_size": app_step_runner.window_size
+            "window_size": async_app_step_runner.window_size
         }
     else:
         return {"success": False, "error": f"Appium Session Error: {error}"}
@@ -128,7 +128,7 @@ async def get_screenshot(platform: str = "APP") -> Dict[str, Any]:
     if platform == "WEB":
         screenshot = await web_inspector_service.get_screenshot()
     else:
-        screenshot = app_step_runner.get_screenshot()
+        screenshot = await async_app_step_runner.get_screenshot()
 
     if not screenshot:
         return {"success": False, "error": "No active session or failed to capture screenshot"}
@@ -142,22 +142,22 @@ async def get_source(platform: str = "APP") -> Dict[str, Any]:
     if platform == "WEB":
         source = await web_inspector_service.get_page_source()
     else:
-        source = app_step_runner.get_page_source()
+        source = await async_app_step_runner.get_page_source()
         
     if not source:
         return {"success": False, "error": "No active session or failed to capture source"}
     return {"success": True, "data": source}
 
 @router.get("/contexts")
-def get_contexts() -> Dict[str, Any]:
+async def get_contexts() -> Dict[str, Any]:
     """
     List available Appium contexts (NATIVE_APP, WEBVIEW_...).
     """
-    contexts = app_step_runner.get_contexts()
+    contexts = await async_app_step_runner.get_contexts()
     return {"success": True, "contexts": contexts}
 
 @router.post("/switch-context")
-def switch_context(payload: Dict[str, Any]) -> Dict[str, Any]:
+async def switch_context(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Switch Appium context.
     """
@@ -165,7 +165,7 @@ def switch_context(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not context_name:
         return {"success": False, "error": "context_name is required"}
     
-    success = app_step_runner.switch_context(context_name)
+    success = await async_app_step_runner.switch_context(context_name)
     if success:
         return {"success": True, "message": f"Switched to {context_name}"}
     return {"success": False, "error": f"Failed to switch to {context_name}"}
@@ -187,14 +187,14 @@ async def identify_element(payload: Dict[str, Any]) -> Dict[str, Any]:
         return await web_inspector_service.identify_element(x, y, display_w, display_h)
     
     # Use actual device window size for mapping if available
-    window_size = app_step_runner.window_size
+    window_size = async_app_step_runner.window_size
     win_w = window_size.get("width", 1080)
     win_h = window_size.get("height", 1920)
     
     # Mapping to XML coordinate space happens inside the try block below
     logger.info(f"Identify request: Display({payload.get('x')}, {payload.get('y')}) on {display_w}x{display_h}")
     
-    source = app_step_runner.get_page_source()
+    source = await async_app_step_runner.get_page_source()
     if not source:
         return {"success": False, "error": "No active session"}
 
@@ -439,7 +439,7 @@ async def perform_action(step: Dict[str, Any]) -> Dict[str, Any]:
     if platform == "WEB":
         result = await web_inspector_service.execute_step(step)
     else:
-        result = app_step_runner.execute_step(step)
+        result = await async_app_step_runner.execute_step(step)
     return result
 @router.post("/scroll")
 async def scroll_page(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -453,13 +453,13 @@ async def scroll_page(payload: Dict[str, Any]) -> Dict[str, Any]:
     if platform == "WEB":
         return await web_inspector_service.scroll(delta_y)
     else:
-        return app_step_runner.scroll(delta_y)
+        return await async_app_step_runner.scroll(delta_y)
 
 @router.post("/disconnect")
 async def disconnect_device() -> Dict[str, Any]:
     """
     Terminate current sessions.
     """
-    app_step_runner.stop_session()
+    await async_app_step_runner.stop_session()
     await web_inspector_service.stop_session()
     return {"success": True, "message": "Sessions terminated"}
@@ -1,19 +1,18 @@
 from typing import Any, List, Dict, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import asyncio
 import os
-from pathlib import Path
 from app.services.runner import runner_service
+from app.services.artifact_manager import RUNS_DIR, artifact_manager
+from app.services.run_registry import run_registry
+from app.services.resource_governor import run_scope
 import base64
-import tempfile
-
-# Match logic in runner.py
-RUNS_DIR = Path(tempfile.gettempdir()) / "qone_runs"
 
 router = APIRouter()
 
-from app.services.app_runner import app_step_runner
+from app.services.app_executor import app_runner_registry
 from app.services.web_runner import web_step_runner
 from app.services.device_service import device_service
 import json
@@ -21,10 +20,15 @@ import uuid
 from datetime import datetime, timezone
 from app.models.project import Project
 from app.models.test import TestHistory, TestScript, SelfHealingLog
+from app.services.history_service import history_service
 from app.api import deps
 from sqlalchemy.orm import Session
 # from fastapi import Depends (Moved to top)
 from app.services.fallback_service import fallback_service
+from app.services.telemetry import SCREENCAST_FRAMES, track_run_task
+from app.core.tracing import span, tracer
+from app.db import query_counter
+from app.services.step_timing import add_phase
 
 class DryRunRequest(BaseModel):
     code: str
@@ -58,20 +62,30 @@ async def start_dry_run(request: DryRunRequest):
     """
     print(f"Starting dry run with code length: {len(request.code)}")
     run_id = runner_service.execute_dry_run(request.code)
+    # Lets a restarted backend fail the run (and record its history) if this process dies first.
+    # Registry writes are synchronous DB commits: kept off the event loop
+    await run_in_threadpool(
+        run_registry.start, run_id, "dry_run", trigger="manual", project_id=request.project_id, script_id=request.script_id,
+        payload={"script_name": request.script_name, "persona_name": request.persona_name}
+    )
 
     if request.script_id and request.project_id:
         async def poll_and_save():
+            query_counter.detach() # Outlives the request that spawned it
             from app.db.session import SessionLocal
             from datetime import datetime, timezone
             import uuid
-            from app.models.test import TestHistory, TestScript
-            from app.services.ai_analysis_service import ai_analysis_service
+            from app.models.test import TestHistory
+            from app.services.failure_clustering import failure_cluster_service, build_failure_signature
+            from app.services.log_store import log_store, split_output
             
             run_dir = RUNS_DIR / run_id
             exit_code_file = run_dir / "exit_code.txt"
             log_file = run_dir / "output.log"
             
-            timeout = 600
+            from app.core.config import settings
+            # pytest's own 600s limit plus the time the run may sit in the admission queue
+            timeout = 600 + settings.GOVERNOR_QUEUE_TIMEOUT_SECONDS
             elapsed = 0
             while not exit_code_file.exists() and elapsed < timeout:
                 await asyncio.sleep(2)
@@ -89,11 +103,7 @@ async def start_dry_run(request: DryRunRequest):
             execution_logs = []
             if log_file.exists():
                 try:
-                    lines = log_file.read_text(encoding="utf-8", errors="ignore").splitlines()
-                    for line in lines:
-                        if line.strip():
-                            msg_type = "error" if "fail" in line.lower() or "error" in line.lower() else "info"
-                            execution_logs.append({"msg": line, "type": msg_type})
+                    execution_logs = split_output(log_file.read_text(encoding="utf-8", errors="ignore"))
                 except Exception as e:
                     execution_logs.append({"msg": f"Failed to read logs: {e}", "type": "error"})
 
@@ -111,9 +121,11 @@ async def start_dry_run(request: DryRunRequest):
                     trigger="manual",
                     persona_name=request.persona_name,
                     step_results=[],
-                    logs=execution_logs,
+                    logs=[],
+                    run_id=run_id,
                     run_date=datetime.now(timezone.utc)
                 )
+                log_store.write(db_history, h_id, execution_logs)
 
                 # AI Failure Analysis
                 if status == "failed":
@@ -123,8 +135,12 @@ async def start_dry_run(request: DryRunRequest):
                         if screenshot_path.exists():
                             with open(screenshot_path, "rb") as sf:
                                 screenshot_b64 = base64.b64encode(sf.read()).decode("utf-8")
-                        
-                        analysis = await ai_analysis_service.analyze_failure(
+
+                        signature = build_failure_signature(error_msg, logs=execution_logs, screenshot_b64=screenshot_b64)
+                        new_history.failure_signature = signature
+                        analysis = await failure_cluster_service.analyze(
+                            db_history,
+                            signature,
                             logs=execution_logs,
                             screenshot_b64=screenshot_b64,
                             platform="WEB",
@@ -136,30 +152,35 @@ async def start_dry_run(request: DryRunRequest):
                         print(f"AI Analysis failed for dry-run: {ai_e}")
 
                 db_history.add(new_history)
+                history_service.record_run(db_history, new_history)
                 db_history.commit()
-
-                script = db_history.query(TestScript).filter(TestScript.id == request.script_id).first()
-                if script:
-                    total_runs = db_history.query(TestHistory).filter(TestHistory.script_id == request.script_id).count()
-                    passed_runs = db_history.query(TestHistory).filter(
-                        TestHistory.script_id == request.script_id,
-                        TestHistory.status == "passed"
-                    ).count()
-                    
-                    script.run_count = total_runs
-                    script.success_rate = round((passed_runs / total_runs) * 100, 1) if total_runs > 0 else 0
-                    script.last_run = datetime.now(timezone.utc)
-                    db_history.commit()
+                artifact_manager.link_history(run_id, h_id)
             except Exception as e:
                 print(f"Error saving history for dry-run {run_id}: {e}")
                 db_history.rollback()
             finally:
                 db_history.close()
+            await run_in_threadpool(run_registry.finish, run_id, status)
 
         asyncio.create_task(poll_and_save())
+    else:
+        asyncio.create_task(_finish_dry_run(run_id))
 
     return DryRunResponse(run_id=run_id)
 
+async def _finish_dry_run(run_id: str):
+    """Closes the registry entry of a dry run that saves no history, once it has exited."""
+    query_counter.detach() # Outlives the request that spawned it
+    from app.core.config import settings
+    exit_code_file = RUNS_DIR / run_id / "exit_code.txt"
+    timeout = 600 + settings.GOVERNOR_QUEUE_TIMEOUT_SECONDS
+    elapsed = 0
+    while not exit_code_file.exists() and elapsed < timeout:
+        await asyncio.sleep(2)
+        elapsed += 2
+    passed = exit_code_file.exists() and exit_code_file.read_text().strip() == "0"
+    await run_in_threadpool(run_registry.finish, run_id, "passed" if passed else "failed")
+
 @router.post("/active-steps", response_model=DryRunResponse)
 async def start_active_steps_run(
     request: RunStepsRequest,
@@ -188,9 +209,37 @@ async def start_active_steps_run(
     mobile_config = project.mobile_config if project else {}
 
     async def run_task():
+        query_counter.detach() # Outlives the request that spawned it
+        # Root span of the run; every span below (runners, fallback, AI analysis) nests under it
+        with span(
+            "run.active_steps", run_id=run_id, platform=request.platform.upper(),
+            project_id=request.project_id, script_id=request.script_id, trigger=request.trigger
+        ) as run_span:
+            status, error = "failed", None
+            try:
+                # Browser sessions of this run (and its fallback) share one admission
+                with run_scope():
+                    await _run_steps()
+                exit_code_file = RUNS_DIR / run_id / "exit_code.txt"
+                passed = exit_code_file.exists() and exit_code_file.read_text().strip() == "0"
+                status = "passed" if passed else "failed"
+                if exit_code_file.exists():
+                    run_span.set_status(passed)
+            except asyncio.CancelledError:
+                # Shutdown: the entry stays "running" and run_registry.recover() closes it on the next start
+                status = None
+                raise
+            except Exception as e:
+                error = f"Run failed: {e}"
+                raise
+            finally:
+                artifact_manager.finish(run_id)
+                if status:
+                    await run_in_threadpool(run_registry.finish, run_id, status, error)
+
+    async def _run_steps():
         from app.db.session import SessionLocal
-        run_dir = RUNS_DIR / run_id
-        run_dir.mkdir(parents=True, exist_ok=True)
+        run_dir = artifact_manager.create_run_dir(run_id, request.trigger)
         log_file = run_dir / "output.log"
         exit_code_file = run_dir / "exit_code.txt"
         img_file = run_dir / "latest.jpg"
@@ -199,6 +248,10 @@ async def start_active_steps_run(
         execution_logs = []
         overall_status = "passed"
         start_time = asyncio.get_event_loop().time()
+        # Own Appium session per device, driven from that device's executor thread, so runs on
+        # different devices proceed in parallel without blocking the event loop. Claimed per
+        # attempt: stopping the session releases the runner
+        app_step_runner = None
 
         # Group Dataset by Field to support Parallel Index iterations
         iterations_data = []
@@ -301,7 +354,10 @@ async def start_active_steps_run(
                                         caps[k] = v
                             
                             log(f"Connecting to Appium with caps: {platform_name} / {device_id}")
-                            success, err = app_step_runner.start_session(caps)
+                            with span("session.start", device_id=device_id) as session_span:
+                                app_step_runner = await app_runner_registry.claim(device_id)
+                                success, err = await app_step_runner.start_session(caps)
+                                session_span.set_status(success, err)
                             if not success:
                                 log(f"Failed to start session: {err}", "ERROR")
                                 overall_status = "failed"
@@ -311,7 +367,9 @@ async def start_active_steps_run(
                             log("Appium session established successfully.")
                         else:
                             log(f"Starting WEB execution for project {request.project_id}...")
-                            success, err = await web_step_runner.start_session()
+                            with span("session.start") as session_span:
+                                success, err = await web_step_runner.start_session()
+                                session_span.set_status(success, err)
                             if not success:
                                 log(f"Failed to start Playwright session: {err}", "ERROR")
                                 overall_status = "failed"
@@ -325,13 +383,18 @@ async def start_active_steps_run(
                         runner = web_step_runner if request.platform.upper() == "WEB" else app_step_runner
 
                         # Initial screenshot
-                        async def update_screen(label="screenshot"):
+                        async def update_screen(label="screenshot", timings=None):
                             try:
                                 log(f"Capturing {label}...")
-                                screenshot_b64 = await runner.get_screenshot() if request.platform.upper() == "WEB" else runner.get_screenshot()
+                                with span("screenshot", label=label):
+                                    capture_start = asyncio.get_event_loop().time()
+                                    screenshot_b64 = await runner.get_screenshot()
+                                    add_phase(timings, "screenshot", asyncio.get_event_loop().time() - capture_start)
                                 if screenshot_b64:
+                                    encode_start = asyncio.get_event_loop().time()
                                     with open(img_file, "wb") as f:
                                         f.write(base64.b64decode(screenshot_b64))
+                                    add_phase(timings, "encode", asyncio.get_event_loop().time() - encode_start)
                                     log(f"Successfully updated image stream ({label})")
                                     return screenshot_b64 # Return for history
                             except Exception as e:
@@ -380,13 +443,16 @@ async def start_active_steps_run(
                                     if value: log_msg += f" value={value}"
                                     log(log_msg)
                                     
-                                    step_start = asyncio.get_event_loop().time()
-                                    # Pass data=None as we already substituted above
-                                    res = await runner.execute_step(step, data=None) if request.platform.upper() == "WEB" else runner.execute_step(step, db=db, data=None)
-                                    step_end = asyncio.get_event_loop().time()
-                                    
-                                    # Always capture for the live execution stream
-                                    current_screen_b64 = await update_screen(f"stream update Iter{iter_idx} Step {i+1}")
+                                    with span("step", step_number=i + 1, iteration=iter_idx, action=action, attempt=attempt + 1) as step_span:
+                                        step_start = asyncio.get_event_loop().time()
+                                        # Pass data=None as we already substituted above
+                                        res = await runner.execute_step(step, data=None)
+                                        step_end = asyncio.get_event_loop().time()
+                                        step_span.set_status(bool(res["success"]), res.get("error"))
+                                        step_timings = res.get("timings")
+
+                                        # Always capture for the live execution stream
+                                        current_screen_b64 = await update_screen(f"stream update Iter{iter_idx} Step {i+1}", timings=step_timings)
                                     
                                     # Record logic: attach to DB history if requested OR failure
                                     should_capture = request.capture_screenshots or step.get("screenshot") is True or not res["success"]
@@ -399,6 +465,7 @@ async def start_active_steps_run(
                                         "duration": f"{round(step_end - step_start, 1)}s",
                                         "error_message": res.get("error"),
                                         "screenshot_data": screen_data,
+                                        "timings": step_timings,
                                         "metadata": {
                                             "action": action,
                                             "target": target,
@@ -419,6 +486,7 @@ async def start_active_steps_run(
                                     
                                     log(f"Step {i+1} PASSED ({round(step_end - step_start, 1)}s)")
                                     await asyncio.sleep(1.0) # Added delay to allow the live view to keep up visually
+                                    add_phase(step_timings, "settle", 1.0)
 
                                 # After all steps in iteration, check row-level expected_result if provided
                                 if iteration_success and iter_expected:
@@ -434,7 +502,7 @@ async def start_active_steps_run(
                                         else:
                                             # Extract all text/description attributes from XML
                                             import re
-                                            raw_xml = runner.get_page_source() or ""
+                                            raw_xml = await runner.get_page_source() or ""
                                             text_values = re.findall(r'text="([^"]*)"', raw_xml)
                                             desc_values = re.findall(r'content-desc="([^"]*)"', raw_xml)
                                             content = " ".join(text_values + desc_values) + " " + raw_xml
@@ -473,8 +541,8 @@ async def start_active_steps_run(
                     finally:
                         if request.platform.upper() == "WEB":
                             await web_step_runner.stop_session()
-                        else:
-                            app_step_runner.stop_session()
+                        elif app_step_runner:
+                            await app_step_runner.stop_session()
                     
                     if overall_status == "passed":
                         break
@@ -552,6 +620,8 @@ async def start_active_steps_run(
     async def _save_history_record(status, failure_reason, steps_data, duration="0s", execution_logs=[]):
         from app.db.session import SessionLocal
         from datetime import datetime, timezone
+        from app.services.blob_store import blob_store
+        from app.services.log_store import log_store
         import uuid
         db_history = SessionLocal()
         try:
@@ -570,16 +640,17 @@ async def start_active_steps_run(
                     failure_reason=failure_reason,
                     trigger=request.trigger,
                     persona_name=request.persona_name,
-                    step_results=steps_data,
-                    logs=execution_logs,
+                    step_results=blob_store.externalize_steps(steps_data),
+                    logs=[],
                     run_id=run_id,
                     run_date=datetime.now(timezone.utc)
                 )
+                log_store.write(db_history, h_id, execution_logs)
 
                 # AI Failure Analysis
                 if status == "failed":
                     try:
-                        from app.services.ai_analysis_service import ai_analysis_service
+                        from app.services.failure_clustering import failure_cluster_service, build_failure_signature
                         screenshot_b64 = None
                         if steps_data:
                             for step_res in reversed(steps_data):
@@ -593,7 +664,14 @@ async def start_active_steps_run(
                                 with open(img_file, "rb") as sf:
                                     screenshot_b64 = base64.b64encode(sf.read()).decode("utf-8")
 
-                        analysis = await ai_analysis_service.analyze_failure(
+                        signature = build_failure_signature(
+                            failure_reason, step_results=steps_data, logs=execution_logs,
+                            url=target_url, screenshot_b64=screenshot_b64
+                        )
+                        new_history.failure_signature = signature
+                        analysis = await failure_cluster_service.analyze(
+                            db_history,
+                            signature,
                             logs=execution_logs,
                             screenshot_b64=screenshot_b64,
                             platform=request.platform,
@@ -604,43 +682,45 @@ async def start_active_steps_run(
                     except Exception as ai_e:
                         print(f"AI Analysis failed for run {run_id}: {ai_e}")
 
-                db_history.add(new_history)
-                db_history.commit()
+                with span("history.save", history_id=h_id, status=status):
+                    db_history.add(new_history)
+                    # Script stats are updated in the same transaction as the history insert
+                    history_service.record_run(db_history, new_history)
+                    db_history.commit()
+                artifact_manager.link_history(run_id, h_id)
                 print(f"DEBUG: Saved history record {h_id} for run {run_id}")
             else:
                 print(f"DEBUG: Skipping history persistence for ad-hoc run {run_id}")
 
-            # Update Script stats
-            script_id = request.script_id
-            if not is_adhoc:
-                from app.models.test import TestScript
-                script = db_history.query(TestScript).filter(TestScript.id == script_id).first()
-                
-                if script:
-                    # Calculate new stats
-                    total_runs = db_history.query(TestHistory).filter(TestHistory.script_id == script_id).count()
-                    passed_runs = db_history.query(TestHistory).filter(
-                        TestHistory.script_id == script_id,
-                        TestHistory.status == "passed"
-                    ).count()
-                    
-                    print(f"DEBUG: STATS_CALC [{script_id}] total={total_runs}, passed={passed_runs}")
-                    script.run_count = total_runs
-                    script.success_rate = round((passed_runs / total_runs) * 100, 1) if total_runs > 0 else 0
-                    script.last_run = datetime.now(timezone.utc)
-                        
-                    db_history.commit()
-                    print(f"DEBUG: STATS_UPDATE_SUCCESS [{script_id}] total={total_runs}, passed={passed_runs}, rate={script.success_rate}%")
-
         except Exception as e:
             print(f"Failed to save history or update stats: {e}")
             db_history.rollback()
         finally:
             db_history.close()
 
-    asyncio.create_task(run_task())
+    await run_in_threadpool(
+        run_registry.start, run_id, "active_steps", trigger=request.trigger, project_id=request.project_id,
+        script_id=request.script_id,
+        payload={
+            "script_name": request.script_name or f"Asset Run ({request.project_id})",
+            "persona_name": request.persona_name, "platform": request.platform,
+        }
+    )
+    asyncio.create_task(track_run_task("steps", run_task()))
     return DryRunResponse(run_id=run_id)
 
+@router.get("/{run_id}/trace", response_model=Dict[str, Any])
+def get_run_trace(run_id: str):
+    """
+    Waterfall of the spans recorded for a run (session setup, steps, screenshots,
+    AI fallback / analysis, history persistence), ordered by start time.
+    """
+    artifact_manager.touch(run_id)
+    trace = tracer.waterfall(run_id)
+    if not trace["spans"]:
+        raise HTTPException(status_code=404, detail="No trace recorded for this run")
+    return trace
+
 @router.get("/status/{run_id}", response_model=Dict[str, Any])
 async def get_run_status(run_id: str):
     """
@@ -687,8 +767,8 @@ async def websocket_endpoint(websocket: WebSocket, run_id: str):
     # Wait for log file to appear
     retries = 0
     while not log_file.exists():
-        if retries > 20: # 2 seconds
-             await websocket.send_json({"type": "log", "data": "Waiting for process start..."})
+        if retries == 20: # 2 seconds; dry runs wait here while queued by the resource governor
+             await websocket.send_json({"type": "log", "data": "Waiting for process start (queued for a browser slot)..."})
         await asyncio.sleep(0.1)
         retries += 1
 
@@ -718,6 +798,7 @@ async def websocket_endpoint(websocket: WebSocket, run_id: str):
                             img_data = f.read()
                             b64 = base64.b64encode(img_data).decode("utf-8")
                             await websocket.send_json({"type": "screen", "data": b64})
+                            SCREENCAST_FRAMES.inc(source="run_stream")
                     except:
                         pass # Ignore read errors during write
             
@@ -816,10 +897,12 @@ async def self_heal_run(
         error_detected=history.failure_reason
     )
     db.add(new_log)
+    history_service.set_healing_status(db, history_id, "started")
     db.commit()
     
     # 2. Run Fallback Service as a Background Task
     async def run_healing():
+        query_counter.detach() # Runs after the response, still inside the request context
         h_session = SessionLocal()
         try:
             # Determine Goal: Achive the result of the script
@@ -922,6 +1005,7 @@ async def self_heal_run(
                 healing_log.healing_steps = results
                 healing_log.modified_steps = modified_steps
                 h_session.add(healing_log)
+                history_service.set_healing_status(h_session, history_id, final_status)
                 h_session.commit()
                 print(f"DEBUG: Healing log {log_id} updated with status {final_status}.")
                 
@@ -930,6 +1014,7 @@ async def self_heal_run(
             healing_log = h_session.query(SelfHealingLog).filter(SelfHealingLog.id == log_id).first()
             if healing_log:
                 healing_log.status = "failed"
+                history_service.set_healing_status(h_session, history_id, "failed")
                 h_session.commit()
         finally:
             h_session.close()
@@ -1,11 +1,14 @@
 from typing import Any, List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 import json
 from app.api import deps
+from app.crud.base import keyset_paginate, NEXT_CURSOR_HEADER, parse_fields, defer_heavy, list_item, json_array_count
+from sqlalchemy.orm import with_expression
 from app.services.crawler import CrawlerService
 from app.services.action_mapper import action_mapper
 from app.core.config import settings
+from app.services.telemetry import agenerate_content
 import json
 import os
 from datetime import datetime
@@ -26,24 +29,44 @@ crawler = CrawlerService()
 # import nest_asyncio
 # nest_asyncio.apply()
 
-@router.get("/", response_model=List[ScenarioSchema])
+# Heavy JSON columns left out of list responses unless requested via `fields=`
+SCENARIO_HEAVY_FIELDS = ("test_cases",)
+
+@router.get("/", response_model=List[ScenarioSchema], response_model_exclude_unset=True)
 def read_scenarios(
+    response: Response,
     db: Any = Depends(deps.get_db),
     project_id: Optional[str] = None,
     is_approved: Optional[bool] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ) -> Any:
     """
     Retrieve scenarios.
+    Keyset-paginated: pass the `X-Next-Cursor` response header back as `cursor`.
+    `test_cases` is only included with `fields=test_cases`.
     """
-    query = db.query(ScenarioModel)
+    include = parse_fields(fields, SCENARIO_HEAVY_FIELDS)
+    query = db.query(ScenarioModel).options(
+        with_expression(ScenarioModel.test_case_count, json_array_count(ScenarioModel.test_cases)),
+        *defer_heavy(ScenarioModel, SCENARIO_HEAVY_FIELDS, include)
+    )
     if project_id:
         query = query.filter(ScenarioModel.project_id == project_id)
     if is_approved is not None:
         query = query.filter(ScenarioModel.is_approved == is_approved)
     
-    return query.offset(skip).limit(limit).all()
+    if skip and not cursor:
+        items = query.offset(skip).limit(limit).all()
+    else:
+        items, next_cursor = keyset_paginate(
+            query, [ScenarioModel.created_at, ScenarioModel.id], cursor=cursor, limit=limit, descending=False
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [list_item(s, ScenarioSchema, SCENARIO_HEAVY_FIELDS, include) for s in items]
 
 class AnalyzeUrlRequest(BaseModel):
     url: str
@@ -190,7 +213,8 @@ async def analyze_url(
         ]
 
         # 4. Generate Content
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scenarios.analyze_url",
             model=settings.GEMINI_MODEL,
             contents=prompt_contents,
             config=types.GenerateContentConfig(
@@ -445,7 +469,8 @@ async def analyze_upload(
                 print(f"DEBUG_PROMPT_PART (Part): {type(p)}", flush=True)
 
         # 4. Generate Content
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scenarios.analyze_upload",
             model=settings.GEMINI_MODEL,
             contents=prompt_parts,
             config=types.GenerateContentConfig(
@@ -599,7 +624,8 @@ async def generate_scenarios(
         """
 
         print("3. Sending Request to Gemini (This may take 10-20 seconds)...", flush=True)
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scenarios.generate_scenarios",
             model=settings.GEMINI_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
@@ -732,7 +758,8 @@ async def analyze_knowledge(
         if persona_context:
             system_prompt += persona_context
 
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scenarios.analyze_knowledge",
             model=settings.GEMINI_MODEL,
             contents=system_prompt,
             config=types.GenerateContentConfig(
@@ -1037,7 +1064,8 @@ async def generate_from_map(
             f"Action Flow Map (JSON):\n{map_json_str}"
         ]
 
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scenarios.generate_from_map",
             model=settings.GEMINI_MODEL,
             contents=prompt_contents,
             config=types.GenerateContentConfig(
@@ -1228,7 +1256,8 @@ async def analyze_hybrid(
         prompt_parts.append(additional_info)
 
         # 8. Generate Content
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scenarios.analyze_hybrid",
             model=settings.GEMINI_MODEL,
             contents=prompt_parts,
             config=types.GenerateContentConfig(
@@ -1303,3 +1332,12 @@ async def analyze_hybrid(
         import traceback
         print(f"Hybrid Generation Error: {e}\n{traceback.format_exc()}")
         raise HTTPException(500, f"Generation Error: {str(e)}")
+
+# Registered last so it never shadows the fixed GET paths above (e.g. /maps)
+@router.get("/{scenario_id}", response_model=ScenarioSchema)
+def read_scenario(scenario_id: str, db: Any = Depends(deps.get_db)) -> Any:
+    """A single scenario with its test_cases (left out of the list)."""
+    scenario = db.query(ScenarioModel).filter(ScenarioModel.id == scenario_id).first()
+    if not scenario:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    return scenario
@@ -1,26 +1,40 @@
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.crud.base import NEXT_CURSOR_HEADER, parse_fields, list_item
+from app.services.telemetry import agenerate_content
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.TestScript])
+@router.get("/", response_model=List[schemas.TestScript], response_model_exclude_unset=True)
 def read_scripts(
+    response: Response,
     db: Session = Depends(deps.get_db),
     project_id: str = "",
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve scripts. Filter by project_id is recommended.
+    Keyset-paginated: pass the `X-Next-Cursor` response header back as `cursor`.
+    `code`, `steps` and `dataset` are only included when listed in `fields=`.
     """
+    include = parse_fields(fields, crud.script.HEAVY_FIELDS)
     if project_id:
-        return crud.script.get_by_project(db, project_id=project_id, skip=skip, limit=limit)
+        if skip and not cursor:
+            items = crud.script.get_by_project(db, project_id=project_id, skip=skip, limit=limit, include=include)
+        else:
+            items, next_cursor = crud.script.get_page_by_project(db, project_id=project_id, cursor=cursor, limit=limit, include=include)
+            if next_cursor:
+                response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [list_item(s, schemas.TestScript, crud.script.HEAVY_FIELDS, include) for s in items]
     # If no project_id, maybe list all accessible (complex)? 
     # For now return none to encourage filtering or all if admin
     if current_user.is_saas_super_admin:
@@ -40,6 +54,22 @@ def create_script(
     script = crud.script.create(db, obj_in=script_in)
     return script
 
+@router.post("/stats/rebuild", response_model=Dict[str, Any])
+def rebuild_script_stats(
+    *,
+    db: Session = Depends(deps.get_db),
+    project_id: Optional[str] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Recompute run counters, rolling pass rates and latest results from history (repair after drift).
+    """
+    from app.services.history_service import history_service
+    updated = history_service.rebuild_script_stats(db, project_id=project_id)
+    history_service.rebuild_latest_results(db, project_id=project_id)
+    db.commit()
+    return {"status": "ok", "scripts_updated": updated}
+
 @router.put("/{script_id}", response_model=schemas.TestScript)
 def update_script(
     *,
@@ -54,7 +84,19 @@ def update_script(
     script = crud.script.get(db, id=script_id)
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
+    was_active = script.is_active
+    labels = (script.origin, script.category)
     script = crud.script.update(db, db_obj=script, obj_in=script_in)
+    if (script.origin, script.category) != labels:
+        # History rows carry a copy of both for list views
+        from app.services.history_service import history_service
+        history_service.sync_script_labels(db, script)
+        db.commit()
+    if script.is_active != was_active:
+        # Active defects / asset counts depend on is_active
+        from app.services.project_stats import project_stats_service
+        project_stats_service.invalidate(db, script.project_id)
+        db.commit()
     return script
 
 @router.get("/{script_id}", response_model=schemas.TestScript)
@@ -85,7 +127,11 @@ def delete_script(
     script = crud.script.get(db, id=script_id)
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
+    project_id = script.project_id
     script = crud.script.remove(db, id=script_id)
+    from app.services.project_stats import project_stats_service
+    project_stats_service.invalidate(db, project_id)
+    db.commit()
     return script
 
 from pydantic import BaseModel
@@ -179,7 +225,8 @@ async def generate_script(
         }}
         """
 
-        response = await client.aio.models.generate_content(
+        response = await agenerate_content(
+            client, "scripts.generate_script",
             model=settings.GEMINI_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic import AnyHttpUrl, PostgresDsn, computed_field
 from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -40,6 +40,81 @@ class Settings(BaseSettings):
     # AI SETTINGS
     GEMINI_MODEL: str = "gemini-3-flash-preview"
     GOOGLE_API_KEY: str = ""
+    # Failures sharing a signature within this window reuse one AI analysis
+    FAILURE_ANALYSIS_REUSE_MINUTES: int = 60
+
+    # REQUEST INSTRUMENTATION
+    # Adds X-DB-Query-Count / X-DB-Time-Ms / X-DB-Slowest-* response headers
+    DEBUG_QUERY_HEADERS: bool = False
+    # Requests slower than this are logged with their slowest statements (0 disables)
+    SLOW_REQUEST_MS: int = 1000
+    # Test mode N+1 guard: requests issuing more SQL statements than this fail with QueryBudgetExceeded (0 disables)
+    QUERY_COUNT_LIMIT: int = 0
+    # Bearer token Prometheus sends to scrape /metrics; unset, /metrics only answers loopback clients
+    METRICS_TOKEN: str = ""
+
+    # EVENT LOOP WATCHDOG
+    # Logs the stack and counts the call site whenever the API event loop is blocked this long
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_BLOCK_THRESHOLD_MS: int = 250
+    LOOP_WATCHDOG_INTERVAL_MS: int = 100
+
+    # PLAYWRIGHT RUNTIME
+    # A shared browser with no open sessions is closed after this long
+    PLAYWRIGHT_BROWSER_IDLE_SECONDS: int = 120
+
+    # RESOURCE GOVERNOR
+    # Browser sessions (Playwright contexts) and pytest runs are only admitted within these
+    # budgets; beyond them requests queue. Memory/CPU cover all Chromium processes below the
+    # backend (Linux /proc only). 0 disables a budget.
+    GOVERNOR_MAX_SESSIONS: int = 8
+    GOVERNOR_MAX_BROWSER_RSS_MB: int = 4096
+    GOVERNOR_MAX_BROWSER_CPU_PERCENT: int = 90
+    # Queued requests fail after waiting this long
+    GOVERNOR_QUEUE_TIMEOUT_SECONDS: int = 300
+    GOVERNOR_SAMPLE_INTERVAL_MS: int = 1000
+
+    # RUN PROCESS CLEANUP
+    # Seconds between SIGTERM and SIGKILL when a run's process tree is torn down
+    RUN_KILL_GRACE_SECONDS: int = 5
+    # Periodically kills run/browser processes that outlived their run or their backend
+    PROCESS_REAPER_ENABLED: bool = True
+    PROCESS_REAPER_INTERVAL_SECONDS: int = 300
+
+    # RUN REGISTRY
+    # In-flight runs are persisted so a restarted backend can fail or resume them; finished
+    # entries are dropped after this many days
+    RUN_REGISTRY_RETENTION_DAYS: int = 7
+
+    # RUN TRACING
+    # Spans are written to <run dir>/trace.jsonl and, when set, posted to an OTLP/HTTP collector
+    TRACING_ENABLED: bool = True
+    # e.g. http://localhost:4318/v1/traces
+    TRACE_COLLECTOR_URL: str = ""
+
+    # STORAGE SETTINGS
+    # Content-addressed store for screenshots referenced from history/exploration JSON
+    BLOB_STORE_DIR: str = "uploads/blobs"
+    # Lifetime of the signed /blobs URLs handed out with history steps (seconds, at least this long)
+    BLOB_URL_EXPIRE_SECONDS: int = 3600
+
+    # RUN ARTIFACTS
+    # Hours a finished run directory is kept after its last use, by trigger ("default" for others)
+    ARTIFACT_RETENTION_HOURS: Dict[str, int] = {
+        "dry_run": 24, "script": 24, "manual": 72, "scheduled": 168, "default": 72
+    }
+    # Least recently used runs are evicted while RUNS_DIR is above this (0 disables)
+    ARTIFACT_QUOTA_MB: int = 2048
+    # Unfinished runs (crashed, killed backend) are removed after this long without activity
+    ARTIFACT_STALE_HOURS: int = 24
+    ARTIFACT_SCREENCAST_RETENTION_HOURS: int = 6
+    ARTIFACT_GC_INTERVAL_MINUTES: int = 15
+
+    # TEST HISTORY RETENTION
+    # Monthly testhistory partitions created ahead of the current month
+    HISTORY_PARTITION_MONTHS_AHEAD: int = 3
+    # Partitions older than this many months move to testhistoryarchive (0 disables archiving)
+    HISTORY_ARCHIVE_AFTER_MONTHS: int = 12
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
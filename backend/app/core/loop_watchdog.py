@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.profiler import collapse_stack
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = registry.histogram(
+    "qone_event_loop_lag_seconds", "How late the API event loop woke the watchdog heartbeat",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+LOOP_BLOCKED = registry.counter(
+    "qone_event_loop_blocked_total", "Stalls of the API event loop past LOOP_BLOCK_THRESHOLD_MS", ("site",)
+)
+LOOP_BLOCKED_SECONDS = registry.histogram(
+    "qone_event_loop_blocked_seconds", "Duration of API event loop stalls past the threshold", ("site",),
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+_APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "")
+
+
+def _blocking_site(frame) -> str:
+    """Innermost frame in our own code, i.e. the call site that is blocking the loop."""
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_DIR):
+            module = os.path.relpath(filename, _APP_DIR).rsplit(".", 1)[0].replace(os.sep, ".")
+            return f"app.{module}:{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class LoopWatchdog:
+    """
+    Catches synchronous work running on the API event loop (blocking Appium/LLM calls
+    inside coroutines stall every request and WebSocket).
+
+    A heartbeat task on the loop records how late it wakes up (qone_event_loop_lag_seconds).
+    A separate thread notices when the heartbeat has not run for LOOP_BLOCK_THRESHOLD_MS,
+    captures the loop thread's stack once per stall, logs it and counts the stall by the
+    blocking call site in our code.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Call from a coroutine running on the loop to watch."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="LoopWatchdogThread", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (threshold {settings.LOOP_BLOCK_THRESHOLD_MS}ms)")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _beat(self) -> None:
+        interval = settings.LOOP_WATCHDOG_INTERVAL_MS / 1000
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            self._heartbeat = now
+            LOOP_LAG_SECONDS.observe(max(now - expected, 0))
+
+    def _watch(self) -> None:
+        threshold = settings.LOOP_BLOCK_THRESHOLD_MS / 1000
+        # The heartbeat itself is late by up to one interval when the loop is healthy
+        limit = threshold + settings.LOOP_WATCHDOG_INTERVAL_MS / 1000
+        stalled_since: Optional[float] = None
+        site = "unknown"
+        while not self._stop.wait(threshold / 2):
+            last = self._heartbeat
+            silent = time.perf_counter() - last
+            if silent < limit:
+                if stalled_since is not None:
+                    LOOP_BLOCKED_SECONDS.observe(last - stalled_since, site=site)
+                    logger.warning(f"Event loop unblocked after {(last - stalled_since) * 1000:.0f}ms ({site})")
+                    stalled_since = None
+                continue
+            if stalled_since is not None:
+                continue # Already reported this stall
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stalled_since = last
+            site = _blocking_site(frame)
+            LOOP_BLOCKED.inc(site=site)
+            stack = "\n".join(f"  {entry}" for entry in collapse_stack(frame)[-25:])
+            logger.warning(f"Event loop blocked for {silent * 1000:.0f}ms+ at {site}\n{stack}")
+
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,68 @@
+import logging
+import time
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.query_counter import count_queries
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = registry.histogram(
+    "qone_http_request_duration_seconds", "API request latency", ("method", "route")
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "qone_http_request_db_seconds", "Time spent in SQL statements per API request", ("method", "route")
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "qone_http_request_db_queries", "SQL statements issued per API request", ("method", "route"),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+
+class QueryMetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Counts and times the SQL statements of every API request (see app.db.query_counter).
+
+    Records latency / DB time / query count histograms per route, logs requests slower
+    than SLOW_REQUEST_MS with their slowest statements, adds X-DB-* headers when
+    DEBUG_QUERY_HEADERS is on and enforces QUERY_COUNT_LIMIT in test mode.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if not request.url.path.startswith(settings.API_V1_STR):
+            return await call_next(request)
+
+        label = f"{request.method} {request.url.path}"
+        with count_queries(limit=settings.QUERY_COUNT_LIMIT, label=label) as counter:
+            started = time.perf_counter()
+            response = await call_next(request)
+            elapsed = time.perf_counter() - started
+
+            # Route template, not the raw path, to keep label cardinality bounded
+            route = request.scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(elapsed, method=request.method, route=route_label)
+            REQUEST_DB_SECONDS.observe(counter.total_time, method=request.method, route=route_label)
+            REQUEST_DB_QUERIES.observe(counter.count, method=request.method, route=route_label)
+
+            slowest = counter.slowest()
+            if settings.DEBUG_QUERY_HEADERS:
+                response.headers["X-DB-Query-Count"] = str(counter.count)
+                response.headers["X-DB-Time-Ms"] = f"{counter.total_time * 1000:.1f}"
+                if slowest:
+                    response.headers["X-DB-Slowest-Ms"] = f"{slowest[0] * 1000:.1f}"
+                    response.headers["X-DB-Slowest-Statement"] = " ".join(slowest[1].split())[:200]
+
+            if settings.SLOW_REQUEST_MS and elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                top = "\n".join(
+                    f"  {duration * 1000:.1f}ms {' '.join(statement.split())[:300]}"
+                    for duration, statement in counter.top_statements()
+                )
+                logger.warning(
+                    f"Slow request {label}: {elapsed * 1000:.0f}ms, "
+                    f"{counter.count} queries, {counter.total_time * 1000:.0f}ms in DB\n{top}"
+                )
+        return response
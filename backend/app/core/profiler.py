@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+MAX_STACK_DEPTH = 128
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    # ';' separates frames in the collapsed format
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})".replace(";", ":")
+
+
+def collapse_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class LoopLagProbe:
+    """
+    Measures how late an event loop runs a callback scheduled from another thread,
+    i.e. how long the loop is blocked by whatever it is currently running.
+    """
+
+    def __init__(self, name: str, loop: asyncio.AbstractEventLoop):
+        self.name = name
+        self.loop = loop
+        self.lags: List[float] = []
+        self._pending = threading.Event()
+        self._pending.set()
+
+    def probe(self) -> None:
+        # Skip while the previous probe has not run yet; its lag is still accumulating
+        if not self._pending.is_set() or not self.loop.is_running():
+            return
+        self._pending.clear()
+        scheduled = time.perf_counter()
+
+        def _ran():
+            self.lags.append(time.perf_counter() - scheduled)
+            self._pending.set()
+
+        try:
+            self.loop.call_soon_threadsafe(_ran)
+        except RuntimeError:
+            self._pending.set() # Loop closed meanwhile
+
+    def summary(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+        if not lags:
+            return {"loop": self.name, "probes": 0, "stalled": not self._pending.is_set()}
+        pick = lambda q: round(lags[min(int(len(lags) * q), len(lags) - 1)] * 1000, 2)
+        return {
+            "loop": self.name,
+            "probes": len(lags),
+            "mean_ms": round(sum(lags) / len(lags) * 1000, 2),
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "max_ms": round(lags[-1] * 1000, 2),
+            # A probe still pending at the end means the loop was blocked when sampling stopped
+            "stalled": not self._pending.is_set(),
+        }
+
+
+def sample(seconds: float, hz: int = 100, loops: Optional[Dict[str, asyncio.AbstractEventLoop]] = None) -> Dict[str, Any]:
+    """
+    Samples the stacks of every Python thread via sys._current_frames() for `seconds`
+    at `hz` and probes the lag of the given event loops at the same rate. Blocking: run
+    it in a worker thread. Returns the collapsed-stack profile (flamegraph.pl /
+    speedscope input, one "thread;frame;...;leaf count" line per distinct stack) and a
+    per-thread summary.
+    """
+    interval = 1.0 / hz
+    me = threading.get_ident()
+    probes = [LoopLagProbe(name, loop) for name, loop in (loops or {}).items() if loop is not None]
+    stacks: Counter = Counter()
+    leaf_by_thread: Dict[str, Counter] = defaultdict(Counter)
+    samples_by_thread: Counter = Counter()
+    rounds = 0
+
+    deadline = time.perf_counter() + seconds
+    next_tick = time.perf_counter()
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            thread_name = names.get(ident, f"thread-{ident}").replace(";", ":")
+            stack = collapse_stack(frame)
+            stacks[";".join([thread_name] + stack)] += 1
+            samples_by_thread[thread_name] += 1
+            if stack:
+                leaf_by_thread[thread_name][stack[-1]] += 1
+        for probe in probes:
+            probe.probe()
+        rounds += 1
+        next_tick += interval
+        time.sleep(max(next_tick - time.perf_counter(), 0))
+
+    threads = [
+        {
+            "thread": name,
+            "samples": count,
+            "top_frames": [{"frame": frame, "samples": n} for frame, n in leaf_by_thread[name].most_common(10)],
+        }
+        for name, count in samples_by_thread.most_common()
+    ]
+    return {
+        "seconds": seconds,
+        "hz": hz,
+        "samples": rounds,
+        "threads": threads,
+        "event_loops": [probe.summary() for probe in probes],
+        "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+    }
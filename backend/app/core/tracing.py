@@ -0,0 +1,230 @@
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "qone-backend"
+
+# OTLP status codes
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+def trace_id_for_run(run_id: str) -> str:
+    """All spans of a run share one 32-hex trace id derived from its run_id."""
+    compact = run_id.replace("-", "").lower()
+    if len(compact) == 32 and all(c in "0123456789abcdef" for c in compact):
+        return compact
+    return hashlib.md5(run_id.encode("utf-8")).hexdigest()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation. Created through span(); children inherit run_id and trace id."""
+
+    def __init__(self, name: str, run_id: Optional[str], parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.run_id = run_id
+        self.trace_id = parent.trace_id if parent else (trace_id_for_run(run_id) if run_id else os.urandom(16).hex())
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        if run_id:
+            self.attributes["run_id"] = run_id
+        self.status = STATUS_UNSET
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_status(self, ok: bool, message: Optional[str] = None) -> None:
+        self.status = STATUS_OK if ok else STATUS_ERROR
+        self.status_message = message
+
+    def to_otlp(self) -> Dict[str, Any]:
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1, # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        if self.status_message:
+            data["status"]["message"] = self.status_message[:500]
+        return data
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-compatible tracer. Finished spans are appended (OTLP JSON,
+    one span per line) to RUNS_DIR/<run_id>/trace.jsonl and, when TRACE_COLLECTOR_URL
+    is set, batched to an OTLP/HTTP collector from a background thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=10000)
+        self._exporter: Optional[threading.Thread] = None
+
+    @staticmethod
+    def trace_file(run_id: str) -> Path:
+        from app.services.artifact_manager import RUNS_DIR
+        return RUNS_DIR / run_id / "trace.jsonl"
+
+    def export(self, span: Span) -> None:
+        data = span.to_otlp()
+        if span.run_id:
+            path = self.trace_file(span.run_id)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with self._lock, open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(data) + "\n")
+            except OSError as e:
+                logger.warning(f"Failed to write span {span.name} for run {span.run_id}: {e}")
+        if settings.TRACE_COLLECTOR_URL:
+            self._ensure_exporter()
+            try:
+                self._queue.put_nowait(data)
+            except queue.Full:
+                pass # Collector is down or slow; the local file still has the span
+
+    def _ensure_exporter(self) -> None:
+        if self._exporter and self._exporter.is_alive():
+            return
+        with self._lock:
+            if self._exporter and self._exporter.is_alive():
+                return
+            self._exporter = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+            self._exporter.start()
+
+    def _export_loop(self) -> None:
+        import httpx
+        with httpx.Client(timeout=5.0) as client:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < 256:
+                    try:
+                        batch.append(self._queue.get(timeout=0.5))
+                    except queue.Empty:
+                        break
+                payload = {"resourceSpans": [{
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": batch}],
+                }]}
+                try:
+                    client.post(settings.TRACE_COLLECTOR_URL, json=payload).raise_for_status()
+                except Exception as e:
+                    logger.warning(f"Failed to export {len(batch)} spans to {settings.TRACE_COLLECTOR_URL}: {e}")
+
+    def read_run(self, run_id: str) -> List[Dict[str, Any]]:
+        # From the run directory, or from the blob store once the artifact GC archived it
+        from app.services.artifact_manager import artifact_manager
+        data = artifact_manager.read_bytes(run_id, "trace.jsonl")
+        if not data:
+            return []
+        spans = []
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue # Partially written last line
+        return spans
+
+    def waterfall(self, run_id: str) -> Dict[str, Any]:
+        """Spans of a run ordered by start time with offsets and nesting depth relative to the earliest span."""
+        spans = self.read_run(run_id)
+        if not spans:
+            return {"run_id": run_id, "duration_ms": 0, "spans": []}
+
+        by_id = {s["spanId"]: s for s in spans}
+        def depth(span: Dict[str, Any]) -> int:
+            level, parent = 0, span.get("parentSpanId")
+            while parent in by_id and level < 64:
+                level, parent = level + 1, by_id[parent].get("parentSpanId")
+            return level
+
+        origin = min(int(s["startTimeUnixNano"]) for s in spans)
+        end = max(int(s["endTimeUnixNano"]) for s in spans)
+        rows = []
+        for s in sorted(spans, key=lambda s: int(s["startTimeUnixNano"])):
+            start, finish = int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"])
+            rows.append({
+                "span_id": s["spanId"],
+                "parent_id": s.get("parentSpanId"),
+                "name": s["name"],
+                "depth": depth(s),
+                "offset_ms": round((start - origin) / 1e6, 1),
+                "duration_ms": round((finish - start) / 1e6, 1),
+                "status": {STATUS_OK: "ok", STATUS_ERROR: "error"}.get(s.get("status", {}).get("code"), "unset"),
+                "error": s.get("status", {}).get("message"),
+                "attributes": {a["key"]: next(iter(a["value"].values())) for a in s.get("attributes", [])},
+            })
+        return {
+            "run_id": run_id,
+            "trace_id": spans[0]["traceId"],
+            "duration_ms": round((end - origin) / 1e6, 1),
+            "spans": rows,
+        }
+
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, run_id: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Times the enclosed block as a child of the current span (works across awaits in the
+    same task). A root span needs an explicit run_id; children inherit it.
+
+        with span("session.start", run_id=run_id, platform="WEB") as s:
+            ...
+            s.set_attribute("device_id", device_id)
+
+    With TRACING_ENABLED off spans are still created (cheap) but never exported.
+    """
+    parent = _current_span.get()
+    current = Span(name, run_id or (parent.run_id if parent else None), parent, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_status(False, f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        if settings.TRACING_ENABLED:
+            tracer.export(current)
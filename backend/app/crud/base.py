@@ -1,8 +1,13 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
+from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, tuple_
+from sqlalchemy.orm import Query, Session, defer
 
 from app.db.base import Base
 
@@ -10,6 +15,93 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for a row's sort key values."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match sort keys")
+        return [
+            datetime.fromisoformat(v) if v is not None and key.type.python_type is datetime else v
+            for key, v in zip(keys, values)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], heavy: Sequence[str]) -> List[str]:
+    """Validates a `fields=a,b` opt-in for heavy list columns."""
+    if not fields:
+        return []
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in heavy]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(heavy)}"
+        )
+    return requested
+
+
+def defer_heavy(model: Any, heavy: Sequence[str], include: Sequence[str] = ()) -> List[Any]:
+    """Loader options that skip heavy columns not explicitly requested."""
+    return [defer(getattr(model, name)) for name in heavy if name not in include]
+
+
+def json_array_count(column: Any) -> Any:
+    """SQL length of a JSON array column (0 for NULL / non-arrays): a list summary of a deferred column."""
+    return func.coalesce(case((func.json_typeof(column) == "array", func.json_array_length(column))), 0)
+
+
+def list_item(obj: Any, schema: Type[BaseModel], heavy: Sequence[str], include: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Dict of `schema`'s fields read from `obj`, leaving out deferred heavy columns so they
+    are never lazy-loaded. Pair with `response_model_exclude_unset=True` to omit them from JSON.
+    """
+    return {
+        name: getattr(obj, name)
+        for name in schema.model_fields
+        if (name not in heavy or name in include) and hasattr(type(obj), name)
+    }
+
+
+def keyset_paginate(
+    query: Query,
+    keys: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Cursor (keyset) pagination: `WHERE (keys) < (cursor values) ORDER BY keys LIMIT n`.
+
+    `keys` must end with a unique column (usually id) so the order is total. Each
+    page costs an index range scan regardless of depth, unlike OFFSET. Returns the
+    page and the cursor of the next page (None on the last page).
+    """
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        bound = tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values)
+        query = query.filter(bound)
+    query = query.order_by(*[k.desc() if descending else k.asc() for k in keys])
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, k.key) for k in keys])
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -30,6 +122,20 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
         
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Sequence[Any] = (),
+        keys: Optional[Sequence[Any]] = None,
+        descending: bool = False
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Keyset-paginated listing; `keys` defaults to the primary key."""
+        query = db.query(self.model).filter(*filters)
+        return keyset_paginate(query, keys or [self.model.id], cursor=cursor, limit=limit, descending=descending)
+
     def get_multi_by_owner(
         self, db: Session, customer_id: str, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
@@ -1,17 +1,33 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import literal_column
+from sqlalchemy.orm import Session, joinedload, selectinload, with_expression
 from fastapi.encoders import jsonable_encoder
 
-from app.crud.base import CRUDBase
-from app.models.test import TestScript, Scenario, TestHistory, TestSchedule, ScheduleScript
+from app.crud.base import CRUDBase, keyset_paginate, defer_heavy, json_array_count
+from app.models.test import TestScript, Scenario, TestHistory, TestSchedule, ScheduleScript, SelfHealingLog
 from app.schemas.test_script import TestScriptCreate, TestScriptUpdate
 from app.schemas.scenario import ScenarioCreate, ScenarioUpdate
 from app.schemas.test_history import TestHistoryCreate, TestHistoryUpdate
 from app.schemas.test_schedule import TestScheduleCreate, TestScheduleUpdate
 
 class CRUDTestScript(CRUDBase[TestScript, TestScriptCreate, TestScriptUpdate]):
-    def get_by_project(self, db: Session, project_id: str, skip: int = 0, limit: int = 100) -> List[TestScript]:
-        return db.query(self.model).options(joinedload(self.model.persona)).filter(self.model.project_id == project_id).offset(skip).limit(limit).all()
+    # Large columns left out of list responses unless requested via `include`
+    HEAVY_FIELDS = ("code", "steps", "dataset")
+
+    def _list_query(self, db: Session, include: Sequence[str] = ()):
+        return db.query(self.model).options(
+            joinedload(self.model.persona),
+            with_expression(self.model.step_count, json_array_count(self.model.steps)),
+            with_expression(self.model.dataset_count, json_array_count(self.model.dataset)),
+            *defer_heavy(self.model, self.HEAVY_FIELDS, include)
+        )
+
+    def get_by_project(self, db: Session, project_id: str, skip: int = 0, limit: int = 100, include: Sequence[str] = ()) -> List[TestScript]:
+        return self._list_query(db, include).filter(self.model.project_id == project_id).offset(skip).limit(limit).all()
+
+    def get_page_by_project(self, db: Session, project_id: str, cursor: Optional[str] = None, limit: int = 100, include: Sequence[str] = ()) -> Tuple[List[TestScript], Optional[str]]:
+        query = self._list_query(db, include).filter(self.model.project_id == project_id)
+        return keyset_paginate(query, [self.model.created_at, self.model.id], cursor=cursor, limit=limit, descending=False)
 
     def create(self, db: Session, *, obj_in: TestScriptCreate) -> TestScript:
         import time
@@ -39,26 +55,59 @@ class CRUDScenario(CRUDBase[Scenario, ScenarioCreate, ScenarioUpdate]):
         db.refresh(db_obj)
         return db_obj
 
+# Error message of the first failed step, read inside Postgres so lists never ship step_results
+FAILED_STEP_ERROR = literal_column(
+    "(SELECT NULLIF(step ->> 'error_message', '') "
+    "FROM json_array_elements(CASE WHEN json_typeof(testhistory.step_results) = 'array' "
+    "THEN testhistory.step_results ELSE '[]'::json END) WITH ORDINALITY AS s(step, n) "
+    "WHERE step ->> 'status' = 'failed' OR COALESCE(step ->> 'error_message', '') <> '' "
+    "ORDER BY n LIMIT 1)"
+)
+
 class CRUDTestHistory(CRUDBase[TestHistory, TestHistoryCreate, TestHistoryUpdate]):
-    def get_by_script(self, db: Session, script_id: str, skip: int = 0, limit: int = 100) -> List[TestHistory]:
+    HEAVY_FIELDS = ("logs", "step_results", "failure_analysis")
+
+    def _list_query(self, db: Session, include: Sequence[str] = ()):
+        # Healing log status only, not healing steps; script origin/category are columns on the row
         return db.query(self.model).options(
-            joinedload(self.model.script),
-            joinedload(self.model.healing_logs)
-        ).filter(self.model.script_id == script_id).order_by(self.model.run_date.desc()).offset(skip).limit(limit).all()
+            selectinload(self.model.healing_logs).load_only(
+                SelfHealingLog.id, SelfHealingLog.history_id, SelfHealingLog.script_id,
+                SelfHealingLog.status, SelfHealingLog.created_at
+            ),
+            with_expression(self.model.failed_step_error, FAILED_STEP_ERROR),
+            *defer_heavy(self.model, self.HEAVY_FIELDS, include)
+        )
+
+    def get_by_script(self, db: Session, script_id: str, skip: int = 0, limit: int = 100, include: Sequence[str] = ()) -> List[TestHistory]:
+        return self._list_query(db, include).filter(self.model.script_id == script_id).order_by(self.model.run_date.desc()).offset(skip).limit(limit).all()
         
-    def get_by_project(self, db: Session, project_id: str, skip: int = 0, limit: int = 100) -> List[TestHistory]:
-        return db.query(self.model).options(
-            joinedload(self.model.script),
-            joinedload(self.model.healing_logs)
-        ).filter(self.model.project_id == project_id).order_by(self.model.run_date.desc()).offset(skip).limit(limit).all()
+    def get_by_project(self, db: Session, project_id: str, skip: int = 0, limit: int = 100, include: Sequence[str] = ()) -> List[TestHistory]:
+        return self._list_query(db, include).filter(self.model.project_id == project_id).order_by(self.model.run_date.desc()).offset(skip).limit(limit).all()
+
+    def get_page_by_script(self, db: Session, script_id: str, cursor: Optional[str] = None, limit: int = 100, include: Sequence[str] = ()) -> Tuple[List[TestHistory], Optional[str]]:
+        query = self._list_query(db, include).filter(self.model.script_id == script_id)
+        return keyset_paginate(query, [self.model.run_date, self.model.id], cursor=cursor, limit=limit)
+
+    def get_page_by_project(self, db: Session, project_id: str, cursor: Optional[str] = None, limit: int = 100, include: Sequence[str] = ()) -> Tuple[List[TestHistory], Optional[str]]:
+        query = self._list_query(db, include).filter(self.model.project_id == project_id)
+        return keyset_paginate(query, [self.model.run_date, self.model.id], cursor=cursor, limit=limit)
 
     def create(self, db: Session, *, obj_in: TestHistoryCreate) -> TestHistory:
         import time
+        from app.services.blob_store import blob_store
+        from app.services.log_store import log_store
+        from app.services.history_service import history_service
+        data = obj_in.model_dump()
+        data["step_results"] = blob_store.externalize_steps(data.get("step_results"))
+        logs = data.pop("logs", None)
         db_obj = TestHistory(
             id=f"hist_{int(time.time()*1000)}",
-            **obj_in.model_dump()
+            logs=[],
+            **data
         )
         db.add(db_obj)
+        log_store.write(db, db_obj.id, logs)
+        history_service.record_run(db, db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
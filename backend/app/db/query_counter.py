@@ -0,0 +1,98 @@
+import contextvars
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or block issued more SQL statements than its budget (usually an N+1)."""
+
+
+class QueryCounter:
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.count = 0
+        self.total_time = 0.0 # seconds spent in cursor.execute
+        self.statements: List[str] = []
+        self.timings: List[Tuple[float, str]] = [] # (seconds, statement)
+        # Set when the count_queries() block ends; tasks that outlive it stop counting
+        self.closed = False
+
+    def record(self, statement: str, duration: float) -> None:
+        if self.closed:
+            return
+        self.count += 1
+        self.total_time += duration
+        self.statements.append(statement)
+        self.timings.append((duration, statement))
+
+    def slowest(self) -> Optional[Tuple[float, str]]:
+        return max(self.timings, key=lambda t: t[0]) if self.timings else None
+
+    def top_statements(self, top: int = 3) -> List[Tuple[float, str]]:
+        return sorted(self.timings, key=lambda t: t[0], reverse=True)[:top]
+
+    def most_repeated(self, top: int = 3) -> List[tuple]:
+        """(statement, times) pairs; an N+1 shows up as one statement repeated per row."""
+        return Counter(self.statements).most_common(top)
+
+    def check(self, label: str) -> None:
+        if not self.limit or self.count <= self.limit:
+            return
+        repeated = "\n".join(f"  {times}x {statement[:200]}" for statement, times in self.most_repeated())
+        raise QueryBudgetExceeded(f"{label} issued {self.count} queries (limit {self.limit}). Most repeated:\n{repeated}")
+
+
+_current: contextvars.ContextVar[Optional[QueryCounter]] = contextvars.ContextVar("query_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    starts = conn.info.get("query_start_time")
+    if counter is not None and starts:
+        counter.record(statement, time.perf_counter() - starts.pop())
+
+
+def install(engine: Engine) -> None:
+    """Counts and times statements run on `engine` while a count_queries() block is active."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries(limit: Optional[int] = None, label: str = "Block") -> Iterator[QueryCounter]:
+    """
+    Counts the SQL statements issued inside the block (including worker threads started
+    with a copy of the current context, e.g. FastAPI's threadpool). With `limit`,
+    raises QueryBudgetExceeded on exit if it was exceeded.
+
+        with count_queries(limit=5) as counter:
+            client.get("/api/v1/history/?project_id=p1")
+    """
+    counter = QueryCounter(limit)
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        counter.closed = True
+        _current.reset(token)
+    counter.check(label)
+
+
+def detach() -> None:
+    """
+    Stops counting the current context's statements against the enclosing count_queries()
+    block. Call first thing in background tasks spawned from a request (asyncio tasks and
+    BackgroundTasks inherit a copy of the request context, counter included).
+    """
+    _current.set(None)
@@ -1,7 +1,11 @@
+import time
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import registry
+from app.db import query_counter
 
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
@@ -9,11 +13,27 @@ engine = create_engine(
     # echo=True # Enable for SQL debugging
 )
 
+# Statement counts/timings for QueryMetricsMiddleware (no-op outside count_queries blocks)
+query_counter.install(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+POOL_CHECKOUT_SECONDS = registry.histogram(
+    "qone_db_pool_checkout_seconds", "Wait for a pooled DB connection in get_db",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+POOL_CONNECTIONS = registry.gauge("qone_db_pool_connections", "DB pool connections by state", ("state",))
+POOL_CONNECTIONS.set_function(lambda: engine.pool.checkedout(), state="checked_out")
+POOL_CONNECTIONS.set_function(lambda: engine.pool.checkedin(), state="idle")
+POOL_CONNECTIONS.set_function(lambda: max(engine.pool.overflow(), 0), state="overflow")
+
 def get_db():
     db = SessionLocal()
     try:
+        # Check the connection out up front so pool exhaustion shows up as wait time
+        started = time.perf_counter()
+        db.connection()
+        POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
         yield db
     finally:
         db.close()
@@ -27,11 +27,23 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 @app.on_event("startup")
 def startup_event():
     from app.services.scheduler import scheduler as scheduler_service
+    from app.services.history_archive import history_archive_service
     from app.db.session import SessionLocal
     from app import crud
     
     db = SessionLocal()
     try:
+        # The current month's partition must exist before the first run is recorded
+        history_archive_service.ensure_partitions(db)
+    except Exception as e:
+        db.rollback()
+        print(f"[History] Failed to ensure testhistory partitions: {e}")
+    # Runs of a previous backend process (restart, reload, crash): fail them or resume their
+    # schedule batch. Before any schedule can fire and register runs of its own
+    from app.services.run_registry import run_registry
+    run_registry.recover(scheduler_service.resume_batch)
+    try:
+        scheduler_service.add_maintenance_jobs()
         schedules = crud.schedule.get_multi(db, limit=1000)
         print(f"[Scheduler] Loading {len(schedules)} schedules...")
         for sch in schedules:
@@ -42,6 +54,45 @@ def startup_event():
     finally:
         db.close()
 
+@app.on_event("startup")
+async def start_loop_watchdog():
+    from app.core.config import settings
+    from app.core.loop_watchdog import loop_watchdog
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+@app.on_event("startup")
+def start_process_reaper():
+    from app.core.config import settings
+    from app.services.process_reaper import process_reaper
+    if settings.PROCESS_REAPER_ENABLED:
+        process_reaper.start()
+
+@app.on_event("shutdown")
+def stop_loop_watchdog():
+    from app.core.loop_watchdog import loop_watchdog
+    loop_watchdog.stop()
+
+@app.on_event("shutdown")
+def shutdown_device_executors():
+    from app.services.app_executor import device_executors
+    device_executors.shutdown()
+
+@app.on_event("shutdown")
+def shutdown_playwright_runtime():
+    from app.services.playwright_runtime import playwright_runtime
+    playwright_runtime.shutdown()
+
+@app.on_event("shutdown")
+def stop_process_reaper():
+    from app.services.process_reaper import process_reaper
+    process_reaper.stop()
+
+
+# Per-request SQL count / DB time metrics, slow request log and the test-mode N+1 guard
+from app.core.middleware import QueryMetricsMiddleware
+app.add_middleware(QueryMetricsMiddleware)
+
 
 # CORS middleware configuration
 # Allow requests from the frontend (Vite default port 5173) and generic localhost
@@ -58,6 +109,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor", # Keyset pagination cursor (app.crud.base)
+        "X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-Slowest-Ms", "X-DB-Slowest-Statement", # DEBUG_QUERY_HEADERS
+    ],
 )
 
 
@@ -88,3 +143,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus text exposition of app.core.metrics.registry (METRICS_TOKEN bearer, else loopback only)."""
+    import secrets
+    from fastapi import HTTPException
+    from fastapi.responses import PlainTextResponse
+    from app.core.metrics import registry
+
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif not request.client or request.client.host not in ("127.0.0.1", "::1", "localhost"):
+        raise HTTPException(status_code=403, detail="Metrics are only served to local clients unless METRICS_TOKEN is set")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,6 @@
 from .user import User, CustomerAccount, PermissionMatrix
-from .project import Project, ProjectAccess
-from .test import TestScript, Persona, Scenario, TestHistory, TestSchedule, ScheduleScript
+from .project import Project, ProjectAccess, ProjectStats
+from .test import TestScript, Persona, Scenario, TestHistory, TestHistoryArchive, HistoryLogChunk, ScriptLatestResult, RunRegistry, TestSchedule, ScheduleScript
 from .device import Device
 from .knowledge import KnowledgeDocument, KnowledgeItem, KnowledgeMap
 
@@ -5,7 +5,7 @@ from app.db.base_class import Base
 
 class AiExplorationSession(Base):
     id = Column(String, primary_key=True, index=True)
-    history_id = Column(String, ForeignKey("testhistory.id"), nullable=True, unique=True)
+    history_id = Column(String, nullable=True, unique=True) # testhistory is partitioned, so no FK
     
     target_url = Column(String)
     goal = Column(String)
@@ -20,4 +20,7 @@ class AiExplorationSession(Base):
     generated_script_id = Column(String, nullable=True) # Linked Script ID
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    history = relationship("TestHistory", back_populates="ai_session")
+    history = relationship("TestHistory",
+                           primaryjoin="AiExplorationSession.history_id == TestHistory.id",
+                           foreign_keys=[history_id],
+                           back_populates="ai_session")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import Column, String, ForeignKey, DateTime, JSON, Text, Integer, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -45,3 +45,18 @@ class ProjectAccess(Base):
     
     user = relationship("User", back_populates="project_access")
     project = relationship("Project", back_populates="access")
+
+class ProjectStats(Base):
+    """Dashboard aggregates per project, maintained by app.services.project_stats."""
+    project_id = Column(String, ForeignKey("project.id", ondelete="CASCADE"), primary_key=True)
+    total_runs = Column(Integer, default=0)
+    passed_runs = Column(Integer, default=0)
+    failed_runs = Column(Integer, default=0)
+    runs_by_trigger = Column(JSON, default={}) # {"manual": 10, "scheduled": 4, "pipeline": 2}
+    active_defects = Column(Integer, default=0) # Active scripts whose latest run failed
+    active_defects_by_origin = Column(JSON, default={})
+    total_assets = Column(Integer, default=0) # Lazily refreshed (see ASSET_REFRESH_MINUTES)
+    weekly_growth = Column(Integer, default=0)
+    assets_refreshed_at = Column(DateTime(timezone=True), nullable=True)
+    needs_rebuild = Column(Boolean, default=False) # Set when scripts change outside of runs
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text, LargeBinary, Index
+from sqlalchemy.orm import query_expression, relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
@@ -33,6 +33,10 @@ class TestScript(Base):
     last_run = Column(DateTime(timezone=True))
     run_count = Column(Integer, default=0)
     success_rate = Column(Float, default=0.0)
+    # Running counters maintained by history_service.record_run (no history scans)
+    pass_count = Column(Integer, default=0)
+    fail_count = Column(Integer, default=0)
+    recent_statuses = Column(String, default="") # Last RECENT_RUNS_WINDOW results, oldest first: "PPFP..."
     code = Column(Text) # The actual script
     origin = Column(String) # MANUAL, AI, STEP
     category = Column(String, default="Common") # 분과
@@ -45,6 +49,9 @@ class TestScript(Base):
     platform = Column(String) # WEB, APP (New for Step Runner)
     capture_screenshots = Column(Boolean, default=False)
     steps = Column(JSON, default=[]) # Native Step representation for Step scripts
+    # List summaries of the deferred steps/dataset columns, computed in SQL (crud.script list queries)
+    step_count = query_expression()
+    dataset_count = query_expression()
     try_count = Column(Integer, default=1)
     enable_ai_test = Column(Boolean, default=False)
     priority = Column(String, default='P2')
@@ -57,6 +64,29 @@ class TestScript(Base):
                            viewonly=True)
     match_schedules = relationship("ScheduleScript", back_populates="script")
 
+    RECENT_RUNS_WINDOW = 30
+
+    def _recent_pass_rate(self, runs: int):
+        recent = (self.recent_statuses or "")[-runs:]
+        if not recent:
+            return None
+        return round(recent.count("P") / len(recent) * 100, 1)
+
+    @property
+    def pass_rate_7(self):
+        """Pass rate (%) over the last 7 runs."""
+        return self._recent_pass_rate(7)
+
+    @property
+    def pass_rate_30(self):
+        """Pass rate (%) over the last 30 runs."""
+        return self._recent_pass_rate(30)
+
+    __table_args__ = (
+        # Keyset pagination (crud.script.get_page_by_project)
+        Index("ix_testscript_project_id_created_at_id", "project_id", "created_at", "id"),
+    )
+
 class Scenario(Base):
     id = Column(String, primary_key=True, index=True)
     project_id = Column(String, ForeignKey("project.id"))
@@ -64,6 +94,7 @@ class Scenario(Base):
     description = Column(String)
     category = Column(String, nullable=True)
     test_cases = Column(JSON, default=[]) # TestCase[]
+    test_case_count = query_expression() # List summary of the deferred test_cases
     persona_id = Column(String, ForeignKey("persona.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_approved = Column(Boolean, default=False)
@@ -80,25 +111,36 @@ class Scenario(Base):
     golden_script = relationship("TestScript") # Optional relationship for access
     persona = relationship("Persona")
 
+    __table_args__ = (
+        Index("ix_scenario_project_id_created_at_id", "project_id", "created_at", "id"),
+    )
+
 class TestHistory(Base):
+    # Range-partitioned by month on run_date (see app.services.history_archive), hence the
+    # composite primary key and no foreign keys pointing at testhistory.id
     id = Column(String, primary_key=True, index=True)
     project_id = Column(String, index=True, nullable=True) # Direct project link
     script_id = Column(String, index=True) # TestScript
     script_name = Column(String) # Denormalized for ease
-    run_date = Column(DateTime(timezone=True), server_default=func.now())
+    # Copied from the script by history_service.record_run so lists never load the script
+    script_origin = Column(String, nullable=True)
+    script_category = Column(String, nullable=True, default="Common")
+    run_date = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     status = Column(String) # passed, failed
     duration = Column(String)
     persona_name = Column(String)
     trigger = Column(String) # manual, pipeline, scheduled
     failure_reason = Column(String)
     ai_summary = Column(String)
-    logs = Column(JSON, default=[]) # LogEntry[]
+    logs = Column(JSON, default=[]) # Legacy inline LogEntry[]; new runs store HistoryLogChunk rows
     deployment_version = Column(String)
     commit_hash = Column(String)
     schedule_id = Column(String, ForeignKey("testschedule.id"), nullable=True)
     schedule_name = Column(String)
     failure_analysis = Column(JSON, nullable=True) # AI-generated diagnostics
+    failure_signature = Column(String, index=True, nullable=True) # Groups identical failures (see failure_clustering)
     step_results = Column(JSON, default=[]) # Universal step-by-step results
+    failed_step_error = query_expression() # List summary: error of the first failed step
     jira_id = Column(String, nullable=True) # External Jira Issue reference
     run_id = Column(String, index=True, nullable=True) # Execution Batch ID
     script = relationship("TestScript", 
@@ -106,16 +148,92 @@ class TestHistory(Base):
                           foreign_keys=[script_id],
                           back_populates="history")
     schedule = relationship("TestSchedule", back_populates="history_entries")
-    ai_session = relationship("AiExplorationSession", uselist=False, back_populates="history")
-    healing_logs = relationship("SelfHealingLog", back_populates="history")
+    ai_session = relationship("AiExplorationSession",
+                              primaryjoin="TestHistory.id == AiExplorationSession.history_id",
+                              foreign_keys="AiExplorationSession.history_id",
+                              uselist=False, back_populates="history")
+    healing_logs = relationship("SelfHealingLog",
+                                primaryjoin="TestHistory.id == SelfHealingLog.history_id",
+                                foreign_keys="SelfHealingLog.history_id",
+                                back_populates="history")
 
-    @property
-    def script_origin(self):
-        return self.script.origin if self.script else None
+    __table_args__ = (
+        # Keyset pagination on (run_date, id), newest first
+        Index("ix_testhistory_project_id_run_date_id", "project_id", "run_date", "id"),
+        Index("ix_testhistory_script_id_run_date_id", "script_id", "run_date", "id"),
+    )
 
-    @property
-    def script_category(self):
-        return self.script.category if self.script else "Common"
+class HistoryLogChunk(Base):
+    """Compressed slice of a TestHistory's execution log (see app.services.log_store)."""
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # testhistory is partitioned, so no FK; archiving folds the chunks into the archive row
+    history_id = Column(String, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    first_line = Column(Integer, nullable=False) # 0-based line number of the first entry
+    line_count = Column(Integer, nullable=False)
+    level_counts = Column(JSON, default={}) # {"info": 480, "error": 20}
+    codec = Column(String, default="gzip") # gzip | zstd
+    data = Column(LargeBinary, nullable=False) # Newline-delimited LogEntry JSON, compressed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_historylogchunk_history_id_chunk_index", "history_id", "chunk_index", unique=True),
+    )
+
+class TestHistoryArchive(Base):
+    """TestHistory row moved out of an expired monthly partition, stored compressed."""
+    id = Column(String, primary_key=True) # TestHistory.id
+    project_id = Column(String, index=True)
+    script_id = Column(String, index=True)
+    run_date = Column(DateTime(timezone=True))
+    status = Column(String)
+    trigger = Column(String) # Kept for stats rebuilds
+    partition = Column(String) # Source partition, e.g. testhistory_p202401
+    codec = Column(String, default="gzip") # gzip | zstd
+    data = Column(LargeBinary, nullable=False) # Full row as JSON, compressed
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ScriptLatestResult(Base):
+    """Latest run outcome per script, maintained by history_service.record_run."""
+    script_id = Column(String, ForeignKey("testscript.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(String, nullable=False)
+    history_id = Column(String, nullable=False)
+    status = Column(String) # passed / failed
+    failure_reason = Column(Text, nullable=True)
+    run_date = Column(DateTime(timezone=True))
+    healing_status = Column(String, nullable=True) # None, started, success, failed (for history_id)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    script = relationship("TestScript")
+
+    __table_args__ = (
+        Index("ix_scriptlatestresult_project_id_status", "project_id", "status"),
+    )
+
+class RunRegistry(Base):
+    """
+    Runs in flight (dry runs, active-steps runs, schedule batches), so a restarted backend
+    can tell which ones it lost. Maintained by app.services.run_registry.
+    """
+    id = Column(String, primary_key=True) # run_id, or batch id for schedule batches
+    kind = Column(String, nullable=False) # dry_run, active_steps, schedule_batch
+    status = Column(String, nullable=False, default="running") # running, passed, failed, completed, interrupted, requeued
+    trigger = Column(String, nullable=True)
+    project_id = Column(String, nullable=True)
+    script_id = Column(String, nullable=True)
+    schedule_id = Column(String, nullable=True)
+    payload = Column(JSON, default={}) # What recovery needs (script name, batch script ids)
+    progress = Column(JSON, default={}) # Schedule batches: {"done": [script_id, ...], "resumes": n}
+    owner_host = Column(String, nullable=True)
+    owner_pid = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_runregistry_status_owner_host", "status", "owner_host"),
+    )
 
 class TestSchedule(Base):
     id = Column(String, primary_key=True, index=True)
@@ -166,6 +284,10 @@ class TestObject(Base):
     
     project = relationship("Project")
 
+    __table_args__ = (
+        Index("ix_testobject_project_id_id", "project_id", "id"),
+    )
+
 class TestAction(Base):
     """
     Reusable Action Function Asset
@@ -183,6 +305,10 @@ class TestAction(Base):
     
     project = relationship("Project")
 
+    __table_args__ = (
+        Index("ix_testaction_project_id_id", "project_id", "id"),
+    )
+
 class TestDataset(Base):
     """
     Key-Value Test Data Asset
@@ -202,6 +328,10 @@ class TestDataset(Base):
     
     project = relationship("Project")
 
+    __table_args__ = (
+        Index("ix_testdataset_project_id_id", "project_id", "id"),
+    )
+
 class ActionMap(Base):
     """
     Persisted Action Flow Map for AI Generator
@@ -219,7 +349,7 @@ class ActionMap(Base):
 class SelfHealingLog(Base) :
     __tablename__ = "selfhealinglog"
     id = Column(String, primary_key=True, index=True)
-    history_id = Column(String, ForeignKey("testhistory.id"))
+    history_id = Column(String, index=True) # testhistory is partitioned, so no FK
     script_id = Column(String, ForeignKey("testscript.id"))
     status = Column(String) # started, in_progress, success, failed
     error_detected = Column(Text, nullable=True)
@@ -227,5 +357,8 @@ class SelfHealingLog(Base) :
     modified_steps = Column(JSON, default=[]) # The repaired final steps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    history = relationship("TestHistory", back_populates="healing_logs")
+    history = relationship("TestHistory",
+                           primaryjoin="SelfHealingLog.history_id == TestHistory.id",
+                           foreign_keys=[history_id],
+                           back_populates="healing_logs")
     script = relationship("TestScript")
@@ -4,7 +4,7 @@ from .customer import Customer, CustomerCreate, CustomerUpdate
 from .project import Project, ProjectCreate, ProjectUpdate
 from .test_script import TestScript, TestScriptCreate, TestScriptUpdate
 from .scenario import Scenario, ScenarioCreate, ScenarioUpdate
-from .test_history import TestHistory, TestHistoryCreate, TestHistoryUpdate, TestHistorySummary
+from .test_history import TestHistory, TestHistoryCreate, TestHistoryUpdate, TestHistorySummary, TestHistoryListItem
 from .test_schedule import TestSchedule, TestScheduleCreate, TestScheduleUpdate
 from .ai import ChatRequest, ChatResponse, ChatMessage, DataGenerationRequest, DataGenerationResponse, TestDataRow
 from .persona import Persona, PersonaCreate, PersonaUpdate
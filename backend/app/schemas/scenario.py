@@ -48,6 +48,7 @@ class ScenarioInDBBase(ScenarioBase):
 
 class Scenario(ScenarioInDBBase):
     persona: Optional[Persona] = None
+    test_case_count: Optional[int] = None # List summary (test_cases is left out of lists)
 
 class ActionMapBase(BaseModel):
     url: Optional[str] = None
@@ -24,3 +24,14 @@ class SelfHealingLog(SelfHealingLogBase):
 
     class Config:
         from_attributes = True
+
+class SelfHealingLogSummary(BaseModel):
+    """Healing log without steps, for list responses."""
+    id: str
+    history_id: str
+    script_id: str
+    status: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
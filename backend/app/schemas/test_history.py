@@ -1,12 +1,24 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel
-from app.schemas.self_healing import SelfHealingLog
+from pydantic import BaseModel, field_serializer
+from app.schemas.self_healing import SelfHealingLog, SelfHealingLogSummary
 
 class LogEntry(BaseModel):
     msg: str
     type: str # info, success, error, cmd
 
+class LogLine(LogEntry):
+    line: int # 1-based line number within the full log
+
+class HistoryLogPage(BaseModel):
+    history_id: str
+    total: int # Lines matching `level` (all lines if no level)
+    offset: int
+    limit: int
+    level: Optional[str] = None
+    level_counts: Dict[str, int] = {}
+    items: List[LogLine] = []
+
 class TestHistoryBase(BaseModel):
     project_id: Optional[str] = None
     status: Optional[str] = None
@@ -18,6 +30,7 @@ class TestHistoryBase(BaseModel):
     step_results: Optional[List[Dict[str, Any]]] = []
     jira_id: Optional[str] = None
     run_id: Optional[str] = None
+    failure_signature: Optional[str] = None
 
 class TestHistoryCreate(TestHistoryBase):
     script_id: str
@@ -46,9 +59,20 @@ class TestHistoryInDBBase(TestHistoryBase):
     class Config:
         from_attributes = True
 
+    @field_serializer("step_results")
+    def _sign_screenshots(self, step_results):
+        # Externalized screenshots are served via short-lived signed /blobs URLs
+        from app.services.blob_store import blob_store
+        return blob_store.sign_steps(step_results)
+
 class TestHistory(TestHistoryInDBBase):
     healing_logs: List[SelfHealingLog] = []
 
+class TestHistoryListItem(TestHistoryInDBBase):
+    """List row: logs/step_results/failure_analysis only when requested via `fields=`."""
+    healing_logs: List[SelfHealingLogSummary] = []
+    failed_step_error: Optional[str] = None # Summary of step_results for list views
+
 class TestHistorySummary(BaseModel):
     total: int
     passed: int
@@ -61,6 +85,26 @@ class TestHistorySummary(BaseModel):
     weekly_growth: int
     active_defects_by_origin: Dict[str, int]
 
+class FailureCluster(BaseModel):
+    signature: str
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+    failure_reason: Optional[str] = None
+    failure_analysis: Optional[Dict[str, Any]] = None
+    history_ids: List[str] = []
+    scripts: List[str] = []
+
+class StepTimingStat(BaseModel):
+    bucket: Optional[datetime] = None # Start of the day/week/month when grouped over time
+    key: Optional[str] = None # Action type, selector or script_id depending on group_by
+    script_name: Optional[str] = None
+    steps: int
+    failed: int
+    total_ms: float
+    p95_total_ms: float
+    phases_ms: Dict[str, float] # Average ms per phase: locate, action, settle, assert, screenshot, encode
+
 class ProjectInsightBase(BaseModel):
     title: str
     content_markdown: str
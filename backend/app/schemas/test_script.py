@@ -44,6 +44,10 @@ class TestScriptInDBBase(TestScriptBase):
     last_run: Optional[datetime] = None
     run_count: int = 0
     success_rate: float = 0.0
+    pass_count: Optional[int] = 0
+    fail_count: Optional[int] = 0
+    pass_rate_7: Optional[float] = None
+    pass_rate_30: Optional[float] = None
     persona_id: Optional[str] = None
 
     class Config:
@@ -51,3 +55,6 @@ class TestScriptInDBBase(TestScriptBase):
 
 class TestScript(TestScriptInDBBase):
     persona: Optional[Persona] = None
+    # List summaries (set by list endpoints, where steps/dataset are left out)
+    step_count: Optional[int] = None
+    dataset_count: Optional[int] = None
@@ -1,39 +1,12 @@
-import asyncio
-import sys
-import threading
 import uuid
 import time
 from typing import Dict, Any, List
-from playwright.async_api import async_playwright
 
-class ActionMapper:
-    def __init__(self):
-        self._bg_thread = None
-        self._bg_loop = None
-        self._loop_ready = threading.Event()
-
-    def _start_background_loop(self):
-        try:
-            if sys.platform == 'win32':
-                asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-            self._bg_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._bg_loop)
-            self._loop_ready.set()
-            self._bg_loop.run_forever()
-        except Exception as e:
-            print(f"ActionMapper Event Loop Error: {e}")
-
-    def _ensure_background_thread(self):
-        if self._bg_thread is None or not self._bg_thread.is_alive():
-            self._loop_ready.clear()
-            self._bg_thread = threading.Thread(target=self._start_background_loop, daemon=True, name="ActionMapperThread")
-            self._bg_thread.start()
-            self._loop_ready.wait()
+from app.services.playwright_runtime import playwright_runtime
 
+class ActionMapper:
     def _run_in_bg(self, coro):
-        self._ensure_background_thread()
-        future = asyncio.run_coroutine_threadsafe(coro, self._bg_loop)
-        return asyncio.wrap_future(future)
+        return playwright_runtime.submit(coro)
 
     def _ensure_protocol(self, url: str) -> str:
         if not url: return ""
@@ -88,12 +61,13 @@ class ActionMapper:
         full_root_url = self._ensure_protocol(url)
         print(f"DEBUG: Starting map_url for {url} (full: {full_root_url}, normalized: {normalized_root_url})")
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080}
-            )
+        # Fresh context on the shared browser instead of a driver + browser per map
+        context = await playwright_runtime.new_context(
+            owner="action_mapper",
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+            viewport={"width": 1920, "height": 1080}
+        )
+        try:
             page = await context.new_page()
             
             # Anti-bot: Hide webdriver flag
@@ -284,8 +258,9 @@ class ActionMapper:
                             await page.wait_for_timeout(1500)
                         except: pass
                         
-            await browser.close()
             return root_node
+        finally:
+            await context.close()
 
     async def _clear_overlays(self, page):
         """
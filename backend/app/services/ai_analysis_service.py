@@ -5,6 +5,8 @@ import asyncio
 from typing import List, Dict, Any, Optional
 from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.tracing import span
+from app.services.telemetry import generate_content
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +84,8 @@ class AIAnalysisService:
                 logger.error(f"Failed to attach screenshot to AI Analysis: {e}")
 
         def _call_llm():
-            return client.models.generate_content(
+            return generate_content(
+                client, "ai_analysis_service.analyze_failure",
                 model=settings.GEMINI_MODEL,
                 contents=contents,
                 config=types.GenerateContentConfig(
@@ -91,7 +94,8 @@ class AIAnalysisService:
             )
 
         try:
-            response = await run_in_threadpool(_call_llm)
+            with span("ai.analysis", platform=platform, screenshot=bool(screenshot_b64)):
+                response = await run_in_threadpool(_call_llm)
             text = response.text
             
             # Cleaning markdown code blocks if present
@@ -0,0 +1,173 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.services.app_runner import AppStepRunner, app_step_runner
+
+logger = logging.getLogger(__name__)
+
+# Key used before a runner is bound to a device (no session yet)
+UNBOUND_DEVICE = "unbound"
+
+
+class DeviceExecutors:
+    """
+    One single-thread executor per device. Every Appium command for a device runs on its
+    thread, so commands keep their order per device while different devices run in parallel
+    and the event loop never waits on the Selenium HTTP client or time.sleep.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+
+    def get(self, device_id: Optional[str]) -> ThreadPoolExecutor:
+        key = device_id or UNBOUND_DEVICE
+        with self._lock:
+            executor = self._executors.get(key)
+            if executor is None:
+                executor = self._executors[key] = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f"Appium-{key}"
+                )
+            return executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executors, self._executors = list(self._executors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+device_executors = DeviceExecutors()
+
+
+class AsyncAppStepRunner:
+    """
+    Async facade over an AppStepRunner. Each call is routed to the executor of the device
+    the runner is bound to (the session's udid), with the caller's contextvars so tracing
+    spans nest under the calling coroutine. Plain attributes (driver, window_size, ...)
+    and apply_data_to_step are read straight from the wrapped runner.
+    """
+
+    def __init__(self, runner: AppStepRunner, device_id: Optional[str] = None, registry: Optional["AppRunnerRegistry"] = None):
+        self.runner = runner
+        self.device_id = device_id
+        self.registry = registry # Set for per-device runners, which are dropped once stopped
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.runner, name)
+
+    def _device(self) -> Optional[str]:
+        return self.device_id or self.runner.current_device_id
+
+    async def run(self, fn: Callable, *args, device_id: Optional[str] = None, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` on the device's executor thread."""
+        executor = device_executors.get(device_id or self._device())
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(context.run, fn, *args, **kwargs)
+        )
+
+    def call_blocking(self, fn: Callable, *args, device_id: Optional[str] = None, **kwargs) -> Any:
+        """run() for sync endpoints already on a worker thread: waits on the device's executor."""
+        executor = device_executors.get(device_id or self._device())
+        context = contextvars.copy_context()
+        return executor.submit(context.run, fn, *args, **kwargs).result()
+
+    def _session_device(self, capabilities: Dict[str, Any]) -> Optional[str]:
+        return self.device_id or capabilities.get("udid") or capabilities.get("deviceName")
+
+    async def start_session(self, capabilities: Dict[str, Any]):
+        return await self.run(self.runner.start_session, capabilities, device_id=self._session_device(capabilities))
+
+    def start_session_blocking(self, capabilities: Dict[str, Any]):
+        return self.call_blocking(self.runner.start_session, capabilities, device_id=self._session_device(capabilities))
+
+    async def stop_session(self) -> None:
+        try:
+            await self.run(self.runner.stop_session)
+        finally:
+            if self.registry:
+                self.registry.release(self)
+
+    async def execute_step(self, step: Dict[str, Any], data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.run(self.runner.execute_step, step, data=data)
+
+    async def get_screenshot(self) -> Optional[str]:
+        return await self.run(self.runner.get_screenshot)
+
+    async def get_page_source(self) -> Optional[str]:
+        return await self.run(self.runner.get_page_source)
+
+    async def get_clean_source(self) -> Optional[str]:
+        return await self.run(self.runner.get_clean_source)
+
+    async def get_contexts(self) -> List[str]:
+        return await self.run(self.runner.get_contexts)
+
+    async def switch_context(self, context_name: str) -> bool:
+        return await self.run(self.runner.switch_context, context_name)
+
+    async def scroll(self, delta_y: int) -> Dict[str, Any]:
+        return await self.run(self.runner.scroll, delta_y)
+
+    async def wait_for_ui_stable(self, *args, **kwargs) -> Any:
+        return await self.run(self.runner.wait_for_ui_stable, *args, **kwargs)
+
+    async def activate_app(self, app_id: str) -> None:
+        def _activate():
+            if self.runner.driver:
+                self.runner.driver.activate_app(app_id)
+        await self.run(_activate)
+
+
+class AppRunnerRegistry:
+    """
+    AppStepRunner per device for runs that carry a device_id, so runs on different devices
+    hold independent Appium sessions. The shared inspector/exploration runner
+    (app_step_runner) is exposed as `shared` and uses the same per-device executors.
+
+    A device has one Appium session at a time: claim() closes the shared runner's session
+    when a run takes over its device, and a per-device runner is dropped when its session
+    is stopped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runners: Dict[str, AsyncAppStepRunner] = {}
+        self.shared = AsyncAppStepRunner(app_step_runner)
+
+    def for_device(self, device_id: str) -> AsyncAppStepRunner:
+        with self._lock:
+            runner = self._runners.get(device_id)
+            if runner is None:
+                runner = self._runners[device_id] = AsyncAppStepRunner(AppStepRunner(), device_id=device_id, registry=self)
+            return runner
+
+    async def claim(self, device_id: str) -> AsyncAppStepRunner:
+        """for_device() for a run about to start its session: ends the shared session on that device first."""
+        runner = self.for_device(device_id)
+        if app_step_runner.driver and app_step_runner.current_device_id == device_id:
+            logger.info(f"AppRunnerRegistry: closing the shared session on {device_id} for a run")
+            await self.shared.run(app_step_runner.stop_session, device_id=device_id)
+        return runner
+
+    def release(self, runner: AsyncAppStepRunner) -> None:
+        """Drops a stopped per-device runner (a newer one for the device is left alone)."""
+        with self._lock:
+            if self._runners.get(runner.device_id) is runner and not runner.runner.driver:
+                del self._runners[runner.device_id]
+
+    def active_device_ids(self) -> Set[str]:
+        with self._lock:
+            runners = list(self._runners.values())
+        active = {r.device_id for r in runners if r.runner.driver}
+        if app_step_runner.driver and app_step_runner.current_device_id:
+            active.add(app_step_runner.current_device_id)
+        return active
+
+app_runner_registry = AppRunnerRegistry()
+async_app_step_runner = app_runner_registry.shared
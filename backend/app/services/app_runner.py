@@ -1,8 +1,10 @@
 import os
 import time
 import re
+import hashlib
 import uuid
 import logging
+import weakref
 from typing import List, Dict, Any, Optional
 
 from appium import webdriver
@@ -10,14 +12,22 @@ from appium.options.common import AppiumOptions
 from appium.webdriver.common.appiumby import AppiumBy
 from selenium.common.exceptions import WebDriverException, NoSuchElementException, InvalidSessionIdException
 
+from app.core.tracing import span
+from app.services.step_timing import StepTimings
+from app.services.telemetry import APPIUM_SESSIONS, observe_step, step_action_label
+
 logger = logging.getLogger(__name__)
 
 class AppStepRunner:
+    # Every runner (singleton and per-run instances) for the session gauge
+    _instances = weakref.WeakSet()
+
     def __init__(self, command_executor: str = "http://127.0.0.1:4723/wd/hub"):
         self.command_executor = command_executor
         self.driver = None
         self.current_device_id = None
         self.window_size = {"width": 1080, "height": 1920} # Default fallback
+        AppStepRunner._instances.add(self)
 
     def start_session(self, capabilities: Dict[str, Any]):
         """
@@ -128,6 +138,36 @@ class AppStepRunner:
                 
         return source # Return whatever we have at the end
 
+    def wait_for_ui_stable(self, timeout: float = 5.0, interval: float = 0.3) -> bool:
+        """
+        Polls the page source until two consecutive dumps are identical (UI settled).
+        Returns False if the UI was still changing when the timeout expired.
+        """
+        if not self.driver:
+            return False
+
+        deadline = time.time() + timeout
+        last_digest = None
+        while time.time() < deadline:
+            try:
+                source = self.driver.page_source
+            except InvalidSessionIdException:
+                logger.error("Appium session lost while waiting for UI to settle.")
+                self.driver = None
+                return False
+            except Exception:
+                source = None
+
+            if source and "<loading />" not in source:
+                digest = hashlib.md5(source.encode("utf-8")).hexdigest()
+                if digest == last_digest:
+                    return True
+                last_digest = digest
+            time.sleep(interval)
+
+        logger.info(f"UI did not settle within {timeout}s, continuing.")
+        return False
+
     def get_clean_source(self) -> str:
         """Returns a simplified XML source for LLM consumption."""
         source = self.get_page_source()
@@ -592,7 +632,28 @@ class AppStepRunner:
         
         return new_step
 
-    def execute_step(self, step: Dict[str, Any], db: Optional[Any] = None, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def execute_step(self, step: Dict[str, Any], data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with span("app.step", action=step_action_label(step)) as s:
+            started = time.perf_counter()
+            timings = StepTimings()
+            result = self._execute_step_impl(step, data=data, timings=timings)
+            result["timings"] = timings.as_dict()
+            observe_step("app", step, started, result)
+            s.set_status(bool(result.get("success")), result.get("error"))
+            return result
+
+    def _find_custom_action(self, action_name: str) -> Any:
+        # Runs on the device's executor thread: own session, never the caller's
+        from app.db.session import SessionLocal
+        from app.models.test import TestAction
+
+        db = SessionLocal()
+        try:
+            return db.query(TestAction).filter(TestAction.name == action_name, TestAction.platform == "APP").first()
+        finally:
+            db.close()
+
+    def _execute_step_impl(self, step: Dict[str, Any], data: Optional[Dict[str, Any]] = None, timings: Optional[StepTimings] = None) -> Dict[str, Any]:
         """
         Executes a single step.
         Step format: {
@@ -602,7 +663,9 @@ class AppStepRunner:
             "option": "text to send",
             "sleep": 0
         }
+        Locate / settle / assert time is accumulated into `timings` (see app.services.step_timing).
         """
+        timings = timings or StepTimings()
         if not self.driver:
             return {"success": False, "error": "No active session"}
 
@@ -613,9 +676,8 @@ class AppStepRunner:
         action_name = step.get("action", "").lower()
         
         # 1. Check for Custom Action in DB
-        if db and action_name not in ["click", "tap", "send_keys", "type", "swipe", "scroll", "app_start", "activateapp", "app_open", "app_close", "close_app", "wait", "swipe(하)", "swipe(상)", "back", "find"]:
-            from app.models.test import TestAction
-            custom_action = db.query(TestAction).filter(TestAction.name == action_name, TestAction.platform == "APP").first()
+        if action_name not in ["click", "tap", "send_keys", "type", "swipe", "scroll", "app_start", "activateapp", "app_open", "app_close", "close_app", "wait", "swipe(하)", "swipe(상)", "back", "find"]:
+            custom_action = self._find_custom_action(action_name)
             if custom_action:
                 return self.execute_custom_action(custom_action, step)
 
@@ -638,12 +700,13 @@ class AppStepRunner:
         try:
             logger.info(f"Executing step: {action} with {selector_type}={selector_value}, option={option}")
             if sleep_time > 0:
-                time.sleep(sleep_time)
+                timings.sleep(sleep_time)
 
             if action == "click":
                 element = None
                 try:
-                    element = self.find_element(selector_type, selector_value)
+                    with timings.phase("locate"):
+                        element = self.find_element(selector_type, selector_value)
                     
                     # Pre-fetch coordinates in case fallback is needed, avoiding stale reference errors later
                     try:
@@ -657,8 +720,9 @@ class AppStepRunner:
                     # Try standard click first    
                     #before_source_len = len(self.driver.page_source)                
                     element.click()
-                    time.sleep(1)  # 페이지 전환 최소 대기
-                    self._scroll_to_top()
+                    timings.sleep(1)  # 페이지 전환 최소 대기
+                    with timings.phase("settle"): # Scrolling back to the top is post-action housekeeping
+                        self._scroll_to_top()
                     # after_source_len = len(self.driver.page_source)
 
                     # dom_changed = abs(after_source_len - before_source_len) > 1000
@@ -761,11 +825,12 @@ class AppStepRunner:
                 coords = [int(val) for val in option.split(",")]
                 self.driver.tap([(coords[0], coords[1])])
             elif action == "send_keys" or action == "type":
-                element = self.find_element(selector_type, selector_value)
+                with timings.phase("locate"):
+                    element = self.find_element(selector_type, selector_value)
                 try:
                     # Often necessary to click before typing to gain focus
                     element.click()
-                    time.sleep(0.5)
+                    timings.sleep(0.5)
                     element.clear()
                     element.send_keys(option)
                 except Exception as e:
@@ -804,14 +869,15 @@ class AppStepRunner:
                         start_y = end_y = size['height'] // 2
                         
                 self.driver.swipe(start_x, start_y, end_x, end_y, 500)
-                time.sleep(1) # wait for settling
+                timings.sleep(1) # wait for settling
             elif action == "swipe":
                 # Expecting option as "start_x,start_y,end_x,end_y,duration"
                 coords = [int(x) for x in option.split(",")]
                 self.driver.swipe(*coords)
             elif action == "find":
                 try:
-                    element = self.find_element(selector_type, selector_value)
+                    with timings.phase("locate"):
+                        element = self.find_element(selector_type, selector_value)
                     logger.info(f"find 성공: {selector_value}")
                     return {"success": True, "error": None}
                 except Exception as e:                    
@@ -829,7 +895,8 @@ class AppStepRunner:
                 for attempt in range(max_swipes):
                     try:
                         # Use a very short timeout to check if element is on current screen
-                        element = self.find_element(selector_type, selector_value, timeout=2)
+                        with timings.phase("locate"):
+                            element = self.find_element(selector_type, selector_value, timeout=2)
                         if element:
                             try:
                                 location = element.location
@@ -855,7 +922,7 @@ class AppStepRunner:
                                     if abs(offset) > max_swipe_dist:
                                         logger.info(f"Offset {offset} is too large. Falling back to default swipe.")
                                         self.driver.swipe(start_x, start_y, start_x, end_y, 1500)
-                                        time.sleep(1.0)
+                                        timings.sleep(1.0)
                                         continue
                                         
                                     s_y = size['height'] * 0.7 if offset > 0 else size['height'] * 0.3
@@ -868,7 +935,7 @@ class AppStepRunner:
                                     if e_y < min_y: e_y = min_y
                                     
                                     self.driver.swipe(start_x, int(s_y), start_x, int(e_y), 1500)
-                                    time.sleep(1.5)
+                                    timings.sleep(1.5)
                                     continue # Skip the default swipe below
                             except Exception as loc_err:
                                 logger.warning(f"Could not check element location: {loc_err}. Swiping down to try to reveal it.")
@@ -878,7 +945,7 @@ class AppStepRunner:
                         
                     # Default slow swipe down (moves screen up) to search
                     self.driver.swipe(start_x, start_y, start_x, end_y, 1500)
-                    time.sleep(1.0) # Wait for page to settle
+                    timings.sleep(1.0) # Wait for page to settle
 
                 if not element_found:
                     return {"success": False, "error": f"Failed to find element after {max_swipes} swipes: {selector_value}"}
@@ -891,7 +958,7 @@ class AppStepRunner:
                     except Exception as e:
                         logger.warning(f"Core activate_app failed for {app_id}: {e}")
                         
-                    time.sleep(4) # Implicit wait for app to load its main UI
+                    timings.sleep(4) # Implicit wait for app to load its main UI
                     #self._scroll_to_top()
                 else:
                     pass # Already handled by session start usually if no specific ID given
@@ -921,10 +988,11 @@ class AppStepRunner:
             elif action == "back":
                 logger.info("Executing device BACK action")
                 self.driver.back()
-                time.sleep(1) # wait for page transition
-                self._scroll_to_top()
+                timings.sleep(1) # wait for page transition
+                with timings.phase("settle"): # Scrolling back to the top is post-action housekeeping
+                    self._scroll_to_top()
             elif action == "wait":
-                time.sleep(float(option) if option else 1.0)
+                timings.sleep(float(option) if option else 1.0)
             elif action == "finish":
                 logger.info("Test finished (no-op action)")
             else:
@@ -934,37 +1002,38 @@ class AppStepRunner:
             assert_text = step.get("assertText")
             if assert_text and str(assert_text).strip() != "":
                 logger.info(f"Verifying step assertion: '{assert_text}'")
-                time.sleep(2) # Wait for page transition / UI to settle
-                try:
-                    raw_xml = self.get_page_source() or ""
+                timings.sleep(2) # Wait for page transition / UI to settle
+                with timings.phase("assert"):
+                    try:
+                        raw_xml = self.get_page_source() or ""
                     
-                    # Extract all text/content-desc attributes to form a "visible" text buffer
-                    text_values = re.findall(r'text="([^"]*)"', raw_xml)
-                    desc_values = re.findall(r'content-desc="([^"]*)"', raw_xml)
-                    # Join all text to simulate what a human sees as continuous strings
-                    joined_text = " ".join(text_values + desc_values)
-
-                    if assert_text in joined_text or assert_text in raw_xml:
-                        logger.info("Exact Assertion Passed.")
-                    else:
-                        # Fuzzy match: remove whitespace/newlines and check
-                        def _normalize(t):
-                            t = str(t or "")
-                            # Standardize spaces and remove all whitespace
-                            return "".join(t.split())
+                        # Extract all text/content-desc attributes to form a "visible" text buffer
+                        text_values = re.findall(r'text="([^"]*)"', raw_xml)
+                        desc_values = re.findall(r'content-desc="([^"]*)"', raw_xml)
+                        # Join all text to simulate what a human sees as continuous strings
+                        joined_text = " ".join(text_values + desc_values)
+
+                        if assert_text in joined_text or assert_text in raw_xml:
+                            logger.info("Exact Assertion Passed.")
+                        else:
+                            # Fuzzy match: remove whitespace/newlines and check
+                            def _normalize(t):
+                                t = str(t or "")
+                                # Standardize spaces and remove all whitespace
+                                return "".join(t.split())
                         
-                        clean_joined = _normalize(joined_text)
-                        clean_xml = _normalize(raw_xml)
-                        clean_target = _normalize(assert_text)
+                            clean_joined = _normalize(joined_text)
+                            clean_xml = _normalize(raw_xml)
+                            clean_target = _normalize(assert_text)
                         
-                        if clean_target in clean_joined or clean_target in clean_xml:
-                            logger.info(f"Fuzzy Assertion Passed (matched after space normalization).")
-                        else:
-                            return {"success": False, "error": f"Assertion Failed: Expected text '{assert_text}' not found on screen."}
-                except Exception as e:
-                    logger.error(f"Assertion execution crashed: {e}")
-                    return {"success": False, "error": f"Assertion Framework Error: {str(e)}"}
-                    return {"success": False, "error": f"Assertion execution failed: {e}"}
+                            if clean_target in clean_joined or clean_target in clean_xml:
+                                logger.info(f"Fuzzy Assertion Passed (matched after space normalization).")
+                            else:
+                                return {"success": False, "error": f"Assertion Failed: Expected text '{assert_text}' not found on screen."}
+                    except Exception as e:
+                        logger.error(f"Assertion execution crashed: {e}")
+                        return {"success": False, "error": f"Assertion Framework Error: {str(e)}"}
+                        return {"success": False, "error": f"Assertion execution failed: {e}"}
 
             logger.info(f"Step {action} executed successfully.")
             return {"success": True, "error": None}
@@ -1278,3 +1347,7 @@ class AppStepRunner:
     #         return False
 
 app_step_runner = AppStepRunner()
+
+APPIUM_SESSIONS.set_function(
+    lambda: sum(1 for runner in list(AppStepRunner._instances) if runner.driver), component="app_runner"
+)
@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Use system temp directory to avoid triggering Uvicorn reloads
+RUNS_DIR = Path(tempfile.gettempdir()) / "qone_runs"
+RUNS_DIR.mkdir(exist_ok=True)
+
+META_FILE = ".artifact.json"
+# Run files a history record still points at (trace waterfall, final frame); kept in the blob store
+HISTORY_ARTIFACTS = ("trace.jsonl", "latest.jpg")
+
+ARTIFACT_BYTES = registry.gauge("qone_run_artifacts_bytes", "Disk used by run directories at the last GC")
+ARTIFACT_RUNS = registry.gauge("qone_run_artifacts_runs", "Run directories at the last GC")
+ARTIFACTS_EVICTED = registry.counter(
+    "qone_run_artifacts_evicted_total", "Run directories deleted by the artifact GC", ("reason",)
+)
+ARTIFACTS_ARCHIVED = registry.counter(
+    "qone_run_artifacts_archived_total", "Run files archived into the blob store before eviction"
+)
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactManager:
+    """
+    Lifecycle of RUNS_DIR/<run_id> directories (scripts, conftest, logs, frames, exit codes,
+    traces). Each run directory carries a small metadata file with its trigger, when it
+    finished and the history record it belongs to.
+
+    The GC (scheduler maintenance job) deletes finished runs once they are older than the
+    retention for their trigger, then evicts least recently used runs while RUNS_DIR is over
+    ARTIFACT_QUOTA_MB. Files a history record still needs are archived into the blob store
+    first and remain readable through read_bytes(). Stale web inspector frames are removed too.
+    """
+
+    def __init__(self, root: Path = RUNS_DIR):
+        self.root = root
+
+    @property
+    def archive_dir(self) -> Path:
+        return Path(settings.BLOB_STORE_DIR) / "runs"
+
+    # --- Run metadata -------------------------------------------------------------------
+
+    def _read_meta(self, run_dir: Path) -> Dict[str, Any]:
+        try:
+            return json.loads((run_dir / META_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _update_meta(self, run_id: str, **fields) -> None:
+        run_dir = self.root / run_id
+        if not run_dir.is_dir():
+            return
+        meta = self._read_meta(run_dir)
+        meta.update(fields)
+        tmp_path = run_dir / f"{META_FILE}.tmp"
+        try:
+            tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(tmp_path, run_dir / META_FILE)
+        except OSError as e:
+            logger.warning(f"ArtifactManager: failed to update metadata of run {run_id}: {e}")
+
+    def create_run_dir(self, run_id: str, trigger: str) -> Path:
+        run_dir = self.root / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        self._update_meta(run_id, trigger=trigger or "manual", created_at=now, last_used=now)
+        return run_dir
+
+    def finish(self, run_id: str) -> None:
+        now = time.time()
+        self._update_meta(run_id, finished_at=now, last_used=now)
+
+    def link_history(self, run_id: str, history_id: str) -> None:
+        self._update_meta(run_id, history_id=history_id)
+
+    def touch(self, run_id: str) -> None:
+        """Marks a run as recently used (viewed, streamed) for LRU eviction."""
+        self._update_meta(run_id, last_used=time.time())
+
+    # --- Reading, including archived files ---------------------------------------------
+
+    def _manifest_path(self, run_id: str) -> Path:
+        return self.archive_dir / f"{run_id}.json"
+
+    def read_bytes(self, run_id: str, name: str) -> Optional[bytes]:
+        """A run file from the run directory or, once evicted, from the blob store archive."""
+        path = self.root / run_id / name
+        if path.exists():
+            return path.read_bytes()
+        try:
+            manifest = json.loads(self._manifest_path(run_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        from app.services.blob_store import blob_store
+        key = manifest.get("files", {}).get(name)
+        return blob_store.get(key) if key else None
+
+    def _archive(self, run_id: str, run_dir: Path, meta: Dict[str, Any]) -> None:
+        from app.services.blob_store import blob_store
+        files = {}
+        for name in HISTORY_ARTIFACTS:
+            path = run_dir / name
+            if path.is_file():
+                files[name] = blob_store.put(path.read_bytes())
+        if not files:
+            return
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "run_id": run_id,
+            "history_id": meta.get("history_id"),
+            "trigger": meta.get("trigger"),
+            "archived_at": time.time(),
+            "files": files,
+        }
+        self._manifest_path(run_id).write_text(json.dumps(manifest), encoding="utf-8")
+        ARTIFACTS_ARCHIVED.inc(len(files))
+
+    # --- GC -----------------------------------------------------------------------------
+
+    def _active_runs(self) -> Set[str]:
+        from app.services.runner import runner_service
+        return runner_service.active_run_ids()
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        runs = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            run_dir = Path(entry.path)
+            meta = self._read_meta(run_dir)
+            mtime = entry.stat().st_mtime
+            finished_at = meta.get("finished_at")
+            if finished_at is None and (run_dir / "exit_code.txt").exists():
+                # Runs from before the metadata file existed, or finished without finish()
+                finished_at = (run_dir / "exit_code.txt").stat().st_mtime
+            runs.append({
+                "run_id": entry.name,
+                "dir": run_dir,
+                "meta": meta,
+                "trigger": meta.get("trigger", "unknown"),
+                "finished_at": finished_at,
+                "last_used": max(meta.get("last_used", 0), finished_at or 0, mtime),
+                "bytes": _dir_size(run_dir),
+            })
+        return runs
+
+    def _retention_seconds(self, trigger: str) -> float:
+        hours = settings.ARTIFACT_RETENTION_HOURS
+        return hours.get(trigger, hours.get("default", 72)) * 3600
+
+    def _evict(self, run: Dict[str, Any], reason: str) -> bool:
+        try:
+            if run["meta"].get("history_id"):
+                self._archive(run["run_id"], run["dir"], run["meta"])
+            shutil.rmtree(run["dir"])
+        except OSError as e:
+            logger.warning(f"ArtifactManager: failed to evict run {run['run_id']}: {e}")
+            return False
+        ARTIFACTS_EVICTED.inc(reason=reason)
+        return True
+
+    def collect(self) -> Dict[str, Any]:
+        """One GC pass over RUNS_DIR and the web inspector frame directory."""
+        started = time.time()
+        active = self._active_runs()
+        evicted = {"retention": 0, "stale": 0, "quota": 0}
+        kept = []
+
+        for run in self._scan():
+            if run["run_id"] in active:
+                kept.append(run)
+                continue
+            if run["finished_at"] is None:
+                # Unfinished: still running, or crashed without writing anything final
+                if started - run["last_used"] > settings.ARTIFACT_STALE_HOURS * 3600:
+                    evicted["stale"] += self._evict(run, "stale")
+                else:
+                    kept.append(run)
+                continue
+            if started - run["last_used"] > self._retention_seconds(run["trigger"]):
+                evicted["retention"] += self._evict(run, "retention")
+            else:
+                kept.append(run)
+
+        quota = settings.ARTIFACT_QUOTA_MB * 1024 * 1024
+        total = sum(run["bytes"] for run in kept)
+        if quota and total > quota:
+            candidates = sorted(
+                (run for run in kept if run["run_id"] not in active and run["finished_at"] is not None),
+                key=lambda run: run["last_used"],
+            )
+            for run in candidates:
+                if total <= quota:
+                    break
+                if self._evict(run, "quota"):
+                    evicted["quota"] += 1
+                    total -= run["bytes"]
+                    kept.remove(run)
+
+        frames_removed = self._collect_screencast_frames(started)
+
+        ARTIFACT_BYTES.set(total)
+        ARTIFACT_RUNS.set(len(kept))
+        result = {
+            "runs": len(kept),
+            "bytes": total,
+            "evicted": evicted,
+            "frames_removed": frames_removed,
+            "seconds": round(time.time() - started, 2),
+        }
+        if any(evicted.values()) or frames_removed:
+            logger.info(f"ArtifactManager: GC {result}")
+        return result
+
+    def _collect_screencast_frames(self, now: float) -> int:
+        from app.services.web_inspector import SCREENCAST_DIR
+        removed = 0
+        max_age = settings.ARTIFACT_SCREENCAST_RETENTION_HOURS * 3600
+        # The live inspector frame is rewritten continuously, so its mtime stays fresh
+        for entry in os.scandir(SCREENCAST_DIR):
+            try:
+                if entry.is_file(follow_symlinks=False) and now - entry.stat().st_mtime > max_age:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def run_gc(self) -> None:
+        """Scheduler entry point; never raises."""
+        try:
+            self.collect()
+        except Exception as e:
+            logger.error(f"ArtifactManager: GC failed: {e}")
+
+artifact_manager = ArtifactManager()
@@ -10,6 +10,7 @@ import json
 from google import genai
 from google.genai import types
 from app.core.config import settings
+from app.services.telemetry import generate_content
 
 class AssetManager:
     def convert_session_to_script(self, db: Session, ai_session: AiExplorationSession, project_id: str, platform: str = "WEB", capture_screenshots: bool = False, category: str = "Common"):
@@ -356,7 +357,8 @@ class AssetManager:
         """
 
         try:
-            response = client.models.generate_content(
+            response = generate_content(
+                client, "asset_manager.determine_category",
                 model=settings.GEMINI_MODEL,
                 contents=prompt,
                 config=types.GenerateContentConfig(
@@ -0,0 +1,148 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Step dict keys that may carry an inline base64 screenshot
+SCREENSHOT_KEYS = ("screenshot_data", "screenshot")
+
+
+class BlobStore:
+    """
+    Content-addressed blob store on the local filesystem.
+
+    Blobs are keyed by the sha256 of their bytes and laid out as
+    `<root>/ab/cd/abcd...` so identical screenshots are stored once and a key
+    never changes meaning (safe to cache forever).
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Optional[Path]:
+        if not key or not _SHA256_RE.match(key):
+            return None
+        return self.root / key[:2] / key[2:4] / key
+
+    def exists(self, key: str) -> bool:
+        path = self.path_for(key)
+        return bool(path and path.exists())
+
+    def put(self, data: bytes) -> str:
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path_for(key)
+        if path.exists():
+            return key
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def put_b64(self, data_b64: Optional[str]) -> Optional[str]:
+        """Stores a base64 (optionally data-URL) payload, returning its key or None."""
+        if not data_b64 or not isinstance(data_b64, str):
+            return None
+        if data_b64.startswith("data:") and "," in data_b64:
+            data_b64 = data_b64.split(",", 1)[1]
+        try:
+            raw = base64.b64decode(data_b64, validate=False)
+        except (binascii.Error, ValueError):
+            logger.warning("BlobStore: skipping payload that is not valid base64")
+            return None
+        if not raw:
+            return None
+        return self.put(raw)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        if not path or not path.exists():
+            return None
+        return path.read_bytes()
+
+    def get_b64(self, key: Optional[str]) -> Optional[str]:
+        data = self.get(key) if key else None
+        return base64.b64encode(data).decode("utf-8") if data else None
+
+    def externalize_step(self, step: Any) -> Any:
+        """
+        Moves the inline screenshot of a step dict into the store, leaving only
+        `screenshot_hash`. Non-dict steps and steps without screenshots are returned as-is.
+        """
+        if not isinstance(step, dict):
+            return step
+        if not any(isinstance(step.get(k), str) and step.get(k) for k in SCREENSHOT_KEYS):
+            return step
+
+        step = dict(step)
+        for k in SCREENSHOT_KEYS:
+            value = step.get(k)
+            if isinstance(value, str) and value:
+                key = self.put_b64(value)
+                if key:
+                    step["screenshot_hash"] = key
+                    step[k] = None
+        return step
+
+    def externalize_steps(self, steps: Optional[List[Any]]) -> Optional[List[Any]]:
+        """Returns a copy of `steps` with screenshots replaced by blob keys."""
+        if not steps:
+            return steps
+        return [self.externalize_step(s) for s in steps]
+
+    def inline_screenshot(self, step: Dict[str, Any]) -> Optional[str]:
+        """Base64 screenshot of a step, whether still inline or already externalized."""
+        return step.get("screenshot_data") or self.get_b64(step.get("screenshot_hash"))
+
+    def _signature(self, key: str, expires: int) -> str:
+        secret = hmac.new(settings.SECRET_KEY.encode("utf-8"), b"blob-url", hashlib.sha256).digest()
+        return hmac.new(secret, f"{key}:{expires}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def signed_url(self, key: str) -> str:
+        """
+        `/blobs/{key}?expires=..&sig=..` (relative to the API root) usable directly as an
+        <img> src. Expiry is rounded to a window so the URL, and the browser cache, stay
+        stable across requests.
+        """
+        ttl = settings.BLOB_URL_EXPIRE_SECONDS
+        expires = (int(time.time()) // ttl + 2) * ttl
+        return f"/blobs/{key}?expires={expires}&sig={self._signature(key, expires)}"
+
+    def verify_signature(self, key: str, expires: int, sig: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, expires), sig or "")
+
+    def sign_steps(self, steps: Optional[List[Any]]) -> Optional[List[Any]]:
+        """Returns a copy of `steps` where externalized screenshots also carry `screenshot_url`."""
+        if not steps:
+            return steps
+        return [
+            {**s, "screenshot_url": self.signed_url(s["screenshot_hash"])}
+            if isinstance(s, dict) and s.get("screenshot_hash") else s
+            for s in steps
+        ]
+
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR)
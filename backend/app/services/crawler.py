@@ -1,47 +1,48 @@
 
 import base64
 import re
-import sys
 import asyncio
-import threading
 from typing import Dict, Any, Optional
-from playwright.async_api import async_playwright, Page, Browser, Playwright
+from playwright.async_api import Page
 from bs4 import BeautifulSoup
 
+from app.services.playwright_runtime import playwright_runtime
+from app.services.telemetry import BROWSER_SESSIONS
+
+# Post-action settle caps (milliseconds). Settling returns as soon as the page is quiet;
+# the caps only bound how long we wait on pages that never go idle (polling, animations).
+SETTLE_MAX_MS = 5000
+SETTLE_NETWORK_IDLE_MS = 3000
+SETTLE_DOM_QUIET_MS = 300
+
+# Resolves once no DOM mutation has been observed for `quietMs`, or after `maxMs` at most.
+DOM_QUIESCENCE_SCRIPT = """
+({ quietMs, maxMs }) => new Promise(resolve => {
+    let quietTimer = null;
+    let capTimer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    const finish = (quiet) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(capTimer);
+        resolve(quiet);
+    };
+    observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    capTimer = setTimeout(() => finish(false), maxMs);
+})
+"""
+
 class CrawlerService:
     # Singleton-like storage for sessions
-    # Dictionary structure: { "session_id": { "browser": Browser, "page": Page, "playwright": Playwright } }
+    # Dictionary structure: { "session_id": { "context": BrowserContext, "page": Page } }
     _sessions: Dict[str, Dict[str, Any]] = {}
 
-    def __init__(self):
-        self._bg_thread = None
-        self._bg_loop = None
-        self._loop_ready = threading.Event()
-
-    def _start_background_loop(self):
-        """Runs in a dedicated background thread to handle Playwright on Windows."""
-        try:
-            if sys.platform == 'win32':
-                asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-            
-            self._bg_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._bg_loop)
-            self._loop_ready.set()
-            self._bg_loop.run_forever()
-        except:
-            pass
-
-    def _ensure_background_thread(self):
-        if self._bg_thread is None or not self._bg_thread.is_alive():
-            self._loop_ready.clear()
-            self._bg_thread = threading.Thread(target=self._start_background_loop, daemon=True, name="CrawlerThread")
-            self._bg_thread.start()
-            self._loop_ready.wait()
-
     def _run_in_bg(self, coro):
-        self._ensure_background_thread()
-        future = asyncio.run_coroutine_threadsafe(coro, self._bg_loop)
-        return asyncio.wrap_future(future)
+        return playwright_runtime.submit(coro)
 
     def _ensure_session(self, session_id: str):
         if session_id not in self._sessions:
@@ -102,10 +103,8 @@ class CrawlerService:
             except:
                 pass
 
-        p = await async_playwright().start()
-        # Launch with configured headless mode
-        browser = await p.chromium.launch(headless=headless)
-        context = await browser.new_context(viewport={"width": 1280, "height": 800})
+        # Isolated context on the shared browser for the configured headless mode
+        context = await playwright_runtime.new_context(headless=headless, owner="crawler", viewport={"width": 1280, "height": 800})
         page = await context.new_page()
 
         try:
@@ -115,8 +114,6 @@ class CrawlerService:
             # Continue anyway, page might be partially loaded
 
         self._sessions[session_id] = {
-            "playwright": p,
-            "browser": browser,
             "context": context,
             "page": page
         }
@@ -193,19 +190,70 @@ class CrawlerService:
                 await page.evaluate("window.scrollBy(0, 500)")
 
             elif action_type == "wait":
-                 await page.wait_for_timeout(2000)
+                 # An explicit wait means "let the page finish loading": settle with a longer cap
+                 await self._wait_for_settle(page, max_ms=SETTLE_MAX_MS * 2)
                  
             elif action_type == "navigate":
                  await page.goto(value)
                  
-            # Wait a bit for UI update
-            await page.wait_for_timeout(1000)
+            # Wait for the UI update (the action may have opened a new tab)
+            await self._wait_for_settle(await self._get_active_page(session_id))
 
         except Exception as e:
              return {"error": str(e), **await self._get_state_impl(session_id)}
 
         return await self._get_state_impl(session_id)
 
+    async def wait_for_settle(self, session_id: str, max_ms: int = SETTLE_MAX_MS) -> bool:
+        """
+        Waits until the active page is idle (network idle + DOM quiescence), bounded by max_ms.
+        """
+        return await self._run_in_bg(self._wait_for_settle_impl(session_id, max_ms))
+
+    async def _wait_for_settle_impl(self, session_id: str, max_ms: int = SETTLE_MAX_MS) -> bool:
+        page = await self._get_active_page(session_id)
+        return await self._wait_for_settle(page, max_ms)
+
+    async def _wait_for_settle(self, page: Page, max_ms: int = SETTLE_MAX_MS) -> bool:
+        """
+        Returns True if the page went quiet within max_ms, False if the cap was hit.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_ms / 1000
+
+        def _remaining_ms() -> int:
+            return max(int((deadline - loop.time()) * 1000), 0)
+
+        try:
+            # A popup or a click that triggers navigation may still be sitting on about:blank
+            if page.url == "about:blank":
+                await page.wait_for_url(lambda u: u != "about:blank", timeout=_remaining_ms() or 1)
+        except Exception:
+            pass
+
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=_remaining_ms() or 1)
+            await page.wait_for_load_state("networkidle", timeout=min(SETTLE_NETWORK_IDLE_MS, _remaining_ms()) or 1)
+        except Exception:
+            # Long-polling / streaming pages never reach network idle; fall through to DOM quiescence
+            pass
+
+        for _ in range(2):
+            remaining = _remaining_ms()
+            if remaining <= 0:
+                return False
+            try:
+                return await page.evaluate(DOM_QUIESCENCE_SCRIPT, {"quietMs": SETTLE_DOM_QUIET_MS, "maxMs": remaining})
+            except Exception as e:
+                # The execution context is destroyed when a navigation starts mid-evaluation
+                if "context was destroyed" not in str(e) and "navigat" not in str(e):
+                    return False
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=_remaining_ms() or 1)
+                except Exception:
+                    return False
+        return False
+
     async def get_state(self, session_id: str) -> Dict[str, Any]:
         """
         Returns the current state (Title, URL, Clean HTML, Screenshot).
@@ -214,32 +262,36 @@ class CrawlerService:
 
     async def _get_state_impl(self, session_id: str) -> Dict[str, Any]:
         page = await self._get_active_page(session_id)
-        
-        # Screenshot
-        try:
-            screenshot_bytes = await page.screenshot(type='jpeg', quality=60)
-            screenshot_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-        except:
-            screenshot_b64 = ""
 
-        # DOM
-        try:
-            content = await page.content()
-            clean_html = self._clean_dom(content)
-        except:
-            clean_html = "<html>Error capturing DOM</html>"
+        async def _screenshot() -> str:
+            try:
+                screenshot_bytes = await page.screenshot(type='jpeg', quality=60)
+                return base64.b64encode(screenshot_bytes).decode('utf-8')
+            except:
+                return ""
 
-        # Title and URL (Safe extraction in case target closed)
-        try:
-            page_title = await page.title()
-            page_url = page.url
-        except Exception as e:
-            if "Target closed" in str(e) or "has been closed" in str(e):
-                page_title = "Browser Closed"
-                page_url = "about:blank"
-            else:
-                page_title = "Error reading title"
-                page_url = "Error reading url"
+        async def _dom() -> str:
+            try:
+                content = await page.content()
+                # BeautifulSoup is CPU bound; keep it off the shared Playwright loop
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, self._clean_dom, content)
+            except:
+                return "<html>Error capturing DOM</html>"
+
+        async def _title_and_url():
+            # Safe extraction in case target closed
+            try:
+                return await page.title(), page.url
+            except Exception as e:
+                if "Target closed" in str(e) or "has been closed" in str(e):
+                    return "Browser Closed", "about:blank"
+                return "Error reading title", "Error reading url"
+
+        # Screenshot, DOM and title are independent CDP round-trips; capture them concurrently
+        screenshot_b64, clean_html, (page_title, page_url) = await asyncio.gather(
+            _screenshot(), _dom(), _title_and_url()
+        )
 
         return {
             "title": page_title,
@@ -286,17 +338,16 @@ class CrawlerService:
             pass
 
     async def close_session(self, session_id: str):
-        if self._bg_thread and self._bg_thread.is_alive():
+        if session_id in self._sessions:
             await self._run_in_bg(self._close_session_impl(session_id))
 
     async def _close_session_impl(self, session_id: str):
         if session_id in self._sessions:
             session = self._sessions[session_id]
             try:
-                await session["browser"].close()
-                await session["playwright"].stop()
+                await session["context"].close()
             except Exception as e:
-                # Browser might be already closed or process dead
+                # Context might be already closed or the browser process dead
                 print(f"Warning during session close: {e}")
             finally:
                 del self._sessions[session_id]
@@ -313,3 +364,6 @@ class CrawlerService:
              return state
         finally:
              await self.close_session(session_id)
+
+# Crawler sessions (exploration, web AI fallback) share the class-level session map
+BROWSER_SESSIONS.set_function(lambda: len(CrawlerService._sessions), component="crawler")
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.test import TestHistory
+from app.services.ai_analysis_service import ai_analysis_service
+from app.services.progress_tracker import screenshot_hash
+
+logger = logging.getLogger(__name__)
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+_UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE)
+_HEX_RE = re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b", re.IGNORECASE)
+_NUM_RE = re.compile(r"\d+(\.\d+)?")
+
+
+def normalize_error(message: Optional[str]) -> str:
+    """Removes run-specific noise (ids, numbers, timings, colors) from an error message."""
+    if not message:
+        return ""
+    text = _ANSI_RE.sub("", message)
+    text = _UUID_RE.sub("<id>", text)
+    text = _HEX_RE.sub("<hex>", text)
+    text = _NUM_RE.sub("#", text)
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text[:300]
+
+
+def _last_error_line(logs: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+    """For pytest based runs the meaningful error is the last error-level log line."""
+    for entry in reversed(logs or []):
+        msg = entry.get("msg") or ""
+        if entry.get("type") == "error" or msg.lstrip().startswith("E "):
+            lines = [l for l in msg.splitlines() if l.strip()]
+            if lines:
+                return lines[-1]
+    return None
+
+
+def build_failure_signature(
+    failure_reason: Optional[str],
+    step_results: Optional[List[Dict[str, Any]]] = None,
+    logs: Optional[List[Dict[str, Any]]] = None,
+    url: Optional[str] = None,
+    screenshot_b64: Optional[str] = None
+) -> str:
+    """
+    Signature of a failure: normalized error, failing action/selector, URL and screenshot hash.
+    Runs failing for the same root cause (e.g. one backend outage) share a signature.
+    """
+    failed_step = next((s for s in reversed(step_results or []) if s.get("status") == "failed"), None)
+    action, selector = "", ""
+    error = failure_reason
+    if failed_step:
+        meta = failed_step.get("metadata") or {}
+        action = str(meta.get("action") or "").lower()
+        selector = str(meta.get("target") or "")
+        error = failed_step.get("error_message") or failure_reason
+    elif logs:
+        error = _last_error_line(logs) or failure_reason
+
+    page_url = (url or "").split("#")[0].split("?")[0]
+    parts = [normalize_error(error), action, selector, page_url, screenshot_hash(screenshot_b64)]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+class FailureClusterService:
+    """
+    Runs AI failure analysis once per unique failure signature.
+
+    Concurrent failures with the same signature wait on a single in-flight analysis,
+    and later failures reuse the analysis stored on a matching TestHistory row within
+    FAILURE_ANALYSIS_REUSE_MINUTES.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _find_recent_analysis(self, db: Session, signature: str) -> Optional[TestHistory]:
+        since = datetime.now(timezone.utc) - timedelta(minutes=settings.FAILURE_ANALYSIS_REUSE_MINUTES)
+        candidates = db.query(TestHistory).filter(
+            TestHistory.failure_signature == signature,
+            TestHistory.failure_analysis.isnot(None),
+            TestHistory.run_date >= since
+        ).order_by(TestHistory.run_date.desc()).limit(5).all()
+        # Do not propagate analyses that themselves failed (missing key, API errors)
+        return next((h for h in candidates if (h.failure_analysis or {}).get("confidence")), None)
+
+    async def analyze(self, db: Session, signature: str, **analyze_kwargs) -> Dict[str, Any]:
+        """
+        Returns the failure analysis for `signature`, calling the LLM only if no
+        matching analysis exists yet. `analyze_kwargs` go to AIAnalysisService.analyze_failure.
+        """
+        in_flight = self._in_flight.get(signature)
+        if in_flight:
+            analysis = await asyncio.shield(in_flight)
+            return {**analysis, "reused": True}
+
+        recent = self._find_recent_analysis(db, signature)
+        if recent:
+            logger.info(f"Reusing failure analysis of {recent.id} for signature {signature}")
+            return {**recent.failure_analysis, "signature": signature, "reused": True, "reused_from": recent.id}
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[signature] = future
+        try:
+            analysis = await ai_analysis_service.analyze_failure(**analyze_kwargs)
+            analysis = {**analysis, "signature": signature}
+            future.set_result(analysis)
+            return analysis
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Nobody may be waiting; mark the exception as retrieved
+            raise
+        finally:
+            self._in_flight.pop(signature, None)
+
+    def list_clusters(
+        self,
+        db: Session,
+        project_id: str,
+        run_id: Optional[str] = None,
+        schedule_id: Optional[str] = None,
+        hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Distinct failures (one entry per signature) within a batch / time window."""
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        filters = [
+            TestHistory.project_id == project_id,
+            TestHistory.status == "failed",
+            TestHistory.failure_signature.isnot(None),
+            TestHistory.run_date >= since
+        ]
+        if run_id:
+            filters.append(TestHistory.run_id == run_id)
+        if schedule_id:
+            filters.append(TestHistory.schedule_id == schedule_id)
+
+        # One query for every member; grouped here instead of a query per signature
+        rows = db.query(
+            TestHistory.failure_signature, TestHistory.id, TestHistory.script_id, TestHistory.script_name,
+            TestHistory.failure_reason, TestHistory.failure_analysis, TestHistory.run_date
+        ).filter(*filters).order_by(TestHistory.run_date.desc()).all()
+
+        members_by_signature: Dict[str, List[Any]] = {}
+        for row in rows:
+            members_by_signature.setdefault(row.failure_signature, []).append(row)
+
+        clusters = []
+        for signature, members in members_by_signature.items():
+            # Members are newest first
+            analysis = next((m.failure_analysis for m in members if m.failure_analysis), None)
+            clusters.append({
+                "signature": signature,
+                "count": len(members),
+                "first_seen": members[-1].run_date,
+                "last_seen": members[0].run_date,
+                "failure_reason": members[0].failure_reason,
+                "failure_analysis": analysis,
+                "history_ids": [m.id for m in members],
+                "scripts": sorted({m.script_name or m.script_id for m in members if m.script_id})
+            })
+        clusters.sort(key=lambda c: c["count"], reverse=True)
+        return clusters
+
+failure_cluster_service = FailureClusterService()
@@ -9,16 +9,38 @@ from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.services.crawler import CrawlerService
-from app.services.app_runner import app_step_runner
+from app.services.app_executor import async_app_step_runner
 from app.services.device_service import device_service
+from app.services.progress_tracker import ProgressTracker, fingerprint_state, NO_PROGRESS, STUCK
+from app.core.tracing import span
+from app.services.telemetry import FALLBACK_SECONDS, generate_content
 
 logger = logging.getLogger(__name__)
 
+# Actions that never touch the UI. The state captured while the LLM is still deciding
+# remains valid after them, so it can be reused as the next step's state.
+SCREEN_PRESERVING_ACTIONS = {"finish", "find", "verify exists", "assert"}
+
 class FallbackService:
     def __init__(self):
         self.crawler_service = CrawlerService()
 
-    async def run_ai_fallback(
+    async def run_ai_fallback(self, platform: str, goal: str, **kwargs) -> List[Dict[str, Any]]:
+        """Runs the fallback loop (see _run_ai_fallback) and records its duration and outcome."""
+        started = time.perf_counter()
+        outcome = "error"
+        with span("ai.fallback", platform=(platform or "").upper()) as fallback_span:
+            try:
+                history = await self._run_ai_fallback(platform, goal, **kwargs)
+                outcome = "completed" if any(s.get("status") == "Completed" for s in history) else "failed"
+                fallback_span.set_attribute("steps", len(history))
+                fallback_span.set_status(outcome == "completed")
+                return history
+            finally:
+                fallback_span.set_attribute("outcome", outcome)
+                FALLBACK_SECONDS.observe(time.perf_counter() - started, platform=(platform or "").upper(), outcome=outcome)
+
+    async def _run_ai_fallback(
         self, 
         platform: str, 
         goal: str, 
@@ -45,7 +67,7 @@ class FallbackService:
             if platform.upper() == "APP":
                 # For APP, we assume the runner already has a driver if it failed,
                 # but if we need a fresh session or different config, we start it.
-                if not app_step_runner.driver:
+                if not async_app_step_runner.driver:
                     target_device = device_id
                     if not target_device:
                         connected = device_service.get_connected_devices()
@@ -60,13 +82,13 @@ class FallbackService:
                         "noReset": True,
                         "dontStopAppOnReset": True
                     }
-                    success, err = app_step_runner.start_session(caps)
+                    success, err = await async_app_step_runner.start_session(caps)
                     if not success:
                         return [{"thought": f"Failed to start Appium session: {err}", "status": "Failed"}]
                 
                 # Activate app just in case
                 if app_package:
-                    try: app_step_runner.driver.activate_app(app_package)
+                    try: await async_app_step_runner.activate_app(app_package)
                     except: pass
             else:
                 # For WEB, we always start a fresh session for goal-based exploration (Headless for performance)
@@ -76,26 +98,46 @@ class FallbackService:
             return [{"thought": f"Session initialization failed: {str(e)}", "status": "Failed"}]
 
         # 2. Loop until Completion
+        prefetched_state = None
+        # Set after a screen-preserving action (find / verify / assert): the unchanged
+        # screen that follows is expected, not a stall
+        after_screen_preserving = False
+        progress = ProgressTracker()
         for i in range(1, max_steps + 1):
-            # A. Get Current State
+            # A. Get Current State (reuse the speculative capture when it is still valid)
             try:
-                if platform.upper() == "APP":
-                    xml_structure = app_step_runner.get_clean_source()
-                    screenshot = app_step_runner.get_screenshot()
-                    title = f"App ({app_package})"
-                    url = "Native UI"
-                else:
-                    state = await self.crawler_service.get_state(session_id)
-                    xml_structure = state.get("html_structure", "")
-                    screenshot = state.get("screenshot", "")
-                    title = state.get("title", "")
-                    url = state.get("url", "")
+                state = prefetched_state or await self._capture_state(platform, session_id, app_package)
+                prefetched_state = None
+                xml_structure = state["html_structure"]
+                screenshot = state["screenshot"]
+                title = state["title"]
+                url = state["url"]
             except Exception as e:
                 logger.error(f"AI Fallback state capture error: {e}")
                 history.append({"thought": f"State capture error: {str(e)}", "status": "Failed"})
                 break
 
-            # B. Ask AI for next action
+            # Stop burning LLM calls and device time once the agent is going in circles.
+            # Only repeats following a screen-changing action count as stalls.
+            if after_screen_preserving:
+                verdict = {"status": None}
+            else:
+                verdict = progress.observe(fingerprint_state(xml_structure, url, screenshot))
+            after_screen_preserving = False
+            if verdict["status"] == STUCK:
+                logger.warning(f"AI Fallback aborted at step {i}: no progress ({verdict['reason']})")
+                history.append({
+                    "step_number": i,
+                    "thought": f"동일한 화면이 반복되어 진행이 없다고 판단했습니다 ({verdict['reason']}, {verdict['stall_count']}회).",
+                    "description": "진행 없음 감지 - 조기 종료",
+                    "action_type": "finish",
+                    "status": "Failed"
+                })
+                break
+            progress_hint = ProgressTracker.hint_for(verdict) if verdict["status"] == NO_PROGRESS else None
+
+            # B. Ask AI for next action, speculatively capturing the next state meanwhile
+            speculative_state = asyncio.create_task(self._capture_state(platform, session_id, app_package))
             decision = await self._get_ai_decision(
                 platform=platform,
                 goal=goal,
@@ -107,7 +149,8 @@ class FallbackService:
                 persona_context=persona_context,
                 credentials=credentials,
                 failure_analysis=failure_analysis,
-                original_steps=original_steps
+                original_steps=original_steps,
+                progress_hint=progress_hint
             )
             
             # Enrich decision with step number and state metadata
@@ -116,6 +159,11 @@ class FallbackService:
             
             logger.info(f"AI Step {i}: {decision.get('description')} ({decision.get('status')})")
             
+            action_type = (decision.get("action_type") or "wait").lower()
+            screen_preserved = decision.get("status") not in ("Completed", "Failed") and action_type in SCREEN_PRESERVING_ACTIONS
+            if not screen_preserved:
+                speculative_state.cancel()
+
             if decision.get("status") == "Completed":
                 logger.info(f"AI Fallback Goal Achieved at step {i}")
                 break
@@ -125,7 +173,6 @@ class FallbackService:
             
             # C. Execute Action
             try:
-                action_type = decision.get("action_type", "wait").lower()
                 target = decision.get("action_target", "")
                 value = decision.get("action_value", "")
                 
@@ -147,7 +194,7 @@ class FallbackService:
                         "selector_value": target,
                         "option": value
                     }
-                    action_res = app_step_runner.execute_step(step_dict)
+                    action_res = await async_app_step_runner.execute_step(step_dict)
                 else:
                     action_res = await self.crawler_service.perform_action(session_id, action_type, target, value)
                 
@@ -161,19 +208,25 @@ class FallbackService:
                 logger.error(f"AI Fallback execution error: {e}")
                 decision["observation"] = f"Execution Exception: {str(e)}"
                 decision["status"] = "Failed"
+                speculative_state.cancel()
                 break
                 
-            # D. Small stabilization wait
-            await asyncio.sleep(3) # Increased for stability
-
-            # E. For WEB: If we are still on about:blank and it's early steps, wait a bit more
-            if platform.upper() == "WEB" and i <= 3:
+            # D. Nothing changed on screen: the speculative capture is the next state
+            if screen_preserved:
+                after_screen_preserving = True
                 try:
-                    state = await self.crawler_service.get_state(session_id)
-                    if state.get("url") == "about:blank":
-                        logger.info(f"Step {i}: Still on about:blank, waiting additional 5s for page load...")
-                        await asyncio.sleep(5)
-                except: pass
+                    prefetched_state = await speculative_state
+                except Exception as e:
+                    logger.debug(f"Speculative state capture discarded: {e}")
+                continue
+
+            # E. Settle: wait on the app itself rather than a fixed sleep
+            if platform.upper() == "APP":
+                await async_app_step_runner.wait_for_ui_stable()
+            elif action_res and not action_res.get("error"):
+                # perform_action already waited for network idle / DOM quiescence and
+                # returned the settled state, so it doubles as the next step's state
+                prefetched_state = {k: action_res.get(k, "") for k in ("title", "url", "html_structure", "screenshot")}
 
         # 3. Cleanup
         if platform.upper() == "WEB":
@@ -182,6 +235,31 @@ class FallbackService:
             
         return history
 
+    async def _capture_state(self, platform: str, session_id: str, app_package: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Captures UI structure, screenshot and page identity concurrently.
+        Appium calls run on the device's executor (see app_executor), off the event loop.
+        """
+        if platform.upper() == "APP":
+            xml_structure, screenshot = await asyncio.gather(
+                async_app_step_runner.get_clean_source(),
+                async_app_step_runner.get_screenshot()
+            )
+            return {
+                "title": f"App ({app_package})",
+                "url": "Native UI",
+                "html_structure": xml_structure or "",
+                "screenshot": screenshot or ""
+            }
+
+        state = await self.crawler_service.get_state(session_id)
+        return {
+            "title": state.get("title", ""),
+            "url": state.get("url", ""),
+            "html_structure": state.get("html_structure", ""),
+            "screenshot": state.get("screenshot", "")
+        }
+
     async def _get_ai_decision(self, **kwargs) -> Dict[str, Any]:
         """Calls Gemini with vision and DOM context."""
         from google import genai
@@ -206,7 +284,8 @@ class FallbackService:
             )
 
         def _call_llm():
-            return client.models.generate_content(
+            return generate_content(
+                client, "fallback_service._get_ai_decision",
                 model=settings.GEMINI_MODEL,
                 contents=contents,
                 config=types.GenerateContentConfig(
@@ -233,7 +312,7 @@ class FallbackService:
                 "description": "AI 연동 실패"
             }
 
-    def _build_prompt(self, platform, goal, current_url, title, xml_structure, history, persona_context, credentials, failure_analysis=None, original_steps=None, **kwargs):
+    def _build_prompt(self, platform, goal, current_url, title, xml_structure, history, persona_context, credentials, failure_analysis=None, original_steps=None, progress_hint=None, **kwargs):
         history_summary = "\n".join([f"- Step {s.get('step_number')}: {s.get('description')} ({s.get('status')})" for s in history])
         
         analysis_context = ""
@@ -260,6 +339,7 @@ class FallbackService:
         
         Previous Steps (During Current Recovery):
         {history_summary if history else "Start of Recovery process."}
+        {progress_hint or ""}
         
         Simplified UI Structure (XML/HTML):
         {xml_structure}
@@ -0,0 +1,241 @@
+import gzip
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.test import SelfHealingLog, TestHistoryArchive
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError: # Optional: falls back to gzip
+    zstandard = None
+
+PARTITION_PREFIX = "testhistory_p"
+DEFAULT_PARTITION = "testhistory_default"
+_PARTITION_RE = re.compile(r"^testhistory_p(\d{4})(\d{2})$")
+
+# Rows copied into the archive per INSERT while draining a partition
+ARCHIVE_BATCH_ROWS = 500
+
+
+def month_start(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    years, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+class HistoryArchiveService:
+    """
+    Maintains the monthly range partitions of `testhistory`.
+
+    Upcoming partitions are created ahead of time (a DEFAULT partition catches anything
+    else), and partitions older than HISTORY_ARCHIVE_AFTER_MONTHS are drained into
+    `testhistoryarchive` as compressed JSON rows, then detached and dropped. The rows
+    keyed by history id without an FK go with them: log chunks and self-healing logs are
+    folded into the archived record and deleted, and scriptlatestresult entries are
+    repointed at the script's newest remaining run (or removed). Archived runs stay
+    readable through GET /history/{id} and its /logs.
+    """
+
+    codec = "zstd" if zstandard else "gzip"
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=6).compress(payload)
+        return gzip.compress(payload, compresslevel=6)
+
+    def _decompress(self, codec: str, data: bytes) -> bytes:
+        if codec == "zstd":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read zstd compressed archive rows")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def is_partitioned(self, db: Session) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        relkind = db.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('testhistory')")).scalar()
+        return relkind == "p"
+
+    def list_partitions(self, db: Session) -> List[Tuple[str, datetime]]:
+        """Monthly partitions (name, month start), oldest first. The DEFAULT partition is not listed."""
+        names = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('testhistory')"
+        )).scalars().all()
+        months = [(name, partition_month(name)) for name in names]
+        return sorted([(name, month) for name, month in months if month], key=lambda p: p[1])
+
+    def ensure_partitions(self, db: Session, months_ahead: Optional[int] = None) -> List[str]:
+        """Creates the partitions of the current month and the next `months_ahead`. Returns the new ones."""
+        if not self.is_partitioned(db):
+            return []
+        if months_ahead is None:
+            months_ahead = settings.HISTORY_PARTITION_MONTHS_AHEAD
+
+        existing = {name for name, _ in self.list_partitions(db)}
+        current = month_start(datetime.now(timezone.utc))
+        created = []
+        for i in range(months_ahead + 1):
+            month = add_months(current, i)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            try:
+                with db.begin_nested():
+                    db.execute(text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF testhistory '
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    ))
+                created.append(name)
+            except DBAPIError as e:
+                # Typically rows for this month already landed in the DEFAULT partition
+                logger.warning(f"HistoryArchive: could not create partition {name}: {e}")
+        db.commit()
+        if created:
+            logger.info(f"HistoryArchive: created partitions {', '.join(created)}")
+        return created
+
+    def archive_partitions(self, db: Session, older_than_months: Optional[int] = None) -> Dict[str, int]:
+        """
+        Moves every monthly partition that ended more than `older_than_months` ago into the
+        archive table. Returns {partition: archived rows}. One transaction per partition.
+        """
+        if older_than_months is None:
+            older_than_months = settings.HISTORY_ARCHIVE_AFTER_MONTHS
+        if older_than_months <= 0 or not self.is_partitioned(db):
+            return {}
+
+        cutoff = add_months(month_start(datetime.now(timezone.utc)), -older_than_months)
+        archived = {}
+        for name, month in self.list_partitions(db):
+            if month >= cutoff:
+                break
+            try:
+                archived[name] = self._archive_partition(db, name)
+                db.commit()
+                logger.info(f"HistoryArchive: archived {archived[name]} rows of {name}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"HistoryArchive: failed to archive {name}: {e}")
+        return archived
+
+    def _dependents(self, db: Session, history_ids: List[str]) -> Tuple[Dict[str, list], Dict[str, list]]:
+        """Chunked logs and self-healing logs of a batch of runs, by history id."""
+        from app.services.log_store import log_store
+
+        healing: Dict[str, list] = {}
+        for log in db.query(SelfHealingLog).filter(
+            SelfHealingLog.history_id.in_(history_ids)
+        ).order_by(SelfHealingLog.created_at):
+            healing.setdefault(log.history_id, []).append(
+                jsonable_encoder({c.name: getattr(log, c.name) for c in log.__table__.columns})
+            )
+        return log_store.read_many(db, history_ids), healing
+
+    def _archive_partition(self, db: Session, name: str) -> int:
+        """Moves one partition and its dependent rows into the archive. Caller commits (one transaction)."""
+        result = db.execute(text(f'SELECT * FROM "{name}"').execution_options(stream_results=True))
+        count = 0
+        for batch in result.mappings().partitions(ARCHIVE_BATCH_ROWS):
+            logs, healing = self._dependents(db, [row["id"] for row in batch])
+            rows = []
+            for row in batch:
+                record = jsonable_encoder(dict(row))
+                if row["id"] in logs:
+                    record["logs"] = logs[row["id"]]
+                record["healing_logs"] = healing.get(row["id"], [])
+                rows.append({
+                    "id": row["id"],
+                    "project_id": row["project_id"],
+                    "script_id": row["script_id"],
+                    "run_date": row["run_date"],
+                    "status": row["status"],
+                    "trigger": row["trigger"],
+                    "partition": name,
+                    "codec": self.codec,
+                    "data": self._compress(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+                })
+            # Re-running after a failed detach must not duplicate rows
+            db.execute(pg_insert(TestHistoryArchive).values(rows).on_conflict_do_nothing(index_elements=["id"]))
+            count += len(rows)
+
+        db.execute(text(f'ALTER TABLE testhistory DETACH PARTITION "{name}"'))
+
+        # Latest results of scripts whose newest run is being archived: newest remaining run
+        # (testhistory no longer includes the detached partition), otherwise none. Their
+        # projects' active defect counts follow from the latest results, so rebuild those
+        db.execute(text(
+            "UPDATE projectstats SET needs_rebuild = true WHERE project_id IN (SELECT project_id "
+            f'FROM scriptlatestresult WHERE history_id IN (SELECT id FROM "{name}"))'
+        ))
+        db.execute(text(
+            "UPDATE scriptlatestresult l SET history_id = h.id, project_id = h.project_id, status = h.status, "
+            "failure_reason = h.failure_reason, run_date = h.run_date, updated_at = now(), "
+            "healing_status = (SELECT s.status FROM selfhealinglog s WHERE s.history_id = h.id "
+            "ORDER BY s.created_at DESC LIMIT 1) "
+            "FROM (SELECT DISTINCT ON (script_id) id, script_id, project_id, status, failure_reason, run_date "
+            "FROM testhistory WHERE script_id IN (SELECT script_id FROM scriptlatestresult "
+            f'WHERE history_id IN (SELECT id FROM "{name}")) '
+            "ORDER BY script_id, run_date DESC) h "
+            f'WHERE l.script_id = h.script_id AND l.history_id IN (SELECT id FROM "{name}")'
+        ))
+        db.execute(text(f'DELETE FROM scriptlatestresult WHERE history_id IN (SELECT id FROM "{name}")'))
+        # Folded into the archived records above
+        db.execute(text(f'DELETE FROM historylogchunk WHERE history_id IN (SELECT id FROM "{name}")'))
+        db.execute(text(f'DELETE FROM selfhealinglog WHERE history_id IN (SELECT id FROM "{name}")'))
+
+        db.execute(text(f'DROP TABLE "{name}"'))
+        return count
+
+    def get_archived(self, db: Session, history_id: str) -> Optional[Dict[str, Any]]:
+        """Full TestHistory row (as a dict) of an archived run, or None."""
+        archived = db.query(TestHistoryArchive).filter(TestHistoryArchive.id == history_id).first()
+        if not archived:
+            return None
+        record = json.loads(self._decompress(archived.codec, archived.data).decode("utf-8"))
+        record["archived"] = True
+        return record
+
+    def run_maintenance(self) -> None:
+        """Scheduler entry point: create upcoming partitions, then archive expired ones."""
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            self.ensure_partitions(db)
+            self.archive_partitions(db)
+        except Exception as e:
+            logger.error(f"HistoryArchive: maintenance failed: {e}")
+        finally:
+            db.close()
+
+history_archive_service = HistoryArchiveService()
@@ -1,10 +1,17 @@
 import uuid
 import json
+import logging
 from datetime import datetime, timezone, timedelta
+from typing import Optional
+from sqlalchemy import update, func, cast, case, desc, Numeric
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.models.test import TestScript, TestHistory
+from app.models.test import TestScript, TestHistory, TestHistoryArchive, ScriptLatestResult, SelfHealingLog
 from app.models.ai import AiExplorationSession
 from app.core.config import settings
+from app.services.blob_store import blob_store
+
+logger = logging.getLogger(__name__)
 
 class HistoryService:
     SYSTEM_SCRIPT_NAME = "AI_AdHoc_Explorer"
@@ -33,6 +40,186 @@ class HistoryService:
             db.refresh(script)
         return script
 
+    def record_run(self, db: Session, history: TestHistory) -> None:
+        """
+        Applies a finished run to its script's running statistics and its project's
+        dashboard aggregates.
+
+        Call in the same transaction as the history insert (before commit). The script
+        UPDATE is computed from the row's current values, so concurrent finishes of the
+        same script don't overwrite each other and no history rows are scanned.
+        """
+        from app.services.project_stats import project_stats_service
+
+        stats = project_stats_service.lock(db, history.project_id)
+        if not history.script_id:
+            project_stats_service.apply_run(stats, history, None, None)
+            return
+
+        # Read after taking the project lock so the previous status is current
+        script = db.query(TestScript).filter(TestScript.id == history.script_id).first()
+        latest = db.query(ScriptLatestResult.status).filter(ScriptLatestResult.script_id == history.script_id).first()
+        project_stats_service.apply_run(stats, history, script, latest.status if latest else None)
+        if script:
+            history.script_origin = script.origin
+            history.script_category = script.category
+            self._set_latest_result(db, history)
+
+        passed = 1 if history.status == "passed" else 0
+        run_count = func.coalesce(TestScript.run_count, 0)
+        pass_count = func.coalesce(TestScript.pass_count, 0)
+        db.execute(
+            update(TestScript)
+            .where(TestScript.id == history.script_id)
+            .values(
+                run_count=run_count + 1,
+                pass_count=pass_count + passed,
+                fail_count=func.coalesce(TestScript.fail_count, 0) + (1 - passed),
+                success_rate=func.round(cast((pass_count + passed) * 100, Numeric) / (run_count + 1), 1),
+                recent_statuses=func.right(
+                    func.coalesce(TestScript.recent_statuses, "") + ("P" if passed else "F"),
+                    TestScript.RECENT_RUNS_WINDOW
+                ),
+                last_run=history.run_date or func.now()
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def sync_script_labels(self, db: Session, script: TestScript) -> None:
+        """Re-copies a script's origin/category onto its history rows after they change. Caller commits."""
+        db.execute(
+            update(TestHistory)
+            .where(
+                TestHistory.script_id == script.id,
+                (TestHistory.script_origin.is_distinct_from(script.origin))
+                | (TestHistory.script_category.is_distinct_from(script.category))
+            )
+            .values(script_origin=script.origin, script_category=script.category)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _set_latest_result(self, db: Session, history: TestHistory) -> None:
+        """Upserts the script's latest result; an older run finishing late never overwrites a newer one."""
+        values = {
+            "script_id": history.script_id,
+            "project_id": history.project_id,
+            "history_id": history.id,
+            "status": history.status,
+            "failure_reason": history.failure_reason,
+            "run_date": history.run_date or func.now(),
+            "healing_status": None
+        }
+        stmt = pg_insert(ScriptLatestResult).values(**values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ScriptLatestResult.script_id],
+            set_={k: stmt.excluded[k] for k in values if k != "script_id"} | {"updated_at": func.now()},
+            where=ScriptLatestResult.run_date <= stmt.excluded.run_date
+        ))
+
+    def set_healing_status(self, db: Session, history_id: str, status: str) -> None:
+        """Records self-healing progress on the latest result, if `history_id` is still the latest run."""
+        db.query(ScriptLatestResult).filter(ScriptLatestResult.history_id == history_id).update(
+            {ScriptLatestResult.healing_status: status}, synchronize_session=False
+        )
+
+    def rebuild_latest_results(self, db: Session, project_id: Optional[str] = None) -> int:
+        """Recomputes scriptlatestresult from TestHistory (backfill / repair). Caller commits."""
+        latest_query = db.query(
+            TestHistory.id, TestHistory.script_id, TestHistory.project_id, TestHistory.status,
+            TestHistory.failure_reason, TestHistory.run_date
+        ).join(TestScript, TestScript.id == TestHistory.script_id).distinct(TestHistory.script_id)
+        if project_id:
+            latest_query = latest_query.filter(TestHistory.project_id == project_id)
+        rows = latest_query.order_by(TestHistory.script_id, desc(TestHistory.run_date)).all()
+
+        stale = db.query(ScriptLatestResult)
+        if project_id:
+            stale = stale.filter(ScriptLatestResult.project_id == project_id)
+        stale.delete(synchronize_session=False)
+
+        healing = {}
+        history_ids = [r.id for r in rows]
+        if history_ids:
+            for log in db.query(SelfHealingLog.history_id, SelfHealingLog.status).filter(
+                SelfHealingLog.history_id.in_(history_ids)
+            ).order_by(SelfHealingLog.created_at).all():
+                healing[log.history_id] = log.status # Newest wins
+
+        for r in rows:
+            db.add(ScriptLatestResult(
+                script_id=r.script_id,
+                project_id=r.project_id,
+                history_id=r.id,
+                status=r.status,
+                failure_reason=r.failure_reason,
+                run_date=r.run_date,
+                healing_status=healing.get(r.id)
+            ))
+        db.flush()
+        return len(rows)
+
+    def rebuild_script_stats(self, db: Session, project_id: Optional[str] = None, script_id: Optional[str] = None) -> int:
+        """
+        Recomputes the running counters from TestHistory (backfill / drift repair).
+        Returns the number of scripts updated; the caller commits.
+        """
+        script_query = db.query(TestScript.id)
+        if project_id:
+            script_query = script_query.filter(TestScript.project_id == project_id)
+        if script_id:
+            script_query = script_query.filter(TestScript.id == script_id)
+        script_ids = [row.id for row in script_query.all()]
+        if not script_ids:
+            return 0
+
+        # Live and archived runs both count; {script_id: [runs, passed, last_run]}
+        totals = {}
+        for model in (TestHistory, TestHistoryArchive):
+            for row in db.query(
+                model.script_id,
+                func.count(model.id).label("runs"),
+                func.sum(case((model.status == "passed", 1), else_=0)).label("passed"),
+                func.max(model.run_date).label("last_run")
+            ).filter(model.script_id.in_(script_ids)).group_by(model.script_id).all():
+                runs, passed, last_run = totals.get(row.script_id, [0, 0, None])
+                if row.last_run and (last_run is None or row.last_run > last_run):
+                    last_run = row.last_run
+                totals[row.script_id] = [runs + row.runs, passed + int(row.passed or 0), last_run]
+
+        # Last N statuses per script in one query
+        ranked = db.query(
+            TestHistory.script_id,
+            TestHistory.status,
+            func.row_number().over(
+                partition_by=TestHistory.script_id,
+                order_by=TestHistory.run_date.desc()
+            ).label("rn")
+        ).filter(TestHistory.script_id.in_(script_ids)).subquery()
+        recent = {}
+        for row in db.query(ranked.c.script_id, ranked.c.status).filter(
+            ranked.c.rn <= TestScript.RECENT_RUNS_WINDOW
+        ).order_by(ranked.c.script_id, ranked.c.rn.desc()).all():
+            recent[row.script_id] = recent.get(row.script_id, "") + ("P" if row.status == "passed" else "F")
+
+        for sid in script_ids:
+            runs, passed, last_run = totals.get(sid, [0, 0, None])
+            values = {
+                "run_count": runs,
+                "pass_count": passed,
+                "fail_count": runs - passed,
+                "success_rate": round(passed / runs * 100, 1) if runs else 0.0,
+                "recent_statuses": recent.get(sid, "")
+            }
+            if last_run:
+                values["last_run"] = last_run
+            db.execute(
+                update(TestScript).where(TestScript.id == sid).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+
+        logger.info(f"Rebuilt run statistics for {len(script_ids)} scripts")
+        return len(script_ids)
+
     def save_ai_session(self, db: Session, session_data: dict, history_steps: list, final_status: str, project_id: str):
         """
         Saves the AI exploration session to DB.
@@ -59,6 +246,7 @@ class HistoryService:
             run_date=datetime.now(timezone(timedelta(hours=9)))
         )
         db.add(history_entry)
+        self.record_run(db, history_entry)
 
         # 3. Create AiExplorationSession (Details)
         # Calculate simple score average if available
@@ -74,7 +262,7 @@ class HistoryService:
             target_url=session_data.get("url"),
             goal=session_data.get("goal"),
             persona_id=session_data.get("persona_id"),
-            steps_data=history_steps, # Full JSON dump
+            steps_data=blob_store.externalize_steps(history_steps), # Screenshots live in the blob store
             final_score=final_score
         )
         db.add(ai_session)
@@ -0,0 +1,195 @@
+import gzip
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.test import HistoryLogChunk
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError: # Optional: falls back to gzip
+    zstandard = None
+
+# Lines per stored chunk; a page request decompresses at most a couple of chunks
+CHUNK_LINES = 500
+
+_ERROR_RE = re.compile(
+    r"^(E\s|FAILED\b|ERROR\b|Traceback \(most recent call last\))|"
+    r"\b(\d+ (failed|errors?))\b|\b(AssertionError|TimeoutError|Exception):",
+)
+_SUCCESS_RE = re.compile(r"^=+ .*\b\d+ passed\b(?!.*\b(failed|error))|\bPASSED\b")
+
+
+def classify_line(line: str, default: str = "info") -> str:
+    """Level of a single pytest/runner output line: error, success, cmd or `default`."""
+    stripped = line.strip()
+    if stripped.startswith("$ "):
+        return "cmd"
+    if _ERROR_RE.search(stripped):
+        return "error"
+    if _SUCCESS_RE.search(stripped):
+        return "success"
+    return default
+
+
+def split_output(text: Optional[str], default: str = "info") -> List[Dict[str, str]]:
+    """Splits raw process output into one classified log entry per non-empty line."""
+    if not text:
+        return []
+    return [
+        {"msg": line, "type": classify_line(line, default)}
+        for line in text.splitlines() if line.strip()
+    ]
+
+
+def _normalize(logs: Optional[List[Any]]) -> List[Dict[str, str]]:
+    """Accepts LogEntry dicts or pydantic models and splits multi-line messages."""
+    entries = []
+    for entry in logs or []:
+        if hasattr(entry, "model_dump"):
+            entry = entry.model_dump()
+        if not isinstance(entry, dict):
+            entry = {"msg": str(entry), "type": "info"}
+        msg = str(entry.get("msg") or "")
+        level = entry.get("type") or "info"
+        if "\n" in msg:
+            # Pre-split blobs keep their own level unless the line says otherwise
+            entries.extend({"msg": l, "type": classify_line(l, level)} for l in msg.splitlines() if l.strip())
+        else:
+            entries.append({"msg": msg, "type": level})
+    return entries
+
+
+class LogStore:
+    """
+    Stores TestHistory execution logs as compressed chunks in `historylogchunk`.
+
+    Each chunk records its first line number, line count and per-level counts, so a
+    page of lines (optionally filtered by level) can be served by decompressing only
+    the chunks that overlap it.
+    """
+
+    codec = "zstd" if zstandard else "gzip"
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=6).compress(payload)
+        return gzip.compress(payload, compresslevel=6)
+
+    def _decompress(self, chunk: HistoryLogChunk) -> List[Dict[str, str]]:
+        if chunk.codec == "zstd":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read zstd compressed log chunks")
+            payload = zstandard.ZstdDecompressor().decompress(chunk.data)
+        else:
+            payload = gzip.decompress(chunk.data)
+        return [json.loads(line) for line in payload.decode("utf-8").splitlines()]
+
+    def write(self, db: Session, history_id: str, logs: Optional[List[Any]]) -> int:
+        """Adds the log chunks of `history_id` to the session (caller commits). Returns line count."""
+        entries = _normalize(logs)
+        for index, start in enumerate(range(0, len(entries), CHUNK_LINES)):
+            lines = entries[start:start + CHUNK_LINES]
+            level_counts: Dict[str, int] = {}
+            for entry in lines:
+                level_counts[entry["type"]] = level_counts.get(entry["type"], 0) + 1
+            payload = "\n".join(json.dumps(e, ensure_ascii=False) for e in lines).encode("utf-8")
+            db.add(HistoryLogChunk(
+                history_id=history_id,
+                chunk_index=index,
+                first_line=start,
+                line_count=len(lines),
+                level_counts=level_counts,
+                codec=self.codec,
+                data=self._compress(payload)
+            ))
+        return len(entries)
+
+    def has_logs(self, db: Session, history_id: str) -> bool:
+        return db.query(HistoryLogChunk.id).filter(HistoryLogChunk.history_id == history_id).first() is not None
+
+    def read(
+        self,
+        db: Session,
+        history_id: str,
+        offset: int = 0,
+        limit: int = 500,
+        level: Optional[str] = None,
+        tail: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Page of log lines. `offset`/`limit` count lines after the `level` filter;
+        `tail` returns the last N (filtered) lines instead. None if nothing is stored.
+        """
+        # Index first: only the small columns, never the compressed payloads
+        index = db.query(
+            HistoryLogChunk.id, HistoryLogChunk.first_line, HistoryLogChunk.line_count, HistoryLogChunk.level_counts
+        ).filter(HistoryLogChunk.history_id == history_id).order_by(HistoryLogChunk.chunk_index).all()
+        if not index:
+            return None
+
+        level_counts: Dict[str, int] = {}
+        for row in index:
+            for k, v in (row.level_counts or {}).items():
+                level_counts[k] = level_counts.get(k, 0) + v
+        total = level_counts.get(level, 0) if level else sum(level_counts.values())
+
+        if tail is not None:
+            offset = max(total - tail, 0)
+            limit = tail
+        end = min(offset + limit, total)
+
+        # Pick the chunks overlapping [offset, end) in filtered-line space
+        wanted, position = [], 0
+        for row in index:
+            count = (row.level_counts or {}).get(level, 0) if level else row.line_count
+            if count and position + count > offset and position < end:
+                wanted.append((row.id, position, row.first_line))
+            position += count
+
+        items = []
+        if wanted:
+            chunks = {c.id: c for c in db.query(HistoryLogChunk).filter(HistoryLogChunk.id.in_([w[0] for w in wanted]))}
+            for chunk_id, filtered_start, first_line in wanted:
+                filtered_pos = filtered_start
+                for i, entry in enumerate(self._decompress(chunks[chunk_id])):
+                    if level and entry.get("type") != level:
+                        continue
+                    if offset <= filtered_pos < end:
+                        items.append({"line": first_line + i + 1, **entry})
+                    filtered_pos += 1
+
+        return {
+            "history_id": history_id,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "level": level,
+            "level_counts": level_counts,
+            "items": items
+        }
+
+    def read_all(self, db: Session, history_id: str) -> List[Dict[str, str]]:
+        chunks = db.query(HistoryLogChunk).filter(
+            HistoryLogChunk.history_id == history_id
+        ).order_by(HistoryLogChunk.chunk_index).all()
+        return [entry for chunk in chunks for entry in self._decompress(chunk)]
+
+    def read_many(self, db: Session, history_ids: List[str]) -> Dict[str, List[Dict[str, str]]]:
+        """Full logs of several runs in one query: {history_id: entries}, runs without chunks omitted."""
+        logs: Dict[str, List[Dict[str, str]]] = {}
+        if not history_ids:
+            return logs
+        chunks = db.query(HistoryLogChunk).filter(
+            HistoryLogChunk.history_id.in_(history_ids)
+        ).order_by(HistoryLogChunk.history_id, HistoryLogChunk.chunk_index).all()
+        for chunk in chunks:
+            logs.setdefault(chunk.history_id, []).extend(self._decompress(chunk))
+        return logs
+
+log_store = LogStore()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.resource_governor import resource_governor
+
+logger = logging.getLogger(__name__)
+
+THREAD_NAME = "PlaywrightRuntimeThread"
+
+
+class PlaywrightRuntime:
+    """
+    The one Playwright runtime of the backend process: a single event loop thread, a single
+    driver (Node process) and a pool of shared Chromium browsers, one per headless mode.
+
+    WebStepRunner, WebInspectorService, CrawlerService and ActionMapper submit their
+    coroutines here and open isolated BrowserContexts on the shared browsers instead of
+    launching their own. Every context is admitted by the resource governor; a browser
+    without contexts is closed after PLAYWRIGHT_BROWSER_IDLE_SECONDS.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_ready = threading.Event()
+        self._thread_lock = threading.Lock()
+
+        # Only touched on the runtime loop
+        self._playwright: Optional[Playwright] = None
+        self._browsers: Dict[bool, Browser] = {}
+        self._idle_handles: Dict[bool, asyncio.TimerHandle] = {}
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self.open_contexts = 0
+
+    # --- Loop thread -------------------------------------------------------------------
+
+    def _start_background_loop(self):
+        """Runs in the dedicated runtime thread (Playwright needs the Proactor loop on Windows)."""
+        try:
+            if sys.platform == 'win32':
+                asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._launch_lock = asyncio.Lock()
+            self._loop_ready.set()
+            logger.info("PlaywrightRuntime: background loop thread started")
+            self._loop.run_forever()
+        except Exception as e:
+            logger.error(f"PlaywrightRuntime: failed to start background loop: {e}")
+            self._loop_ready.set()
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop_ready.clear()
+                self._thread = threading.Thread(target=self._start_background_loop, daemon=True, name=THREAD_NAME)
+                self._thread.start()
+                self._loop_ready.wait()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """The runtime loop while it is running (None before first use)."""
+        if self._loop is not None and self._loop.is_running():
+            return self._loop
+        return None
+
+    def submit(self, coro) -> asyncio.Future:
+        """Schedules `coro` on the runtime loop; await the result from any other loop."""
+        self._ensure_thread()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return asyncio.wrap_future(future)
+
+    def submit_blocking(self, coro, timeout: Optional[float] = None) -> Any:
+        """submit() for threads without an event loop: waits for the result."""
+        self._ensure_thread()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    # --- Driver and browser pool (runtime loop only) ------------------------------------
+
+    async def _driver(self) -> Playwright:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return self._playwright
+
+    async def _browser(self, headless: bool) -> Browser:
+        # Caller holds _launch_lock
+        handle = self._idle_handles.pop(headless, None)
+        if handle is not None:
+            handle.cancel()
+        browser = self._browsers.get(headless)
+        if browser is None or not browser.is_connected():
+            playwright = await self._driver()
+            browser = await playwright.chromium.launch(headless=headless)
+            self._browsers[headless] = browser
+            logger.info(f"PlaywrightRuntime: launched shared {'headless' if headless else 'headed'} Chromium")
+        return browser
+
+    async def new_context(self, headless: bool = True, owner: str = "playwright", **options) -> BrowserContext:
+        """
+        Opens an isolated context on the shared browser for `headless` once the resource
+        governor admits an `owner` session (raises AdmissionTimeout if it never does).
+        Closing the context (or its browser going away) ends the session.
+        """
+        lease = await resource_governor.acquire(owner)
+        try:
+            async with self._launch_lock:
+                browser = await self._browser(headless)
+                context = await browser.new_context(**options)
+        except BaseException:
+            lease.release()
+            raise
+
+        self.open_contexts += 1
+
+        def _on_close(_):
+            if lease.released:
+                return
+            lease.release()
+            self.open_contexts -= 1
+            if not browser.contexts:
+                self._schedule_idle_close(headless)
+
+        context.on("close", _on_close)
+        return context
+
+    def _schedule_idle_close(self, headless: bool):
+        handle = self._idle_handles.pop(headless, None)
+        if handle is not None:
+            handle.cancel()
+        self._idle_handles[headless] = self._loop.call_later(
+            settings.PLAYWRIGHT_BROWSER_IDLE_SECONDS,
+            lambda: self._loop.create_task(self._close_if_idle(headless)),
+        )
+
+    async def _close_if_idle(self, headless: bool):
+        async with self._launch_lock:
+            self._idle_handles.pop(headless, None)
+            browser = self._browsers.get(headless)
+            if browser is None or browser.contexts:
+                return
+            del self._browsers[headless]
+            try:
+                await browser.close()
+                logger.info(f"PlaywrightRuntime: closed idle {'headless' if headless else 'headed'} Chromium")
+            except Exception as e:
+                logger.warning(f"PlaywrightRuntime: error closing idle browser: {e}")
+
+    # --- Shutdown ---------------------------------------------------------------------------
+
+    async def _close_all(self):
+        for handle in self._idle_handles.values():
+            handle.cancel()
+        self._idle_handles.clear()
+        browsers, self._browsers = list(self._browsers.values()), {}
+        for browser in browsers:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Closes every browser and the driver, then stops the loop thread."""
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"PlaywrightRuntime: error during shutdown: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    @property
+    def browser_count(self) -> int:
+        return sum(1 for browser in list(self._browsers.values()) if browser.is_connected())
+
+playwright_runtime = PlaywrightRuntime()
+
+registry.gauge(
+    "qone_playwright_browsers", "Chromium processes launched by the shared Playwright runtime"
+).set_function(lambda: playwright_runtime.browser_count)
+registry.gauge(
+    "qone_playwright_contexts", "Browser contexts open on the shared Playwright runtime"
+).set_function(lambda: playwright_runtime.open_contexts)
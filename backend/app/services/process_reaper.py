@@ -0,0 +1,240 @@
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Set on every run subprocess; inherited by pytest, the Playwright driver and Chromium
+RUN_ENV = "QONE_RUN_ID"
+# Pid of the backend that spawned a process; lets the reaper spot leftovers of a dead backend
+OWNER_ENV = "QONE_OWNER_PID"
+
+PROC_DIR = "/proc"
+
+REAPED_PROCESSES = registry.counter(
+    "qone_reaped_processes_total", "Run and browser processes killed after their run ended", ("reason",)
+)
+
+
+def new_group_kwargs() -> Dict[str, object]:
+    """Popen kwargs that start the child in its own process group (POSIX: its own session)."""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def run_env(run_id: str, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment for a run subprocess, tagged so every process it spawns can be found again."""
+    env = dict(os.environ if base is None else base)
+    env[RUN_ENV] = run_id
+    env[OWNER_ENV] = str(os.getpid())
+    return env
+
+
+def _has_proc() -> bool:
+    return os.path.isdir(PROC_DIR)
+
+
+def _pids() -> Iterable[int]:
+    return (int(entry) for entry in os.listdir(PROC_DIR) if entry.isdigit())
+
+
+def _parent_map() -> Dict[int, int]:
+    parents = {}
+    for pid in _pids():
+        try:
+            with open(f"{PROC_DIR}/{pid}/stat", "rb") as f:
+                stat = f.read().decode(errors="replace")
+            parents[pid] = int(stat[stat.rindex(")") + 2:].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return parents
+
+
+def _environ(pid: int) -> Dict[str, str]:
+    try:
+        with open(f"{PROC_DIR}/{pid}/environ", "rb") as f:
+            raw = f.read().decode(errors="replace")
+    except OSError:
+        return {} # Gone, or another user's process
+    env = {}
+    for item in raw.split("\0"):
+        key, sep, value = item.partition("=")
+        if sep and key in (RUN_ENV, OWNER_ENV):
+            env[key] = value
+    return env
+
+
+def descendants(pid: int) -> Set[int]:
+    """All processes below `pid` (empty without /proc)."""
+    if not _has_proc():
+        return set()
+    children: Dict[int, list] = {}
+    for child, parent in _parent_map().items():
+        children.setdefault(parent, []).append(child)
+    found: Set[int] = set()
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        if child not in found:
+            found.add(child)
+            pending.extend(children.get(child, []))
+    return found
+
+
+def run_processes(run_id: str) -> Set[int]:
+    """Processes tagged with `run_id`, wherever they were reparented to."""
+    if not _has_proc():
+        return set()
+    me = os.getpid()
+    return {pid for pid in _pids() if pid != me and _environ(pid).get(RUN_ENV) == run_id}
+
+
+def _alive(pid: int) -> bool:
+    if _has_proc():
+        try:
+            with open(f"{PROC_DIR}/{pid}/stat", "rb") as f:
+                stat = f.read().decode(errors="replace")
+            return stat[stat.rindex(")") + 2] != "Z"
+        except (OSError, ValueError, IndexError):
+            return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _signal(pids: Iterable[int], sig: int) -> None:
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except OSError:
+            pass
+
+
+def terminate_pids(pids: Set[int], grace: Optional[float] = None) -> Set[int]:
+    """SIGTERM, then SIGKILL whatever is still alive after `grace` seconds. Returns the pids signalled."""
+    pids = {pid for pid in pids if pid != os.getpid() and _alive(pid)}
+    if not pids:
+        return pids
+    _signal(pids, signal.SIGTERM)
+    deadline = time.monotonic() + (settings.RUN_KILL_GRACE_SECONDS if grace is None else grace)
+    while time.monotonic() < deadline and any(_alive(pid) for pid in pids):
+        time.sleep(0.1)
+    survivors = {pid for pid in pids if _alive(pid)}
+    if survivors:
+        _signal(survivors, signal.SIGKILL)
+    return pids
+
+
+def kill_process_tree(pid: int, run_id: Optional[str] = None, grace: Optional[float] = None) -> int:
+    """
+    Kills `pid`, its process group, every descendant and (with `run_id`) every process
+    tagged with the run. Playwright launches Chromium detached in its own group, so the
+    group alone does not reach the browsers. Returns the number of processes signalled.
+    """
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True)
+        return 1
+
+    # Collect the tree before signalling: killed parents get their children reparented
+    pids = {pid} | descendants(pid)
+    if run_id:
+        pids |= run_processes(run_id)
+    try:
+        pgid = os.getpgid(pid)
+        if pgid != os.getpgid(0):
+            os.killpg(pgid, signal.SIGTERM)
+    except OSError:
+        pass
+    return len(terminate_pids(pids, grace))
+
+
+def kill_run_processes(run_id: str, reason: str = "finished_run") -> int:
+    """Kills whatever is still tagged with `run_id` once the run itself has ended."""
+    killed = terminate_pids(run_processes(run_id))
+    if killed:
+        REAPED_PROCESSES.inc(len(killed), reason=reason)
+        logger.warning(f"Reaped {len(killed)} leftover process(es) of run {run_id}")
+    return len(killed)
+
+
+class ProcessReaper:
+    """
+    Periodically kills processes tagged with QONE_RUN_ID/QONE_OWNER_PID that outlived
+    their run: processes of runs this backend no longer tracks (crashed wrapper, killed
+    pytest leaving Chromium behind) and processes whose owning backend is gone (crash or
+    restart). Needs /proc; a no-op elsewhere.
+    """
+
+    def __init__(self, active_runs: Callable[[], Set[str]]):
+        self._active_runs = active_runs
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        # Tag everything this backend spawns from now on (Playwright driver, Chromium, Appium
+        # helpers) so a later backend can reap it if this one dies
+        os.environ[OWNER_ENV] = str(os.getpid())
+        if not _has_proc() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ProcessReaperThread", daemon=True)
+        self._thread.start()
+        logger.info(f"Process reaper started (every {settings.PROCESS_REAPER_INTERVAL_SECONDS}s)")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        # First sweep right away: leftovers of a previous backend process
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Process reaper sweep failed: {e}")
+            if self._stop.wait(settings.PROCESS_REAPER_INTERVAL_SECONDS):
+                return
+
+    def sweep(self) -> int:
+        me = str(os.getpid())
+        active = self._active_runs()
+        stale: Dict[str, Set[int]] = {}
+        for pid in _pids():
+            if pid == os.getpid():
+                continue
+            env = _environ(pid)
+            owner = env.get(OWNER_ENV)
+            if owner is None:
+                continue
+            if owner == me:
+                run_id = env.get(RUN_ENV)
+                if run_id and run_id not in active:
+                    stale.setdefault("finished_run", set()).add(pid)
+            elif not owner.isdigit() or not _alive(int(owner)):
+                stale.setdefault("dead_owner", set()).add(pid)
+
+        total = 0
+        for reason, pids in stale.items():
+            killed = terminate_pids(pids)
+            if killed:
+                REAPED_PROCESSES.inc(len(killed), reason=reason)
+                logger.warning(f"Process reaper killed {len(killed)} process(es) ({reason}): {sorted(killed)}")
+                total += len(killed)
+        return total
+
+
+def _active_runs() -> Set[str]:
+    from app.services.runner import runner_service
+    return runner_service.active_run_ids()
+
+process_reaper = ProcessReaper(_active_runs)
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import io
+import logging
+import re
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Verdicts returned by ProgressTracker.observe
+PROGRESS = "progress"
+NO_PROGRESS = "no_progress"
+STUCK = "stuck"
+
+_pillow_warned = False
+
+
+def screenshot_hash(screenshot_b64: Optional[str]) -> str:
+    """
+    Downscaled average-hash (8x8 grayscale) of a base64 screenshot.
+    Tolerates JPEG noise and tiny repaints; falls back to a byte digest without Pillow.
+    """
+    if not screenshot_b64:
+        return ""
+    try:
+        raw = base64.b64decode(screenshot_b64)
+    except Exception:
+        return ""
+
+    try:
+        from PIL import Image
+    except ImportError:
+        global _pillow_warned
+        if not _pillow_warned:
+            _pillow_warned = True
+            logger.warning(
+                "Pillow is not installed: screenshot fingerprints fall back to exact byte digests, "
+                "so near-duplicate screens are not detected as no-progress"
+            )
+        return hashlib.sha256(raw).hexdigest()[:16]
+
+    try:
+        img = Image.open(io.BytesIO(raw)).convert("L").resize((8, 8))
+        pixels = list(img.getdata())
+        avg = sum(pixels) / len(pixels)
+        bits = "".join("1" if p >= avg else "0" for p in pixels)
+        return f"{int(bits, 2):016x}"
+    except Exception:
+        return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def _distill_structure(html_structure: Optional[str]) -> str:
+    """Strips volatile content (clocks, counters, whitespace) so equal screens hash equally."""
+    if not html_structure:
+        return ""
+    text = re.sub(r"\d+", "#", html_structure)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def fingerprint_state(html_structure: Optional[str], url: Optional[str], screenshot_b64: Optional[str] = None) -> str:
+    """
+    Stable fingerprint of a UI state: distilled DOM/XML + URL (without query) + screenshot hash.
+    """
+    page_url = (url or "").split("#")[0].split("?")[0]
+    structure_digest = hashlib.sha256(_distill_structure(html_structure).encode("utf-8")).hexdigest()
+    combined = f"{page_url}|{structure_digest}|{screenshot_hash(screenshot_b64)}"
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()[:16]
+
+
+class ProgressTracker:
+    """
+    Detects when an agent stops making progress: the same state over and over,
+    or A -> B -> A oscillation between a few states.
+
+    Every observation whose fingerprint was already seen in the recent window counts
+    as a stall. `hint_after` consecutive stalls yield NO_PROGRESS (inject a hint into
+    the prompt), `abort_after` consecutive stalls yield STUCK (stop the session).
+    """
+
+    def __init__(self, hint_after: int = 2, abort_after: int = 4, window: int = 8):
+        self.hint_after = hint_after
+        self.abort_after = abort_after
+        self._recent = deque(maxlen=window)
+        self._stall_count = 0
+        self.last_seen = time.monotonic()
+
+    def observe(self, fingerprint: str) -> Dict[str, Any]:
+        reason = None
+        self.last_seen = time.monotonic()
+        if fingerprint in self._recent:
+            self._stall_count += 1
+            if self._recent[-1] == fingerprint:
+                reason = "repeated"
+            elif len(self._recent) >= 2 and self._recent[-2] == fingerprint:
+                reason = "oscillation"
+            else:
+                reason = "revisit"
+        else:
+            self._stall_count = 0
+        self._recent.append(fingerprint)
+
+        status = PROGRESS
+        if self._stall_count >= self.abort_after:
+            status = STUCK
+        elif self._stall_count >= self.hint_after:
+            status = NO_PROGRESS
+
+        if status != PROGRESS:
+            logger.info(f"ProgressTracker: {status} ({reason}, {self._stall_count} stalled observations)")
+        return {"status": status, "reason": reason, "stall_count": self._stall_count}
+
+    @staticmethod
+    def hint_for(verdict: Dict[str, Any]) -> str:
+        """Prompt fragment telling the LLM its recent actions had no effect."""
+        if verdict.get("reason") == "oscillation":
+            pattern = "The screen keeps alternating between the same two states (A -> B -> A)."
+        else:
+            pattern = "The screen has not changed after your recent actions."
+        return (
+            f"NO PROGRESS DETECTED: {pattern} "
+            f"({verdict.get('stall_count')} consecutive actions without a new screen). "
+            "Do NOT repeat the same action or target. Choose a different element, scroll, go back, "
+            "or set status='Failed' if the goal cannot be reached."
+        )
@@ -0,0 +1,172 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.project import ProjectStats
+from app.models.test import TestHistory, TestHistoryArchive, TestScript, ScriptLatestResult
+
+logger = logging.getLogger(__name__)
+
+# total_assets / weekly_growth are cheap counts but time dependent; recount at most this often
+ASSET_REFRESH_MINUTES = 10
+DEFAULT_ORIGINS = ("AI", "STEP", "AI_EXPLORATION", "MANUAL")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ProjectStatsService:
+    """
+    Maintains the per-project `projectstats` row behind /history/summary.
+
+    Run totals and active defects are applied incrementally from
+    history_service.record_run; asset counts are refreshed lazily on read.
+    """
+
+    def lock(self, db: Session, project_id: Optional[str]) -> Optional[ProjectStats]:
+        """
+        Locks the project's stats row until commit, serializing concurrent run finishes
+        of one project so the defect deltas below are computed from a stable state.
+        """
+        if not project_id:
+            return None
+        return db.query(ProjectStats).filter(ProjectStats.project_id == project_id).with_for_update().first()
+
+    def apply_run(
+        self,
+        stats: Optional[ProjectStats],
+        history: TestHistory,
+        script: Optional[TestScript],
+        previous_status: Optional[str]
+    ) -> None:
+        """
+        Adds one finished run to the locked `stats` row. `previous_status` is the
+        script's latest status before this run (None if it never ran). Caller commits.
+        """
+        if stats is None:
+            # Not built yet; get_summary builds it from history on first read
+            return
+
+        passed = history.status == "passed"
+        stats.total_runs = (stats.total_runs or 0) + 1
+        stats.passed_runs = (stats.passed_runs or 0) + (1 if passed else 0)
+        stats.failed_runs = (stats.failed_runs or 0) + (0 if passed else 1)
+        by_trigger = dict(stats.runs_by_trigger or {})
+        trigger = history.trigger or "manual"
+        by_trigger[trigger] = by_trigger.get(trigger, 0) + 1
+        stats.runs_by_trigger = by_trigger
+
+        if script is not None and script.is_active:
+            was_defect = previous_status == "failed"
+            is_defect = history.status == "failed"
+            if was_defect != is_defect:
+                delta = 1 if is_defect else -1
+                origin = script.origin or "MANUAL"
+                by_origin = dict(stats.active_defects_by_origin or {})
+                by_origin[origin] = max(by_origin.get(origin, 0) + delta, 0)
+                stats.active_defects = max((stats.active_defects or 0) + delta, 0)
+                stats.active_defects_by_origin = by_origin
+
+    def invalidate(self, db: Session, project_id: Optional[str]) -> None:
+        """Marks a project for a full rebuild (scripts activated, deactivated or deleted)."""
+        if not project_id:
+            return
+        db.query(ProjectStats).filter(ProjectStats.project_id == project_id).update(
+            {ProjectStats.needs_rebuild: True}, synchronize_session=False
+        )
+
+    def _count_assets(self, db: Session, stats: ProjectStats) -> None:
+        project_id = stats.project_id
+        seven_days_ago = _utcnow() - timedelta(days=7)
+        total_assets, weekly_growth = db.query(
+            func.count(TestScript.id).filter(TestScript.is_active == True),
+            func.count(TestScript.id).filter(TestScript.created_at >= seven_days_ago)
+        ).filter(TestScript.project_id == project_id).one()
+        stats.total_assets = total_assets or 0
+        stats.weekly_growth = weekly_growth or 0
+        stats.assets_refreshed_at = _utcnow()
+
+    def _count_active_defects(self, db: Session, project_id: str) -> Dict[str, Any]:
+        rows = db.query(TestScript.origin, func.count(ScriptLatestResult.script_id)).join(
+            TestScript, TestScript.id == ScriptLatestResult.script_id
+        ).filter(
+            ScriptLatestResult.project_id == project_id,
+            ScriptLatestResult.status == "failed",
+            TestScript.is_active == True
+        ).group_by(TestScript.origin).all()
+
+        by_origin = {origin: 0 for origin in DEFAULT_ORIGINS}
+        for origin, count in rows:
+            by_origin[origin or "MANUAL"] = by_origin.get(origin or "MANUAL", 0) + count
+        return {"active_defects": sum(by_origin.values()), "active_defects_by_origin": by_origin}
+
+    def rebuild(self, db: Session, project_id: str) -> ProjectStats:
+        """Recomputes every aggregate of a project from history (backfill / repair). Caller commits."""
+        stats = self.lock(db, project_id)
+        if stats is None:
+            stats = ProjectStats(project_id=project_id)
+            db.add(stats)
+
+        stats.total_runs, stats.passed_runs, runs_by_trigger = 0, 0, {}
+        # Runs moved to the archive still count towards the totals
+        for model in (TestHistory, TestHistoryArchive):
+            total, passed = db.query(
+                func.count(model.id),
+                func.sum(case((model.status == "passed", 1), else_=0))
+            ).filter(model.project_id == project_id).one()
+            stats.total_runs += total or 0
+            stats.passed_runs += int(passed or 0)
+            for trigger, count in db.query(
+                model.trigger, func.count(model.id)
+            ).filter(model.project_id == project_id).group_by(model.trigger).all():
+                runs_by_trigger[trigger or "manual"] = runs_by_trigger.get(trigger or "manual", 0) + count
+        stats.failed_runs = stats.total_runs - stats.passed_runs
+        stats.runs_by_trigger = runs_by_trigger
+
+        defects = self._count_active_defects(db, project_id)
+        stats.active_defects = defects["active_defects"]
+        stats.active_defects_by_origin = defects["active_defects_by_origin"]
+        self._count_assets(db, stats)
+        stats.needs_rebuild = False
+        db.flush()
+        return stats
+
+    def get_summary(self, db: Session, project_id: str) -> Dict[str, Any]:
+        """Single-row lookup for /history/summary, repairing the row first if needed."""
+        stats = db.query(ProjectStats).filter(ProjectStats.project_id == project_id).first()
+        if stats is None or stats.needs_rebuild:
+            try:
+                stats = self.rebuild(db, project_id)
+                db.commit()
+            except IntegrityError:
+                # Another request created the row concurrently; use theirs
+                db.rollback()
+                stats = db.query(ProjectStats).filter(ProjectStats.project_id == project_id).one()
+        elif not stats.assets_refreshed_at or stats.assets_refreshed_at < _utcnow() - timedelta(minutes=ASSET_REFRESH_MINUTES):
+            self._count_assets(db, stats)
+            db.commit()
+
+        total = stats.total_runs or 0
+        passed = stats.passed_runs or 0
+        by_trigger = stats.runs_by_trigger or {}
+        by_origin = {origin: 0 for origin in DEFAULT_ORIGINS}
+        by_origin.update(stats.active_defects_by_origin or {})
+        return {
+            "total": total,
+            "passed": passed,
+            "failed": stats.failed_runs or 0,
+            "rate": round((passed / total) * 100, 1) if total > 0 else 0,
+            "pipelineRuns": by_trigger.get("pipeline", 0),
+            "scheduledRuns": by_trigger.get("scheduled", 0),
+            "total_assets": stats.total_assets or 0,
+            "active_defects": stats.active_defects or 0,
+            "weekly_growth": stats.weekly_growth or 0,
+            "active_defects_by_origin": by_origin
+        }
+
+project_stats_service = ProjectStatsService()
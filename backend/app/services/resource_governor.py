@@ -0,0 +1,376 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# How often a queued request re-checks whether it can be admitted
+ADMISSION_POLL_SECONDS = 0.25
+
+# Executable names of Chromium builds Playwright launches
+BROWSER_EXECUTABLES = ("chrome", "chromium", "chromium-browser", "headless_shell", "chrome-headless-shell")
+
+PROC_DIR = "/proc"
+
+GOVERNOR_SESSIONS = registry.gauge(
+    "qone_governor_sessions", "Browser sessions and pytest runs currently admitted", ("kind",)
+)
+GOVERNOR_QUEUE_DEPTH = registry.gauge(
+    "qone_governor_queue_depth", "Requests waiting for admission by the resource governor"
+)
+GOVERNOR_BLOCKED = registry.gauge(
+    "qone_governor_blocked", "1 while the head of the queue is held back by this budget", ("budget",)
+)
+GOVERNOR_WAIT_SECONDS = registry.histogram(
+    "qone_governor_admission_wait_seconds", "Time spent queued before admission", ("kind",),
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+GOVERNOR_REJECTED = registry.counter(
+    "qone_governor_rejected_total", "Requests that gave up waiting for admission", ("kind",)
+)
+
+
+class AdmissionTimeout(RuntimeError):
+    """Raised when a request is not admitted within GOVERNOR_QUEUE_TIMEOUT_SECONDS."""
+
+
+@dataclass
+class BrowserUsage:
+    browsers: int = 0
+    processes: int = 0
+    rss_bytes: int = 0
+    cpu_percent: float = 0.0
+
+
+class BrowserProcessSampler:
+    """
+    Reads the Chromium processes below the backend process from /proc: browser count
+    (processes without --type=, i.e. not renderer/GPU/utility children), total RSS and
+    CPU as a percentage of all cores. Returns zero usage where /proc is unavailable.
+
+    The /proc scan runs on its own thread every GOVERNOR_SAMPLE_INTERVAL_MS; usage() only
+    reads the latest sample, so admission checks (under the governor lock, on the
+    Playwright loop) and metric scrapes never wait on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._prev_ticks: Dict[int, int] = {}
+        self._prev_time: Optional[float] = None
+        self._usage = BrowserUsage()
+        self._thread: Optional[threading.Thread] = None
+
+    def _read_processes(self) -> Dict[int, Dict[str, Any]]:
+        processes = {}
+        for entry in os.listdir(PROC_DIR):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            try:
+                with open(f"{PROC_DIR}/{pid}/stat", "rb") as f:
+                    stat = f.read().decode(errors="replace")
+                # comm may contain spaces and parentheses; fields resume after the last ')'
+                fields = stat[stat.rindex(")") + 2:].split()
+                processes[pid] = {
+                    "ppid": int(fields[1]),
+                    "ticks": int(fields[11]) + int(fields[12]),
+                    "rss": int(fields[21]) * self._page_size,
+                }
+            except (OSError, ValueError, IndexError):
+                continue # Exited while we were reading
+        return processes
+
+    def _cmdline(self, pid: int) -> list:
+        try:
+            with open(f"{PROC_DIR}/{pid}/cmdline", "rb") as f:
+                return f.read().decode(errors="replace").split("\0")
+        except OSError:
+            return []
+
+    def _sample(self) -> BrowserUsage:
+        processes = self._read_processes()
+        children: Dict[int, list] = {}
+        for pid, info in processes.items():
+            children.setdefault(info["ppid"], []).append(pid)
+
+        usage = BrowserUsage()
+        ticks: Dict[int, int] = {}
+        pending = list(children.get(os.getpid(), []))
+        while pending:
+            pid = pending.pop()
+            pending.extend(children.get(pid, []))
+            argv = self._cmdline(pid)
+            if not argv or os.path.basename(argv[0]) not in BROWSER_EXECUTABLES:
+                continue
+            info = processes[pid]
+            usage.processes += 1
+            usage.rss_bytes += info["rss"]
+            if not any(arg.startswith("--type=") for arg in argv):
+                usage.browsers += 1
+            ticks[pid] = info["ticks"]
+
+        now = time.monotonic()
+        if self._prev_time is not None and now > self._prev_time:
+            # Only processes seen in both samples; a new process' lifetime ticks are not this interval's
+            delta = sum(t - self._prev_ticks[pid] for pid, t in ticks.items() if pid in self._prev_ticks)
+            cores = os.cpu_count() or 1
+            usage.cpu_percent = round(delta / self._clock_ticks / (now - self._prev_time) / cores * 100, 1)
+        self._prev_ticks, self._prev_time = ticks, now
+        return usage
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self._usage = self._sample()
+            except Exception as e:
+                logger.warning(f"ResourceGovernor: failed to sample browser processes: {e}")
+            time.sleep(settings.GOVERNOR_SAMPLE_INTERVAL_MS / 1000)
+
+    def usage(self) -> BrowserUsage:
+        """Latest sample (zero until the first one); starts the sampling thread on first use."""
+        if self._thread is None and os.path.isdir(PROC_DIR):
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="BrowserSamplerThread", daemon=True)
+                    self._thread.start()
+        return self._usage
+
+
+class Lease:
+    """An admitted session. Release it (or use it as a context manager) when the browser or run ends."""
+
+    def __init__(self, governor: "ResourceGovernor", kind: str):
+        self.governor = governor
+        self.kind = kind
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.governor._release(self.kind)
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class _RunScope:
+    __slots__ = ("lease",)
+
+    def __init__(self):
+        self.lease: Optional[Lease] = None
+
+
+_run_scope: contextvars.ContextVar[Optional[_RunScope]] = contextvars.ContextVar("governor_run_scope", default=None)
+
+
+@contextmanager
+def run_scope() -> Iterator[None]:
+    """
+    Marks one run. While the run holds an admitted session, further sessions it opens (its
+    AI fallback's crawler context) share that admission instead of queueing behind other
+    runs, which would deadlock once every slot is held by a run waiting on its own child.
+    Propagates with the context into Playwright runtime tasks and asyncio.run loops.
+    """
+    token = _run_scope.set(_RunScope())
+    try:
+        yield
+    finally:
+        _run_scope.reset(token)
+
+
+class _Ticket:
+    __slots__ = ("kind", "enqueued_at")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.enqueued_at = time.monotonic()
+
+
+class ResourceGovernor:
+    """
+    Admission control for everything that starts a browser: Playwright contexts on the
+    shared runtime and pytest subprocesses. A request is admitted when it is first in
+    the FIFO queue and the admitted sessions, browser RSS and browser CPU are within
+    the GOVERNOR_* budgets; otherwise it waits. The first session is always admitted
+    so an over-budget host cannot deadlock the queue, and sessions a run opens while it
+    already holds one are admitted with it (see run_scope).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: Deque[_Ticket] = deque()
+        self._active: Counter = Counter()
+        self._blocked_by: Optional[str] = None
+        self.sampler = BrowserProcessSampler()
+
+    def _budget_exceeded(self) -> Optional[str]:
+        # Caller holds _lock
+        if not sum(self._active.values()):
+            return None
+        if settings.GOVERNOR_MAX_SESSIONS and sum(self._active.values()) >= settings.GOVERNOR_MAX_SESSIONS:
+            return "sessions"
+        usage = self.sampler.usage()
+        if settings.GOVERNOR_MAX_BROWSER_RSS_MB and usage.rss_bytes >= settings.GOVERNOR_MAX_BROWSER_RSS_MB * 1024 * 1024:
+            return "memory"
+        if settings.GOVERNOR_MAX_BROWSER_CPU_PERCENT and usage.cpu_percent >= settings.GOVERNOR_MAX_BROWSER_CPU_PERCENT:
+            return "cpu"
+        return None
+
+    def _set_blocked(self, budget: Optional[str]) -> None:
+        if budget == self._blocked_by:
+            return
+        if self._blocked_by:
+            GOVERNOR_BLOCKED.set(0, budget=self._blocked_by)
+            logger.info(f"ResourceGovernor: {self._blocked_by} budget no longer blocking admission")
+        if budget:
+            GOVERNOR_BLOCKED.set(1, budget=budget)
+            logger.info(f"ResourceGovernor: admission held back by the {budget} budget ({len(self._queue)} queued)")
+        self._blocked_by = budget
+
+    def _enqueue(self, kind: str) -> _Ticket:
+        ticket = _Ticket(kind)
+        with self._lock:
+            self._queue.append(ticket)
+        return ticket
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            if not self._queue:
+                self._set_blocked(None)
+
+    def _try_admit(self, ticket: _Ticket) -> bool:
+        with self._lock:
+            if self._queue[0] is not ticket:
+                return False
+            budget = self._budget_exceeded()
+            self._set_blocked(budget)
+            if budget:
+                return False
+            self._queue.popleft()
+            self._active[ticket.kind] += 1
+            GOVERNOR_SESSIONS.set(self._active[ticket.kind], kind=ticket.kind)
+        GOVERNOR_WAIT_SECONDS.observe(time.monotonic() - ticket.enqueued_at, kind=ticket.kind)
+        return True
+
+    def _timed_out(self, ticket: _Ticket) -> AdmissionTimeout:
+        GOVERNOR_REJECTED.inc(kind=ticket.kind)
+        return AdmissionTimeout(
+            f"Resource limit reached: waited {settings.GOVERNOR_QUEUE_TIMEOUT_SECONDS}s for a browser slot "
+            f"(held back by the {self._blocked_by or 'queue'} budget)"
+        )
+
+    def _parent_lease(self) -> Optional[Lease]:
+        scope = _run_scope.get()
+        if scope is not None and scope.lease is not None and not scope.lease.released:
+            return scope.lease
+        return None
+
+    def _admit_child(self, kind: str) -> Lease:
+        # Counted (it is a real browser session) but neither queued nor held to the budgets
+        with self._lock:
+            self._active[kind] += 1
+            GOVERNOR_SESSIONS.set(self._active[kind], kind=kind)
+        return Lease(self, kind)
+
+    def _admitted(self, kind: str) -> Lease:
+        lease = Lease(self, kind)
+        scope = _run_scope.get()
+        if scope is not None:
+            scope.lease = lease
+        return lease
+
+    def _release(self, kind: str) -> None:
+        with self._lock:
+            self._active[kind] = max(self._active[kind] - 1, 0)
+            GOVERNOR_SESSIONS.set(self._active[kind], kind=kind)
+
+    async def acquire(self, kind: str) -> Lease:
+        """Waits (without blocking the loop) until a `kind` session is admitted."""
+        if self._parent_lease():
+            return self._admit_child(kind)
+        ticket = self._enqueue(kind)
+        deadline = ticket.enqueued_at + settings.GOVERNOR_QUEUE_TIMEOUT_SECONDS
+        try:
+            while not self._try_admit(ticket):
+                if time.monotonic() >= deadline:
+                    raise self._timed_out(ticket)
+                await asyncio.sleep(ADMISSION_POLL_SECONDS)
+        finally:
+            self._abandon(ticket)
+        return self._admitted(kind)
+
+    def acquire_blocking(self, kind: str) -> Lease:
+        """acquire() for worker threads (scheduler, pytest launchers)."""
+        if self._parent_lease():
+            return self._admit_child(kind)
+        ticket = self._enqueue(kind)
+        deadline = ticket.enqueued_at + settings.GOVERNOR_QUEUE_TIMEOUT_SECONDS
+        try:
+            while not self._try_admit(ticket):
+                if time.monotonic() >= deadline:
+                    raise self._timed_out(ticket)
+                time.sleep(ADMISSION_POLL_SECONDS)
+        finally:
+            self._abandon(ticket)
+        return self._admitted(kind)
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def state(self) -> Dict[str, Any]:
+        usage = self.sampler.usage()
+        with self._lock:
+            active = {kind: count for kind, count in self._active.items() if count}
+            queued = Counter(ticket.kind for ticket in self._queue)
+            oldest = self._queue[0].enqueued_at if self._queue else None
+            blocked_by = self._blocked_by
+        return {
+            "active": active,
+            "queued": dict(queued),
+            "oldest_wait_seconds": round(time.monotonic() - oldest, 1) if oldest else 0,
+            "blocked_by": blocked_by,
+            "usage": {
+                "browsers": usage.browsers,
+                "processes": usage.processes,
+                "rss_mb": round(usage.rss_bytes / 1024 / 1024, 1),
+                "cpu_percent": usage.cpu_percent,
+            },
+            "budgets": {
+                "max_sessions": settings.GOVERNOR_MAX_SESSIONS,
+                "max_browser_rss_mb": settings.GOVERNOR_MAX_BROWSER_RSS_MB,
+                "max_browser_cpu_percent": settings.GOVERNOR_MAX_BROWSER_CPU_PERCENT,
+            },
+        }
+
+resource_governor = ResourceGovernor()
+
+GOVERNOR_QUEUE_DEPTH.set_function(resource_governor.queue_depth)
+registry.gauge(
+    "qone_governor_browser_processes", "Chromium processes (browsers and their children) below the backend"
+).set_function(lambda: resource_governor.sampler.usage().processes)
+registry.gauge(
+    "qone_governor_browsers", "Chromium browser instances below the backend, incl. pytest subprocesses"
+).set_function(lambda: resource_governor.sampler.usage().browsers)
+registry.gauge(
+    "qone_governor_browser_rss_bytes", "Resident memory of all Chromium processes below the backend"
+).set_function(lambda: resource_governor.sampler.usage().rss_bytes)
+registry.gauge(
+    "qone_governor_browser_cpu_percent", "CPU of all Chromium processes below the backend, % of all cores"
+).set_function(lambda: resource_governor.sampler.usage().cpu_percent)
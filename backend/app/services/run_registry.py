@@ -0,0 +1,241 @@
+import logging
+import os
+import socket
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.test import RunRegistry, TestHistory
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("running", "requeued")
+INTERRUPTED_REASON = "Interrupted by backend restart"
+# A batch that keeps taking the backend down is not resumed forever
+MAX_BATCH_RESUMES = 3
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid or sys.platform == "win32":
+        # os.kill(pid, 0) would terminate the process on Windows; a dev backend there is a
+        # single process, so whatever the previous one left running is orphaned
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RunRegistryService:
+    """
+    Persists the runs this backend has in flight (runregistry table) so that work lost with
+    a restart or reload — asyncio tasks in run.py, APScheduler batches — is noticed.
+
+    On startup, recover() looks at runs still marked running on this host whose owning
+    backend process is gone: their leftover processes are killed, single runs are marked
+    interrupted (exit code written so waiting clients finish, failed history recorded) and
+    schedule batches are resumed with the scripts that had not run yet.
+    """
+
+    def __init__(self):
+        self.host = socket.gethostname()
+
+    def _write(self, action: str, fn: Callable[[Session], None]) -> None:
+        # Bookkeeping must never break the run itself
+        db = SessionLocal()
+        try:
+            fn(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"RunRegistry: failed to {action}: {e}")
+        finally:
+            db.close()
+
+    def start(
+        self, run_id: str, kind: str, trigger: Optional[str] = None, project_id: Optional[str] = None,
+        script_id: Optional[str] = None, schedule_id: Optional[str] = None, payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        def _start(db: Session):
+            db.merge(RunRegistry(
+                id=run_id, kind=kind, status="running", trigger=trigger, project_id=project_id,
+                script_id=script_id, schedule_id=schedule_id, payload=payload or {}, progress={},
+                owner_host=self.host, owner_pid=os.getpid(),
+            ))
+        self._write(f"register run {run_id}", _start)
+
+    def mark_done(self, batch_id: str, script_id: str) -> None:
+        """Records that a schedule batch has finished (and saved) one of its scripts."""
+        def _mark(db: Session):
+            row = db.get(RunRegistry, batch_id)
+            if row:
+                progress = dict(row.progress or {})
+                progress["done"] = list(progress.get("done", [])) + [script_id]
+                row.progress = progress
+        self._write(f"record progress of batch {batch_id}", _mark)
+
+    def resume(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Claims a requeued batch for this process; returns its payload and progress."""
+        db = SessionLocal()
+        try:
+            row = db.get(RunRegistry, batch_id)
+            if not row:
+                return None
+            row.status = "running"
+            row.owner_host, row.owner_pid = self.host, os.getpid()
+            db.commit()
+            return {"payload": row.payload or {}, "progress": row.progress or {}}
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"RunRegistry: failed to resume batch {batch_id}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def finish(self, run_id: str, status: str, error: Optional[str] = None) -> None:
+        def _finish(db: Session):
+            row = db.get(RunRegistry, run_id)
+            if row:
+                row.status = status
+                row.error = error
+                row.finished_at = datetime.now(timezone.utc)
+        self._write(f"finish run {run_id}", _finish)
+
+    def prune(self) -> None:
+        """Drops finished entries older than RUN_REGISTRY_RETENTION_DAYS (scheduler maintenance job)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.RUN_REGISTRY_RETENTION_DAYS)
+
+        def _prune(db: Session):
+            deleted = (
+                db.query(RunRegistry)
+                .filter(RunRegistry.status.notin_(ACTIVE_STATUSES), RunRegistry.finished_at < cutoff)
+                .delete(synchronize_session=False)
+            )
+            if deleted:
+                logger.info(f"RunRegistry: pruned {deleted} finished run(s)")
+        self._write("prune finished runs", _prune)
+
+    # --- Startup recovery ----------------------------------------------------------------
+
+    def _orphaned(self, row: RunRegistry) -> bool:
+        # recover() runs before this process registers anything, so a row carrying our own
+        # pid comes from an earlier process that had the same pid (container restart)
+        return row.owner_pid == os.getpid() or not _pid_alive(row.owner_pid)
+
+    def recover(self, resume_batch: Callable[[str, str], None]) -> Dict[str, int]:
+        """
+        Handles runs left behind by a dead backend process on this host; call on startup
+        before schedules are loaded. `resume_batch(schedule_id, batch_id)` reschedules an
+        interrupted schedule batch.
+        """
+        from app.services.process_reaper import kill_run_processes
+
+        counts = {"interrupted": 0, "requeued": 0}
+        requeued = []
+        db = SessionLocal()
+        try:
+            # Row locks keep workers starting side by side from recovering the same run twice
+            rows = (
+                db.query(RunRegistry)
+                .filter(RunRegistry.status.in_(ACTIVE_STATUSES), RunRegistry.owner_host == self.host)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for row in rows:
+                if not self._orphaned(row):
+                    continue
+                # A dry run's wrapper lives in its own session and survives the backend
+                kill_run_processes(row.id, reason="recovered")
+
+                resumes = (row.progress or {}).get("resumes", 0)
+                if row.kind == "schedule_batch" and row.schedule_id and resumes < MAX_BATCH_RESUMES:
+                    row.status = "requeued"
+                    row.owner_pid = os.getpid()
+                    row.progress = {**(row.progress or {}), "resumes": resumes + 1}
+                    requeued.append((row.schedule_id, row.id))
+                    continue
+
+                row.status = "interrupted"
+                row.error = INTERRUPTED_REASON
+                row.finished_at = datetime.now(timezone.utc)
+                if row.kind != "schedule_batch":
+                    self._close_run_dir(row.id)
+                    self._record_failed_history(db, row)
+                counts["interrupted"] += 1
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"RunRegistry: recovery failed: {e}")
+            return counts
+        finally:
+            db.close()
+
+        for schedule_id, batch_id in requeued:
+            try:
+                resume_batch(schedule_id, batch_id)
+                counts["requeued"] += 1
+            except Exception as e:
+                logger.error(f"RunRegistry: failed to resume batch {batch_id}: {e}")
+
+        if any(counts.values()):
+            logger.warning(f"RunRegistry: recovered runs of a previous backend process: {counts}")
+        return counts
+
+    def _close_run_dir(self, run_id: str) -> None:
+        """Writes the exit code the dead process never did, so streams and status polls finish."""
+        from app.services.artifact_manager import RUNS_DIR, artifact_manager
+
+        run_dir = RUNS_DIR / run_id
+        exit_code_file = run_dir / "exit_code.txt"
+        if not run_dir.is_dir() or exit_code_file.exists():
+            return
+        try:
+            with open(run_dir / "output.log", "a", encoding="utf-8") as log_file:
+                log_file.write(f"\n\n[Runner Error] {INTERRUPTED_REASON}.\n")
+            exit_code_file.write_text("1")
+        except OSError as e:
+            logger.warning(f"RunRegistry: failed to close run directory {run_id}: {e}")
+        artifact_manager.finish(run_id)
+
+    def _record_failed_history(self, db: Session, row: RunRegistry) -> None:
+        """Failed history for interrupted runs that would have produced one (script runs, not ad-hoc)."""
+        from app.services.artifact_manager import artifact_manager
+        from app.services.history_service import history_service
+        from app.services.log_store import log_store
+
+        if not row.script_id or row.script_id == "adhoc_run" or not row.project_id:
+            return
+        if db.query(TestHistory.id).filter(TestHistory.run_id == row.id).first():
+            return # The run got as far as saving its history
+
+        payload = row.payload or {}
+        history_id = str(uuid.uuid4())
+        history = TestHistory(
+            id=history_id,
+            project_id=row.project_id,
+            script_id=row.script_id,
+            script_name=payload.get("script_name") or "Interrupted Run",
+            status="failed",
+            duration="0s",
+            failure_reason=INTERRUPTED_REASON,
+            trigger=row.trigger or "manual",
+            persona_name=payload.get("persona_name"),
+            step_results=[],
+            logs=[],
+            run_id=row.id,
+            run_date=datetime.now(timezone.utc),
+        )
+        db.add(history)
+        log_store.write(db, history_id, [{"msg": INTERRUPTED_REASON, "type": "error"}])
+        history_service.record_run(db, history)
+        artifact_manager.link_history(row.id, history_id)
+
+run_registry = RunRegistryService()
@@ -3,13 +3,19 @@ import shutil
 import subprocess
 import uuid
 import asyncio
-import tempfile
-from pathlib import Path
+import time
+import threading
+from typing import Dict, Set
 import sys
 
-# Use system temp directory to avoid triggering Uvicorn reloads
-RUNS_DIR = Path(tempfile.gettempdir()) / "qone_runs"
-RUNS_DIR.mkdir(exist_ok=True)
+from app.services.artifact_manager import RUNS_DIR, artifact_manager
+from app.services.process_reaper import kill_process_tree, kill_run_processes, new_group_kwargs, run_env
+from app.services.resource_governor import AdmissionTimeout, resource_governor, run_scope
+from app.services.telemetry import RUNS_ACTIVE, RUN_SECONDS
+
+
+# Limit the dry-run wrapper enforces on pytest
+DRY_RUN_TIMEOUT_SECONDS = 600
 
 CONFTEST_CONTENT = """
 import pytest
@@ -50,10 +56,26 @@ def setup_screencast(page):
 """
 
 class TestRunner:
+    def __init__(self):
+        # pytest wrapper processes started by execute_dry_run, for qone_runs_active
+        self._processes: Dict[str, subprocess.Popen] = {}
+        # Dry runs stopped while still waiting for admission
+        self._cancelled: Set[str] = set()
+        # Runs (dry runs and scheduled pytest scripts) from launch until their processes are reaped
+        self._active_runs: Set[str] = set()
+
+    def active_dry_runs(self) -> int:
+        for run_id, process in list(self._processes.items()):
+            if process.poll() is not None:
+                self._processes.pop(run_id, None)
+        return len(self._processes)
+
+    def active_run_ids(self) -> Set[str]:
+        return set(self._active_runs)
+
     def execute_dry_run(self, code: str) -> str:
         run_id = str(uuid.uuid4())
-        run_dir = RUNS_DIR / run_id
-        run_dir.mkdir()
+        run_dir = artifact_manager.create_run_dir(run_id, "dry_run")
 
         # 1. Write Test File
         # Ensure code has necessary imports
@@ -94,10 +116,11 @@ try:
     with open("output.log", "w", encoding="utf-8") as log_file:
         try:
             # Run pytest with timeout to prevent hanging processes
-            result = subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, text=True, timeout=600)
+            result = subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, text=True, timeout={DRY_RUN_TIMEOUT_SECONDS})
             return_code = result.returncode
         except subprocess.TimeoutExpired:
-            log_file.write("\\n\\n[Runner Error] Execution timed out after 600s.\\n")
+            # Chromium outlives pytest here; the backend reaps it by QONE_RUN_ID once we exit
+            log_file.write("\\n\\n[Runner Error] Execution timed out after {DRY_RUN_TIMEOUT_SECONDS}s.\\n")
             return_code = 124
         except Exception as e:
             log_file.write(f"\\n\\n[Runner Error] Subprocess failed: {{e}}\\n")
@@ -125,8 +148,8 @@ except Exception as outer_e:
 """
         (run_dir / "run_wrapper.py").write_text(wrapper_content, encoding="utf-8")
 
-        # Prepare environment with UTF-8 enforcement for Windows
-        env = os.environ.copy()
+        # Prepare environment with UTF-8 enforcement for Windows, tagged with the run id
+        env = run_env(run_id)
         env["PYTHONIOENCODING"] = "utf-8"
         env["PYTHONUTF8"] = "1"
 
@@ -136,35 +159,96 @@ except Exception as outer_e:
         # For simplicity, let's just run it.
         cmd = [sys.executable, "run_wrapper.py"]
 
-        process = subprocess.Popen(
-            cmd,
-            cwd=str(run_dir),
-            text=True,
-            env=env
-        )
-        
-        # Save PID to allow stopping?
-        (run_dir / "pid").write_text(str(process.pid))
-        
+        # The wrapper starts once the resource governor admits the run; until then the run
+        # directory exists but has no output yet, which the stream treats as "starting"
+        self._active_runs.add(run_id)
+        threading.Thread(
+            target=self._launch_dry_run, args=(run_id, cmd, env), daemon=True, name=f"DryRun-{run_id[:8]}"
+        ).start()
+
         return run_id
 
+    def _launch_dry_run(self, run_id: str, cmd: list, env: dict):
+        run_dir = RUNS_DIR / run_id
+        try:
+            try:
+                lease = resource_governor.acquire_blocking("pytest")
+            except AdmissionTimeout as e:
+                (run_dir / "output.log").write_text(f"[Runner Error] {e}\n", encoding="utf-8")
+                (run_dir / "exit_code.txt").write_text("1")
+                return
+
+            with lease:
+                if run_id in self._cancelled:
+                    self._cancelled.discard(run_id)
+                    (run_dir / "exit_code.txt").write_text("1")
+                    return
+
+                # Own process group, so terminate_run and timeouts take pytest down with the wrapper
+                process = subprocess.Popen(
+                    cmd,
+                    cwd=str(run_dir),
+                    text=True,
+                    env=env,
+                    **new_group_kwargs()
+                )
+
+                # Save PID to allow stopping?
+                (run_dir / "pid").write_text(str(process.pid))
+                self._processes[run_id] = process
+                # Hold the lease (and its browser budget) until pytest has exited
+                try:
+                    process.wait(timeout=DRY_RUN_TIMEOUT_SECONDS + 60)
+                except subprocess.TimeoutExpired:
+                    # The wrapper enforces the timeout itself; this only catches a hung wrapper
+                    kill_process_tree(process.pid, run_id=run_id)
+                    process.wait()
+
+                exit_code_file = run_dir / "exit_code.txt"
+                if not exit_code_file.exists():
+                    # Killed before it could write one (terminate_run, backstop timeout)
+                    code = process.returncode
+                    exit_code_file.write_text(str(128 - code if code < 0 else code or 1))
+        finally:
+            # Chromium launched by Playwright is detached from the wrapper's group
+            kill_run_processes(run_id)
+            artifact_manager.finish(run_id)
+            self._active_runs.discard(run_id)
+
     def terminate_run(self, run_id: str):
         run_dir = RUNS_DIR / run_id
         pid_file = run_dir / "pid"
-        if pid_file.exists():
-            try:
-                pid = int(pid_file.read_text())
-                import signal
-                os.kill(pid, signal.SIGTERM) 
-                print(f"Terminated process {pid} for run {run_id}")
-            except Exception as e:
-                print(f"Failed to terminate run {run_id}: {e}")
+        if not pid_file.exists():
+            # Still queued for admission: never launch it
+            self._cancelled.add(run_id)
+            return
+        try:
+            pid = int(pid_file.read_text())
+            killed = kill_process_tree(pid, run_id=run_id)
+            print(f"Terminated process tree of {pid} ({killed} processes) for run {run_id}")
+        except Exception as e:
+            print(f"Failed to terminate run {run_id}: {e}")
 
     def run_script(self, script) -> dict:
         """
         Synchronously run a script and return the report.
         Used by the Scheduler and manual runs.
         """
+        platform = (getattr(script, "platform", None) or "WEB").upper()
+        started = time.perf_counter()
+        status = "error"
+        RUNS_ACTIVE.inc(kind="script")
+        try:
+            # Browser sessions of this run (and its AI fallback) share one admission
+            with run_scope():
+                report = self._run_script(script)
+            status = "passed" if report.get("passed") else "failed"
+            return report
+        finally:
+            RUNS_ACTIVE.dec(kind="script")
+            RUN_SECONDS.observe(time.perf_counter() - started, platform=platform, status=status)
+
+    def _run_script(self, script) -> dict:
         try_count = getattr(script, "try_count", 1) or 1
         enable_ai_test = getattr(script, "enable_ai_test", False)
         
@@ -275,10 +359,10 @@ except Exception as outer_e:
         import subprocess
         import uuid
         import os
+        from app.services.log_store import split_output
         
         run_id = str(uuid.uuid4())
-        run_dir = RUNS_DIR / run_id
-        run_dir.mkdir()
+        run_dir = artifact_manager.create_run_dir(run_id, "script")
         
         # Prepare Code
         code = script.code
@@ -299,26 +383,38 @@ except Exception as outer_e:
         cmd = [sys.executable, "-m", "pytest", "test_script.py"]
         
         # Env
-        env = os.environ.copy()
+        env = run_env(run_id)
         env["PYTHONIOENCODING"] = "utf-8"
         
         try:
-            result = subprocess.run(
-                cmd, 
-                cwd=str(run_dir), 
-                capture_output=True, 
-                text=True, 
-                env=env,
-                timeout=300 # 5 min timeout
-            )
+            with resource_governor.acquire_blocking("pytest"):
+                start_time = time.time()
+                self._active_runs.add(run_id)
+                try:
+                    process = subprocess.Popen(
+                        cmd, 
+                        cwd=str(run_dir), 
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        text=True, 
+                        env=env,
+                        **new_group_kwargs()
+                    )
+                    try:
+                        stdout, stderr = process.communicate(timeout=300) # 5 min timeout
+                    except subprocess.TimeoutExpired:
+                        kill_process_tree(process.pid, run_id=run_id)
+                        process.communicate()
+                        raise
+                finally:
+                    kill_run_processes(run_id)
+                    artifact_manager.finish(run_id)
+                    self._active_runs.discard(run_id)
             duration = time.time() - start_time
-            passed = result.returncode == 0
+            passed = process.returncode == 0
             
-            logs = []
-            if result.stdout:
-                logs.append({"msg": result.stdout, "type": "info"})
-            if result.stderr:
-                logs.append({"msg": result.stderr, "type": "error"})
+            # One entry per line so stored logs can be paged and filtered by level
+            logs = split_output(stdout) + split_output(stderr, default="error")
                 
             return {
                 "passed": passed,
@@ -347,6 +443,7 @@ except Exception as outer_e:
         import time
         import asyncio
         import base64
+        from app.services.step_timing import add_phase
         
         start_time = time.time()
         logs = []
@@ -425,28 +522,20 @@ except Exception as outer_e:
                     
                     log(f"Step {i+1}: [{action}] target={target} value={value}")
                     
-                    # Ensure DB dependency if needed for mobile execution
-                    if not is_web:
-                        from app.db.session import SessionLocal
-                        db_session = SessionLocal()
+                    step_start = time.time()
+                    if is_web:
+                        res = await runner.execute_step(step)
                     else:
-                        db_session = None
+                        res = runner.execute_step(step)
 
-                    step_start = time.time()
-                    try:
-                        if is_web:
-                            res = await runner.execute_step(step)
-                        else:
-                            res = runner.execute_step(step, db=db_session)
-                    finally:
-                        if db_session: db_session.close()
-                        
                     step_end = time.time()
                     
                     # Capture screenshot
                     screen_data = None
+                    step_timings = res.get("timings")
                     should_capture = capture_screenshots or step.get("screenshot") is True or not res["success"]
                     if should_capture:
+                        capture_start = time.time()
                         try:
                             if is_web:
                                 screen_data = await runner.get_screenshot()
@@ -454,6 +543,7 @@ except Exception as outer_e:
                                 screen_data = runner.get_screenshot()
                         except:
                             pass
+                        add_phase(step_timings, "screenshot", time.time() - capture_start)
 
                     result_entry = {
                         "step_number": i + 1,
@@ -462,6 +552,7 @@ except Exception as outer_e:
                         "duration": f"{round(step_end - step_start, 1)}s",
                         "error_message": res.get("error"),
                         "screenshot_data": screen_data,
+                        "timings": step_timings,
                         "metadata": {
                             "action": action,
                             "target": target,
@@ -502,3 +593,5 @@ except Exception as outer_e:
         }
 
 runner_service = TestRunner()
+
+RUNS_ACTIVE.set_function(runner_service.active_dry_runs, kind="pytest")
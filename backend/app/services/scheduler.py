@@ -1,10 +1,17 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 from app.api import deps
 from app import crud, models
 from app.services.runner import runner_service as runner
 from app.db.session import SessionLocal
+from app.services.run_registry import run_registry
+from app.services.telemetry import SCHEDULER_LAG_SECONDS, SCHEDULER_SKIPPED, drain_queue
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,9 +23,22 @@ class SchedulerService:
         if cls._instance is None:
             cls._instance = super(SchedulerService, cls).__new__(cls)
             cls._instance.scheduler = BackgroundScheduler()
+            cls._instance.scheduler.add_listener(
+                cls._instance._on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+            )
             cls._instance.scheduler.start()
         return cls._instance
 
+    def _on_job_event(self, event):
+        """Scheduler lag (scheduled time -> submission) and runs that never started."""
+        if event.code == EVENT_JOB_MISSED:
+            SCHEDULER_SKIPPED.inc(reason="missed")
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            SCHEDULER_SKIPPED.inc(reason="max_instances")
+        else:
+            for run_time in event.scheduled_run_times:
+                SCHEDULER_LAG_SECONDS.observe(max((datetime.now(run_time.tzinfo) - run_time).total_seconds(), 0))
+
     def add_job(self, schedule: models.TestSchedule):
         """
         Add or Update a job for the given schedule.
@@ -54,6 +74,54 @@ class SchedulerService:
              except Exception as e:
                  logger.error(f"Failed to add job {schedule.id}: {e}")
 
+    def add_maintenance_jobs(self):
+        """
+        Background housekeeping not tied to a TestSchedule: testhistory partition
+        creation and archival and run registry pruning (nightly), and the run artifact GC.
+        """
+        from app.core.config import settings
+        from app.services.artifact_manager import artifact_manager
+        from app.services.history_archive import history_archive_service
+
+        self.scheduler.add_job(
+            history_archive_service.run_maintenance,
+            trigger=CronTrigger(hour=3, minute=15),
+            id="history-maintenance",
+            replace_existing=True
+        )
+        logger.info("Added history maintenance job")
+
+        self.scheduler.add_job(
+            run_registry.prune,
+            trigger=CronTrigger(hour=3, minute=45),
+            id="run-registry-prune",
+            replace_existing=True
+        )
+        logger.info("Added run registry prune job")
+
+        self.scheduler.add_job(
+            artifact_manager.run_gc,
+            trigger=IntervalTrigger(minutes=settings.ARTIFACT_GC_INTERVAL_MINUTES),
+            id="artifact-gc",
+            next_run_time=datetime.now(),
+            replace_existing=True
+        )
+        logger.info("Added run artifact GC job")
+
+    def resume_batch(self, schedule_id: str, batch_id: str):
+        """
+        Runs the remaining scripts of a batch interrupted by a backend restart, right away
+        (run_registry.recover() callback).
+        """
+        self.scheduler.add_job(
+            self.execute_job,
+            id=f"resume-{batch_id}",
+            args=[schedule_id],
+            kwargs={"batch_id": batch_id},
+            replace_existing=True
+        )
+        logger.info(f"Resuming interrupted batch {batch_id} of schedule {schedule_id}")
+
     def remove_job(self, schedule_id: str):
         """
         Remove a job.
@@ -62,9 +130,10 @@ class SchedulerService:
             self.scheduler.remove_job(schedule_id)
             logger.info(f"Removed job {schedule_id}")
 
-    def execute_job(self, schedule_id: str):
+    def execute_job(self, schedule_id: str, batch_id: Optional[str] = None):
         """
-        The actual job function.
+        The actual job function. Each execution is a batch in the run registry, with the
+        scripts it has finished; `batch_id` resumes an interrupted batch with the rest.
         
         TODO: Implement Execution Preemption (자원 선점)
         - Priority가 'Critical'인 작업이 실행될 때 리소스를 선점하도록 로직 고도화 예정.
@@ -76,13 +145,17 @@ class SchedulerService:
             db: Session = SessionLocal()
             scripts_to_run = []
             schedule_name = ""
+            project_id = None
             try:
                 schedule = crud.schedule.get(db, id=schedule_id)
                 if not schedule:
                     logger.error(f"Schedule {schedule_id} not found during execution.")
+                    if batch_id:
+                        run_registry.finish(batch_id, "failed", error="Schedule not found")
                     return
                 
                 schedule_name = schedule.name
+                project_id = schedule.project_id
                 
                 # specific script association objects
                 schedule_scripts = schedule.scripts 
@@ -104,11 +177,25 @@ class SchedulerService:
             finally:
                 db.close() # Release DB connection immediately
 
+            if batch_id:
+                batch = run_registry.resume(batch_id) or {}
+                done = set(batch.get("progress", {}).get("done", []))
+                scripts_to_run = [s for s in scripts_to_run if s["id"] not in done]
+                logger.info(f"Resuming batch {batch_id}: {len(scripts_to_run)} script(s) left, {len(done)} already run")
+            else:
+                batch_id = f"batch_{uuid.uuid4().hex[:16]}"
+                run_registry.start(
+                    batch_id, "schedule_batch", trigger="scheduled", project_id=project_id,
+                    schedule_id=schedule_id,
+                    payload={"schedule_name": schedule_name, "script_ids": [s["id"] for s in scripts_to_run]}
+                )
+
             # 2. Execution Phase (No DB Lock)
-            from datetime import datetime, timezone, timedelta
+            from datetime import timezone, timedelta
             KST = timezone(timedelta(hours=9))
             
-            for script_data in scripts_to_run:
+            # Scripts of the batch run one after another; the rest count as queued
+            for script_data in drain_queue(scripts_to_run, source="schedule"):
                  logger.info(f"Running script {script_data['name']} for schedule {schedule_name}")
                  
                  # Prepare a mock object for runner if needed, or update runner to accept dict
@@ -143,29 +230,42 @@ class SchedulerService:
 
                  # 3. Save Result Phase (Short DB Lock)
                  db_save: Session = SessionLocal()
-                 import uuid
+                 from app.services.failure_clustering import build_failure_signature
+                 from app.services.blob_store import blob_store
+                 from app.services.log_store import log_store
+                 from app.services.history_service import history_service
                  try:
+                     history_id = f"hist_{uuid.uuid4().hex[:16]}"
                      history_in = models.TestHistory(
-                         id=f"hist_{uuid.uuid4().hex[:16]}",
+                         id=history_id,
                          project_id=script_data['project_id'],
                          script_id=script_data['id'],
                          script_name=script_data['name'],
                          status=status,
                          duration=duration,
-                         logs=logs,
+                         logs=[],
                          trigger="scheduled",
                          schedule_id=schedule_id,
                          schedule_name=schedule_name,
                          failure_reason=failure_reason,
-                         step_results=step_results,
+                         step_results=blob_store.externalize_steps(step_results),
                          run_date=datetime.now(KST)
                      )
+                     if status == "failed":
+                         # Lets the batch's failures be grouped by root cause (/history/failure-clusters)
+                         history_in.failure_signature = build_failure_signature(
+                             failure_reason, step_results=step_results, logs=logs
+                         )
                      db_save.add(history_in)
+                     log_store.write(db_save, history_id, logs)
+                     history_service.record_run(db_save, history_in)
                      db_save.commit()
                  except Exception as e:
                      logger.error(f"Failed to save history for {script_data['name']}: {e}")
                  finally:
                      db_save.close()
+                 # Not re-run if the batch is resumed after a restart
+                 run_registry.mark_done(batch_id, script_data['id'])
 
             # 4. Update Schedule Metadata
             db_meta: Session = SessionLocal()
@@ -177,9 +277,12 @@ class SchedulerService:
                     db_meta.commit()
             finally:
                 db_meta.close()
+            run_registry.finish(batch_id, "completed")
 
         except Exception as e:
             logger.error(f"Job execution failed: {e}")
+            if batch_id:
+                run_registry.finish(batch_id, "failed", error=str(e))
         finally:
             db.close()
 
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Where a step's wall time goes, stored per step as step_results[i]["timings"]["<phase>_ms"]:
+#   locate     - waiting for / finding the target element
+#   action     - the interaction itself (whatever the other phases do not cover)
+#   settle     - our own sleeps: post-action waits, pre-assertion waits, "wait" steps
+#   assert     - reading the screen and matching assertText
+#   screenshot - capturing the screenshot after the step
+#   encode     - decoding / writing the captured frame for the live stream
+PHASES = ("locate", "action", "settle", "assert", "screenshot", "encode")
+
+
+class StepTimings:
+    """Accumulates per-phase time of one step; the runners fill it while executing."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._seconds = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self._seconds[phase] += seconds
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def sleep(self, seconds: float) -> None:
+        with self.phase("settle"):
+            time.sleep(seconds)
+
+    async def async_sleep(self, seconds: float) -> None:
+        with self.phase("settle"):
+            await asyncio.sleep(seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Milliseconds per phase; action is the step's wall time minus the measured phases."""
+        total = time.perf_counter() - self._started
+        measured = sum(v for k, v in self._seconds.items() if k != "action")
+        seconds = dict(self._seconds, action=self._seconds["action"] + max(total - measured, 0.0))
+        timings = {f"{phase}_ms": round(value * 1000, 1) for phase, value in seconds.items()}
+        timings["total_ms"] = round(sum(seconds.values()) * 1000, 1)
+        return timings
+
+
+def add_phase(timings: Optional[Dict[str, float]], phase: str, seconds: float) -> None:
+    """Adds time spent outside the runner (screenshot, encode, live-view delay) to a step's timings dict."""
+    if timings is None:
+        return
+    ms = round(seconds * 1000, 1)
+    timings[f"{phase}_ms"] = round(timings.get(f"{phase}_ms", 0) + ms, 1)
+    timings["total_ms"] = round(timings.get("total_ms", 0) + ms, 1)
+
+
+GROUP_KEYS = {
+    "action": "lower(step->'metadata'->>'action')",
+    "selector": "step->'metadata'->>'target'",
+    "script": "h.script_id",
+}
+INTERVALS = ("day", "week", "month")
+
+
+class StepTimingService:
+    def aggregate(
+        self,
+        db: Session,
+        project_id: str,
+        group_by: str = "action",
+        days: int = 30,
+        interval: Optional[str] = None,
+        script_id: Optional[str] = None,
+        action: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        """
+        Per-phase step timings aggregated by action type, selector or script, optionally
+        bucketed by day/week/month. Reads step_results straight from testhistory (the
+        run_date filter prunes partitions); steps recorded before timings existed are skipped.
+        """
+        key_expr = GROUP_KEYS[group_by]
+        bucket_expr = f"date_trunc('{interval}', h.run_date)" if interval else "NULL::timestamptz"
+        phase_columns = ",\n".join(
+            f"avg((step->'timings'->>'{phase}_ms')::float) AS {phase}_ms" for phase in PHASES
+        )
+        filters = ["h.project_id = :project_id", "h.run_date >= :since", "step->'timings' IS NOT NULL"]
+        params: Dict[str, Any] = {
+            "project_id": project_id,
+            "since": datetime.now(timezone.utc) - timedelta(days=days),
+            "limit": limit,
+        }
+        if script_id:
+            filters.append("h.script_id = :script_id")
+            params["script_id"] = script_id
+        if action:
+            filters.append("lower(step->'metadata'->>'action') = lower(:action)")
+            params["action"] = action
+
+        rows = db.execute(text(f"""
+            SELECT {bucket_expr} AS bucket,
+                   {key_expr} AS key,
+                   max(h.script_name) AS script_name,
+                   count(*) AS steps,
+                   count(*) FILTER (WHERE step->>'status' = 'failed') AS failed,
+                   avg((step->'timings'->>'total_ms')::float) AS total_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY (step->'timings'->>'total_ms')::float) AS p95_total_ms,
+                   {phase_columns}
+            FROM testhistory h
+            CROSS JOIN LATERAL json_array_elements(
+                CASE WHEN json_typeof(h.step_results) = 'array' THEN h.step_results ELSE '[]'::json END
+            ) AS step
+            WHERE {" AND ".join(filters)}
+            GROUP BY 1, 2
+            ORDER BY 1 NULLS FIRST, sum((step->'timings'->>'total_ms')::float) DESC
+            LIMIT :limit
+        """), params).mappings().all()
+
+        results = []
+        for row in rows:
+            item = {
+                "bucket": row["bucket"],
+                "key": row["key"],
+                "steps": row["steps"],
+                "failed": row["failed"],
+                "total_ms": round(row["total_ms"] or 0, 1),
+                "p95_total_ms": round(row["p95_total_ms"] or 0, 1),
+                "phases_ms": {phase: round(row[f"{phase}_ms"] or 0, 1) for phase in PHASES},
+            }
+            if group_by == "script":
+                item["script_name"] = row["script_name"]
+            results.append(item)
+        return results
+
+step_timing_service = StepTimingService()
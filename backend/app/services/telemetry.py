@@ -0,0 +1,126 @@
+import logging
+import time
+from typing import Any, Awaitable, Iterator, Optional, Sequence
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Runs and queue
+RUNS_ACTIVE = registry.gauge(
+    "qone_runs_active", "Test runs currently executing", ("kind",)
+)
+RUN_QUEUE_DEPTH = registry.gauge(
+    "qone_run_queue_depth", "Runs accepted but not started yet (scheduled batches run one script at a time)", ("source",)
+)
+RUN_SECONDS = registry.histogram(
+    "qone_run_duration_seconds", "Script run duration including retries and AI fallback", ("platform", "status"),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+
+# Automation sessions and steps
+BROWSER_SESSIONS = registry.gauge(
+    "qone_browser_sessions_active", "Open Playwright browser sessions (contexts on the shared runtime)", ("component",)
+)
+APPIUM_SESSIONS = registry.gauge(
+    "qone_appium_sessions_active", "Open Appium driver sessions", ("component",)
+)
+STEP_SECONDS = registry.histogram(
+    "qone_step_duration_seconds", "Duration of a single runner step", ("platform", "action", "status"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+FALLBACK_SECONDS = registry.histogram(
+    "qone_ai_fallback_duration_seconds", "AI autonomous fallback loop duration", ("platform", "outcome"),
+    buckets=(5, 15, 30, 60, 120, 300, 600)
+)
+SCREENCAST_FRAMES = registry.counter(
+    "qone_screencast_frames_total", "Screencast frames received or streamed (rate() gives FPS)", ("source",)
+)
+
+# LLM
+LLM_SECONDS = registry.histogram(
+    "qone_llm_request_duration_seconds", "Gemini generate_content latency", ("endpoint", "model", "status"),
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 40, 60, 120)
+)
+LLM_TOKENS = registry.counter(
+    "qone_llm_tokens_total", "Gemini tokens by endpoint", ("endpoint", "model", "kind")
+)
+
+# Scheduler
+SCHEDULER_LAG_SECONDS = registry.histogram(
+    "qone_scheduler_lag_seconds", "Delay between a job's scheduled time and its submission",
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300)
+)
+SCHEDULER_SKIPPED = registry.counter(
+    "qone_scheduler_jobs_skipped_total", "Scheduled runs that never started", ("reason",)
+)
+
+
+def step_action_label(step: Any) -> str:
+    if not isinstance(step, dict):
+        return "unknown"
+    return str(step.get("action") or "unknown").strip().lower()[:40]
+
+
+def observe_step(platform: str, step: Any, started: float, result: Optional[dict]) -> None:
+    status = "passed" if (result or {}).get("success") else "failed"
+    STEP_SECONDS.observe(time.perf_counter() - started, platform=platform, action=step_action_label(step), status=status)
+
+
+async def track_run_task(kind: str, coro: Awaitable) -> Any:
+    """Awaits a background run coroutine while counting it in qone_runs_active."""
+    RUNS_ACTIVE.inc(kind=kind)
+    try:
+        return await coro
+    finally:
+        RUNS_ACTIVE.dec(kind=kind)
+
+
+def drain_queue(items: Sequence[Any], source: str) -> Iterator[Any]:
+    """Yields `items` in order while qone_run_queue_depth counts the ones not yet taken."""
+    remaining = len(items)
+    RUN_QUEUE_DEPTH.inc(remaining, source=source)
+    try:
+        for item in items:
+            RUN_QUEUE_DEPTH.dec(source=source)
+            remaining -= 1
+            yield item
+    finally:
+        # Batch aborted early: the leftovers will never run
+        RUN_QUEUE_DEPTH.dec(remaining, source=source)
+
+
+def _observe_llm(endpoint: str, model: Any, started: float, response: Any) -> None:
+    model = str(model or "unknown")
+    LLM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, model=model, status="ok" if response is not None else "error")
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attr in (("prompt", "prompt_token_count"), ("completion", "candidates_token_count"), ("thoughts", "thoughts_token_count")):
+        count = getattr(usage, attr, None)
+        if count:
+            LLM_TOKENS.inc(count, endpoint=endpoint, model=model, kind=kind)
+
+
+def generate_content(client: Any, endpoint: str, **kwargs) -> Any:
+    """client.models.generate_content, reporting latency and token usage under `endpoint`."""
+    started = time.perf_counter()
+    try:
+        response = client.models.generate_content(**kwargs)
+    except Exception:
+        _observe_llm(endpoint, kwargs.get("model"), started, None)
+        raise
+    _observe_llm(endpoint, kwargs.get("model"), started, response)
+    return response
+
+
+async def agenerate_content(client: Any, endpoint: str, **kwargs) -> Any:
+    """client.aio.models.generate_content, reporting latency and token usage under `endpoint`."""
+    started = time.perf_counter()
+    try:
+        response = await client.aio.models.generate_content(**kwargs)
+    except Exception:
+        _observe_llm(endpoint, kwargs.get("model"), started, None)
+        raise
+    _observe_llm(endpoint, kwargs.get("model"), started, response)
+    return response
@@ -3,12 +3,13 @@ import logging
 import os
 import tempfile
 import asyncio
-import sys
-import threading
 import concurrent.futures
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, BrowserContext
+
+from app.services.playwright_runtime import playwright_runtime
+from app.services.telemetry import BROWSER_SESSIONS, SCREENCAST_FRAMES
 
 logger = logging.getLogger(__name__)
 
@@ -18,57 +19,24 @@ SCREENCAST_DIR.mkdir(exist_ok=True)
 
 class WebInspectorService:
     def __init__(self):
-        self._bg_thread = None
-        self._bg_loop = None
-        self._loop_ready = threading.Event()
-        
-        self.playwright = None
-        self.browser = None
         self.context = None
         self.page = None
         self.session_id = None
         self.cdp_client = None
         self.last_frame_path = None
 
-    def _start_background_loop(self):
-        """Runs in the new background thread."""
-        try:
-            if sys.platform == 'win32':
-                asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-            
-            self._bg_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._bg_loop)
-            self._loop_ready.set()
-            logger.info("WebInspectorService: Dedicated Playwright background thread started")
-            self._bg_loop.run_forever()
-        except Exception as e:
-            logger.error(f"Failed to start dedicated Playwright loop: {e}")
-
-    def _ensure_background_thread(self):
-        if self._bg_thread is None or not self._bg_thread.is_alive():
-            self._loop_ready.clear()
-            self._bg_thread = threading.Thread(target=self._start_background_loop, daemon=True, name="PlaywrightThread")
-            self._bg_thread.start()
-            self._loop_ready.wait()
-
     def _run_in_bg(self, coro):
-        self._ensure_background_thread()
-        future = asyncio.run_coroutine_threadsafe(coro, self._bg_loop)
-        return asyncio.wrap_future(future)
+        return playwright_runtime.submit(coro)
 
     async def start_session(self, url: str) -> Tuple[bool, Optional[str]]:
         return await self._run_in_bg(self._start_session_impl(url))
 
     async def _start_session_impl(self, url: str) -> Tuple[bool, Optional[str]]:
         try:
-            if self.browser:
+            if self.context:
                 await self._stop_session_impl()
 
-            p = await async_playwright().start()
-            self.playwright = p
-            
-            self.browser = await self.playwright.chromium.launch(headless=True)
-            self.context = await self.browser.new_context(viewport={"width": 1280, "height": 800})
+            self.context = await playwright_runtime.new_context(owner="web_inspector", viewport={"width": 1280, "height": 800})
             self.page = await self.context.new_page()
             self.session_id = "web-inspector-session"
             self.last_frame_path = SCREENCAST_DIR / f"{self.session_id}_latest.jpg"
@@ -84,6 +52,7 @@ class WebInspectorService:
                     if data:
                         with open(self.last_frame_path, "wb") as f:
                             f.write(base64.b64decode(data))
+                        SCREENCAST_FRAMES.inc(source="web_inspector")
                     await self.cdp_client.send("Page.screencastFrameAck", {"sessionId": session_id})
                 except:
                     pass
@@ -110,7 +79,7 @@ class WebInspectorService:
             return False, str(e)
 
     async def stop_session(self):
-        if self._bg_thread and self._bg_thread.is_alive():
+        if self.context:
             await self._run_in_bg(self._stop_session_impl())
 
     async def _stop_session_impl(self):
@@ -119,15 +88,11 @@ class WebInspectorService:
                 try: await self.cdp_client.send("Page.stopScreencast")
                 except: pass
                 self.cdp_client = None
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            if self.context:
+                await self.context.close()
         except Exception as e:
             logger.warning(f"Error closing Web Inspector session: {e}")
         finally:
-            self.browser = None
-            self.playwright = None
             self.context = None
             self.page = None
             self.session_id = None
@@ -385,3 +350,5 @@ class WebInspectorService:
             return {"success": False, "error": str(e)}
 
 web_inspector_service = WebInspectorService()
+
+BROWSER_SESSIONS.set_function(lambda: 1 if web_inspector_service.context else 0, component="web_inspector")
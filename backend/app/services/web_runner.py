@@ -1,63 +1,38 @@
-import asyncio
 import base64
 import logging
-import sys
-import threading
+import time
+import weakref
 from typing import Dict, Any, Optional, List, Tuple
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, BrowserContext
+
+from app.core.tracing import span
+from app.services.playwright_runtime import playwright_runtime
+from app.services.step_timing import StepTimings
+from app.services.telemetry import BROWSER_SESSIONS, observe_step, step_action_label
 
 logger = logging.getLogger(__name__)
 
 class WebStepRunner:
+    # Every runner (singleton and per-run instances) for the session gauge
+    _instances = weakref.WeakSet()
+
     def __init__(self):
-        self._bg_thread = None
-        self._bg_loop = None
-        self._loop_ready = threading.Event()
-        
-        self.playwright = None
-        self.browser = None
         self.context = None
         self.page = None
-
-    def _start_background_loop(self):
-        """Runs in a dedicated background thread to handle Playwright on Windows."""
-        try:
-            if sys.platform == 'win32':
-                asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-            
-            self._bg_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._bg_loop)
-            self._loop_ready.set()
-            logger.info("WebStepRunner: Dedicated Playwright background thread started")
-            self._bg_loop.run_forever()
-        except Exception as e:
-            logger.error(f"WebStepRunner: Failed to start background loop: {e}")
-
-    def _ensure_background_thread(self):
-        if self._bg_thread is None or not self._bg_thread.is_alive():
-            self._loop_ready.clear()
-            self._bg_thread = threading.Thread(target=self._start_background_loop, daemon=True, name="WebRunnerThread")
-            self._bg_thread.start()
-            self._loop_ready.wait()
+        WebStepRunner._instances.add(self)
 
     def _run_in_bg(self, coro):
-        self._ensure_background_thread()
-        future = asyncio.run_coroutine_threadsafe(coro, self._bg_loop)
-        return asyncio.wrap_future(future)
+        return playwright_runtime.submit(coro)
 
     async def start_session(self, url: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         return await self._run_in_bg(self._start_session_impl(url))
 
     async def _start_session_impl(self, url: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         try:
-            if self.playwright is None:
-                self.playwright = await async_playwright().start()
-            
-            if self.browser:
-                await self.browser.close()
+            if self.context:
+                await self.context.close()
 
-            self.browser = await self.playwright.chromium.launch(headless=True)
-            self.context = await self.browser.new_context(viewport={"width": 1280, "height": 800})
+            self.context = await playwright_runtime.new_context(owner="web_runner", viewport={"width": 1280, "height": 800})
             self.page = await self.context.new_page()
             
             if url:
@@ -69,20 +44,16 @@ class WebStepRunner:
             return False, str(e)
 
     async def stop_session(self):
-        if self._bg_thread and self._bg_thread.is_alive():
+        if self.context:
             await self._run_in_bg(self._stop_session_impl())
 
     async def _stop_session_impl(self):
         try:
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            if self.context:
+                await self.context.close()
         except:
             pass
         finally:
-            self.browser = None
-            self.playwright = None
             self.context = None
             self.page = None
 
@@ -174,9 +145,17 @@ class WebStepRunner:
         return new_step
 
     async def execute_step(self, step: Dict[str, Any], data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        return await self._run_in_bg(self._execute_step_impl(step, data))
+        with span("web.step", action=step_action_label(step)) as s:
+            started = time.perf_counter()
+            timings = StepTimings()
+            result = await self._run_in_bg(self._execute_step_impl(step, data, timings))
+            result["timings"] = timings.as_dict()
+            observe_step("web", step, started, result)
+            s.set_status(bool(result.get("success")), result.get("error"))
+            return result
 
-    async def _execute_step_impl(self, step: Dict[str, Any], data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def _execute_step_impl(self, step: Dict[str, Any], data: Optional[Dict[str, Any]] = None, timings: Optional[StepTimings] = None) -> Dict[str, Any]:
+        timings = timings or StepTimings()
         if not self.page:
             return {"success": False, "error": "No active web session"}
 
@@ -202,20 +181,31 @@ class WebStepRunner:
             elif selector_type == "xpath":
                 pw_selector = f"xpath={selector_value}"
 
+            # Resolve the element first so locate time is reported apart from the interaction.
+            # Locate and action share one budget: the action only gets what the locate left
+            budget_ms = 5000 if action == "hover" else 10000
+            remaining_ms = budget_ms
+            if action in ["click", "input", "type", "send_keys", "hover"]:
+                locate_started = time.perf_counter()
+                with timings.phase("locate"):
+                    await self.page.wait_for_selector(pw_selector, state="attached", timeout=budget_ms)
+                remaining_ms = max(budget_ms - (time.perf_counter() - locate_started) * 1000, 1)
+
             if action == "click":
-                await self.page.click(pw_selector, timeout=10000)
+                await self.page.click(pw_selector, timeout=remaining_ms)
             elif action in ["input", "type", "send_keys"]:
-                await self.page.fill(pw_selector, option, timeout=10000)
+                await self.page.fill(pw_selector, option, timeout=remaining_ms)
             elif action == "hover":
-                await self.page.hover(pw_selector, timeout=5000)
+                await self.page.hover(pw_selector, timeout=remaining_ms)
             elif action == "scroll":
                 await self.page.evaluate("window.scrollBy(0, 500)")
             elif action == "wait":
-                await asyncio.sleep(float(option) if option else 1)
+                await timings.async_sleep(float(option) if option else 1)
             elif action == "navigate":
                 await self.page.goto(option, timeout=30000)
             elif action == "verify exists":
-                await self.page.wait_for_selector(pw_selector, state="visible", timeout=5000)
+                with timings.phase("locate"):
+                    await self.page.wait_for_selector(pw_selector, state="visible", timeout=5000)
             elif action == "finish":
                 logger.info("WebStepRunner: Test finished (no-op action)")
             else:
@@ -225,34 +215,35 @@ class WebStepRunner:
             assert_text = step.get("assertText")
             if assert_text and str(assert_text).strip() != "":
                 logger.info(f"WebStepRunner: Verifying step assertion: '{assert_text}'")
-                await asyncio.sleep(2) # Wait for page transition / UI to settle
-                try:
-                    # Get rendered innerText to ignore HTML tags
-                    content = await self.page.evaluate("document.body.innerText")
-                    if assert_text in content:
-                        logger.info("Exact Assertion Passed.")
-                    else:
-                        # Fuzzy match: remove whitespace/newlines and check
-                        def _normalize(t):
-                             import re
-                             # Remove HTML-like tags just in case, and all whitespace
-                             t = re.sub(r'<[^>]*>', '', t)
-                             return "".join(t.split())
+                await timings.async_sleep(2) # Wait for page transition / UI to settle
+                with timings.phase("assert"):
+                    try:
+                        # Get rendered innerText to ignore HTML tags
+                        content = await self.page.evaluate("document.body.innerText")
+                        if assert_text in content:
+                            logger.info("Exact Assertion Passed.")
+                        else:
+                            # Fuzzy match: remove whitespace/newlines and check
+                            def _normalize(t):
+                                 import re
+                                 # Remove HTML-like tags just in case, and all whitespace
+                                 t = re.sub(r'<[^>]*>', '', t)
+                                 return "".join(t.split())
                         
-                        clean_page = _normalize(content)
-                        clean_target = _normalize(assert_text)
+                            clean_page = _normalize(content)
+                            clean_target = _normalize(assert_text)
                         
-                        if clean_target in clean_page:
-                            logger.info("WebStepRunner: Fuzzy Assertion Passed.")
-                        else:
-                            # Final fallback: check raw content too in case of hidden attributes
-                            raw_content = await self.page.content()
-                            if _normalize(assert_text) in _normalize(raw_content):
-                                logger.info("WebStepRunner: Raw content match Passed.")
+                            if clean_target in clean_page:
+                                logger.info("WebStepRunner: Fuzzy Assertion Passed.")
                             else:
-                                return {"success": False, "error": f"Assertion Failed: Expected text '{assert_text}' not found on screen."}
-                except Exception as e:
-                    return {"success": False, "error": f"Assertion execution failed: {e}"}
+                                # Final fallback: check raw content too in case of hidden attributes
+                                raw_content = await self.page.content()
+                                if _normalize(assert_text) in _normalize(raw_content):
+                                    logger.info("WebStepRunner: Raw content match Passed.")
+                                else:
+                                    return {"success": False, "error": f"Assertion Failed: Expected text '{assert_text}' not found on screen."}
+                    except Exception as e:
+                        return {"success": False, "error": f"Assertion execution failed: {e}"}
 
             return {"success": True}
         except Exception as e:
@@ -260,3 +251,7 @@ class WebStepRunner:
             return {"success": False, "error": str(e)}
 
 web_step_runner = WebStepRunner()
+
+BROWSER_SESSIONS.set_function(
+    lambda: sum(1 for runner in list(WebStepRunner._instances) if runner.context), component="web_runner"
+)
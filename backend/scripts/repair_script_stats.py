@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Add backend to path to import app
+sys.path.append(os.path.join(os.getcwd()))
+
+from app.db.session import SessionLocal
+from app.services.history_service import history_service
+
+def repair(project_id=None):
+    """Recomputes TestScript run counters, rolling pass rates and latest results from TestHistory."""
+    db = SessionLocal()
+    try:
+        updated = history_service.rebuild_script_stats(db, project_id=project_id)
+        history_service.rebuild_latest_results(db, project_id=project_id)
+        db.commit()
+        print(f"Rebuilt statistics for {updated} scripts.")
+    except Exception as e:
+        db.rollback()
+        print(f"Repair failed: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    repair(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -43,6 +43,8 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
 
   const [scenarios, setScenarios] = useState<Scenario[]>([]);
   const [viewingScenario, setViewingScenario] = useState<Scenario | null>(null);
+  // Test cases of the scenario linked to viewingScript (list rows carry none)
+  const [linkedScenario, setLinkedScenario] = useState<Scenario | null>(null);
 
   useEffect(() => {
     if (activeProjectId) {
@@ -93,9 +95,27 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
   /* New State for Real Execution Modal */
   const [activeRunId, setActiveRunId] = useState<string | null>(null);
 
-  const handleRunStepAsset = async (asset: TestScript) => {
-    if (asset.isActive === false) return;
+  // Script list rows carry no code/steps/dataset; viewing, editing and running load the detail
+  const openScriptViewer = async (listed: TestScript) => {
+    setActiveViewerTab('steps');
+    setLinkedScenario(null);
     try {
+      setViewingScript(await testApi.withScriptBody(listed));
+    } catch (e) {
+      console.error("Failed to load script", e);
+      if (onAlert) onAlert("Error", "Failed to load script.", 'error');
+      return;
+    }
+    const linked = scenarios.find(s => s.goldenScriptId === listed.id);
+    if (linked) {
+      scenariosApi.getById(linked.id).then(setLinkedScenario).catch(console.error);
+    }
+  };
+
+  const handleRunStepAsset = async (listed: TestScript) => {
+    if (listed.isActive === false) return;
+    try {
+      const asset = await testApi.withScriptBody(listed);
       const { run_id } = await testApi.runActiveSteps({
         steps: asset.steps || [],
         project_id: activeProjectId,
@@ -116,11 +136,12 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
     }
   };
 
-  const handleRunTest = async (script: TestScript) => {
-    if (!script.isActive) return;
-    setExecutingScript(script);
+  const handleRunTest = async (listed: TestScript) => {
+    if (!listed.isActive) return;
+    setExecutingScript(listed);
 
     try {
+      const script = await testApi.withScriptBody(listed);
       if (script.steps && script.steps.length > 0) {
         // Step-by-Step Reporting execution (AI Assets with Native Steps)
         const { run_id } = await testApi.runActiveSteps({
@@ -350,7 +371,15 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
     handleUpdateScript({ ...step, isActive: !step.isActive }, true);
   };
 
-  const handleModifyScript = (script: TestScript) => {
+  const handleModifyScript = async (listed: TestScript) => {
+    let script: TestScript;
+    try {
+      script = await testApi.withScriptBody(listed);
+    } catch (e) {
+      console.error("Failed to load script", e);
+      if (onAlert) onAlert("Error", "Failed to load script.", 'error');
+      return;
+    }
     setEditingScriptId(script.id);
     setNewManualScript({
       name: script.name,
@@ -607,7 +636,7 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
                     <Camera className="w-4 h-4" />
                   </button>
                   <button onClick={() => handleModifyScript(script)} className="p-2 hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg text-gray-400 hover:text-gray-600 dark:text-gray-500" title="Modify Asset"><Edit3 className="w-4 h-4" /></button>
-                  <button onClick={() => { setViewingScript(script); setActiveViewerTab('steps'); }} className="p-2 hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg text-gray-400 hover:text-gray-600 dark:text-gray-500" title="Asset Intelligence"><Maximize2 className="w-4 h-4" /></button>
+                  <button onClick={() => openScriptViewer(script)} className="p-2 hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg text-gray-400 hover:text-gray-600 dark:text-gray-500" title="Asset Intelligence"><Maximize2 className="w-4 h-4" /></button>
                 </div>
               </div>
             </div>
@@ -713,7 +742,7 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
                 </div>
                 <div className="flex gap-1">
                   <button onClick={() => handleModifyScript(step)} className="p-2 hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg text-gray-400 hover:text-gray-600 dark:text-gray-500" title="Modify Asset"><Edit3 className="w-4 h-4" /></button>
-                  <button onClick={() => { setViewingScript(step); setActiveViewerTab('steps'); }} className="p-2 hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg text-gray-400 hover:text-gray-600 dark:text-gray-500" title="Asset Intelligence"><Maximize2 className="w-4 h-4" /></button>
+                  <button onClick={() => openScriptViewer(step)} className="p-2 hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg text-gray-400 hover:text-gray-600 dark:text-gray-500" title="Asset Intelligence"><Maximize2 className="w-4 h-4" /></button>
                 </div>
               </div>
             </div>
@@ -728,7 +757,7 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
                 {step.platform}
               </span>
               <span className="flex items-center gap-1 px-1.5 py-0.5 bg-gray-100 dark:bg-gray-900 border border-gray-200 dark:border-gray-800 rounded text-[9px] font-bold text-gray-500 uppercase tracking-tighter transition-colors">
-                {step.steps?.length || 0} STEPS
+                {step.stepCount ?? step.steps?.length ?? 0} STEPS
               </span>
               <span className={`flex items-center gap-1 px-1.5 py-0.5 rounded text-[8px] font-black uppercase tracking-tighter transition-colors border ${
                 step.priority === 'P0' ? 'bg-red-50 dark:bg-red-900/10 border-red-500 text-red-600 dark:text-red-400' : 
@@ -862,7 +891,7 @@ const AssetLibrary: React.FC<AssetLibraryProps> = ({ scripts, activeProjectId, p
                     {activeViewerTab === 'scenario' ? (
                       <div className="p-8 space-y-8 overflow-y-auto custom-scrollbar">
                         {(() => {
-                          const scenario = scenarios.find(s => s.goldenScriptId === viewingScript.id);
+                          const scenario = linkedScenario?.goldenScriptId === viewingScript.id ? linkedScenario : null;
                           if (!scenario) return (
                             <div className="bg-gray-50 dark:bg-[#0c0e12] border border-gray-200 dark:border-gray-800/50 border-dashed rounded-3xl p-10 flex flex-col items-center justify-center text-center">
                               <FileCode className="w-12 h-12 text-gray-400 mb-4 opacity-50" />
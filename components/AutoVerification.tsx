@@ -75,6 +75,18 @@ const AutoVerification: React.FC<AutoVerificationProps> = ({
         }
     }, [propScenarioId, scenarios.length]);
 
+    // List rows carry only the test case count; the selected scenario is swapped for its detail
+    useEffect(() => {
+        if (!selectedScenarioId) return;
+        let cancelled = false;
+        scenariosApi.getById(selectedScenarioId)
+            .then(detail => {
+                if (!cancelled) setScenarios(prev => prev.map(s => s.id === detail.id ? detail : s));
+            })
+            .catch(err => console.error("Failed to fetch scenario", err));
+        return () => { cancelled = true; };
+    }, [selectedScenarioId]);
+
     // Handle Deep-Linked Category selection
     useEffect(() => {
         if (initialCategory && initialCategory !== 'ALL') {
@@ -347,7 +359,7 @@ const AutoVerification: React.FC<AutoVerificationProps> = ({
                                             <div className="min-w-0 flex-1 space-y-1">
                                                 <div className="flex items-center gap-2 mb-0.5">
                                                     {s.category && <span className="px-2 py-0.5 bg-indigo-100 dark:bg-indigo-900/40 text-indigo-600 dark:text-indigo-400 text-[8px] font-black rounded uppercase tracking-wider">{s.category}</span>}
-                                                    <span className="text-[8px] font-black text-gray-400 uppercase tracking-widest">{(s.testCases || s.test_cases || []).length} Nodes</span>
+                                                    <span className="text-[8px] font-black text-gray-400 uppercase tracking-widest">{s.testCaseCount ?? (s.testCases || s.test_cases || []).length} Nodes</span>
                                                 </div>
                                                 <h3 className={`font-black uppercase tracking-tight transition-all ${isExpanded ? 'text-sm text-gray-900 dark:text-white' : 'text-[13px] text-gray-700 dark:text-gray-300 truncate'} `}>{s.title}</h3>
                                                 {isExpanded && <p className="text-[10px] text-gray-500 font-bold tracking-tight leading-relaxed">{s.description}</p>}
@@ -89,6 +89,19 @@ const DataSetStudio: React.FC<DataSetStudioProps> = ({ activeProject, onAlert })
     };
 
 
+    // List rows carry only dataset/step counts; the selected script is swapped for its detail
+    const handleSelectScript = async (listed: TestScript) => {
+        setSelectedScriptId(listed.id);
+        setGeneratedData([]);
+        try {
+            const script = await testApi.withScriptBody(listed);
+            setScripts(prev => prev.map(s => s.id === script.id ? script : s));
+            setGeneratedData(script.dataset || []);
+        } catch (err) {
+            console.error("Failed to load script", err);
+        }
+    };
+
     const handleSaveDataset = async () => {
         if (!selectedScript || generatedData.length === 0) return;
 
@@ -173,7 +186,7 @@ const DataSetStudio: React.FC<DataSetStudioProps> = ({ activeProject, onAlert })
                         filteredScripts.map(s => {
                             const isSelected = selectedScriptId === s.id;
                             return (
-                                <div key={s.id} onClick={() => { setSelectedScriptId(s.id); setGeneratedData(s.dataset || []); }} className={`bg-white dark:bg-[#16191f] border transition-all duration-500 rounded-3xl overflow-hidden cursor-pointer ${isSelected ? 'border-indigo-400 shadow-xl ring-2 ring-indigo-500/10' : 'border-gray-200 dark:border-gray-800 shadow-sm hover:border-indigo-300'} `}>
+                                <div key={s.id} onClick={() => handleSelectScript(s)} className={`bg-white dark:bg-[#16191f] border transition-all duration-500 rounded-3xl overflow-hidden cursor-pointer ${isSelected ? 'border-indigo-400 shadow-xl ring-2 ring-indigo-500/10' : 'border-gray-200 dark:border-gray-800 shadow-sm hover:border-indigo-300'} `}>
                                     <div className="p-6 px-8 flex items-center justify-between">
                                         <div className="flex items-center gap-6 flex-1 min-w-0">
                                             <div className={`p-2.5 rounded-2xl transition-all ${isSelected ? 'bg-indigo-600 text-white shadow-lg shadow-indigo-600/30 scale-110' : 'bg-gray-100 dark:bg-gray-800 text-gray-400 group-hover:bg-indigo-50'}`}>
@@ -186,7 +199,7 @@ const DataSetStudio: React.FC<DataSetStudioProps> = ({ activeProject, onAlert })
                                                         <span className="px-2 py-0.5 bg-indigo-50 dark:bg-indigo-500/10 text-indigo-600 dark:text-indigo-400 text-[8px] font-black rounded uppercase tracking-widest">{s.category}</span>
                                                     )}
                                                 </div>
-                                                <p className="text-[10px] font-bold text-gray-400 dark:text-gray-500 uppercase tracking-widest">Data Rows: {s.dataset?.length || 0}</p>
+                                                <p className="text-[10px] font-bold text-gray-400 dark:text-gray-500 uppercase tracking-widest">Data Rows: {s.datasetCount ?? s.dataset?.length ?? 0}</p>
                                             </div>
                                         </div>
                                     </div>
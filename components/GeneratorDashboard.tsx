@@ -52,10 +52,35 @@ const GeneratorDashboard: React.FC<GeneratorDashboardProps> = ({
     [approvedScenarios, selectedScenarioIds]
   );
 
-  const detailScenario = useMemo(() =>
-    approvedScenarios.find(s => s.id === viewingDetailScenarioId) || null,
-    [approvedScenarios, viewingDetailScenarioId]
-  );
+  // List rows carry only the test case count; full scenarios are fetched on demand
+  const [scenarioDetails, setScenarioDetails] = useState<Record<string, Scenario>>({});
+
+  const detailScenario = useMemo(() => {
+    if (!viewingDetailScenarioId) return null;
+    return scenarioDetails[viewingDetailScenarioId]
+      || approvedScenarios.find(s => s.id === viewingDetailScenarioId) || null;
+  }, [approvedScenarios, scenarioDetails, viewingDetailScenarioId]);
+
+  const loadScenarioDetails = async (scenarios: Scenario[]): Promise<Scenario[]> => {
+    const details = await Promise.all(scenarios.map(s => scenarioDetails[s.id] || testApi.getScenarioDetail(s.id)));
+    setScenarioDetails(prev => {
+      const next = { ...prev };
+      details.forEach(d => { next[d.id] = d; });
+      return next;
+    });
+    return details;
+  };
+
+  useEffect(() => {
+    if (!viewingDetailScenarioId || scenarioDetails[viewingDetailScenarioId]) return;
+    let cancelled = false;
+    testApi.getScenarioDetail(viewingDetailScenarioId)
+      .then(detail => {
+        if (!cancelled) setScenarioDetails(prev => ({ ...prev, [detail.id]: detail }));
+      })
+      .catch(err => console.error("Failed to fetch scenario", err));
+    return () => { cancelled = true; };
+  }, [viewingDetailScenarioId]);
 
   const addLog = (msg: string, type: 'info' | 'success' | 'error' | 'cmd' = 'info') => {
     setLogs(prev => [...prev, { msg, type }]);
@@ -77,10 +102,11 @@ const GeneratorDashboard: React.FC<GeneratorDashboardProps> = ({
 
     try {
       const persona = personas.find(p => p.id === selectedScenarios[0].personaId) || personas[0];
+      const scenarios = await loadScenarioDetails(selectedScenarios);
 
       // Use Backend API
       const result = await testApi.generateScript({
-        scenarios: selectedScenarios,
+        scenarios,
         persona: { name: persona.name, goal: persona.goal },
         projectContext: activeProject.name
       });
@@ -102,7 +128,8 @@ const GeneratorDashboard: React.FC<GeneratorDashboardProps> = ({
     addLog('Initiating AI Data Synthesis...', 'info');
 
     try {
-      const result = await testApi.generateData(selectedScenarios, selectedDataTypes);
+      const scenarios = await loadScenarioDetails(selectedScenarios);
+      const result = await testApi.generateData(scenarios, selectedDataTypes);
       setSyntheticData(result.data);
       addLog(`Examples generated: ${result.data.length} vectors.`, 'success');
       setShowDataModal(true);
@@ -198,7 +225,7 @@ const GeneratorDashboard: React.FC<GeneratorDashboardProps> = ({
 
               <div className="mt-4 flex items-center justify-between">
                 <div className="flex items-center gap-2">
-                  <span className={`px-2 py-0.5 rounded text-[8px] font-black uppercase transition-colors ${selectedScenarioIds.includes(s.id) ? 'bg-indigo-500/20 text-indigo-600 dark:text-indigo-400' : 'bg-gray-200 dark:bg-gray-800 text-gray-600'}`}>{(s.testCases || s.test_cases || []).length} TestCases</span>
+                  <span className={`px-2 py-0.5 rounded text-[8px] font-black uppercase transition-colors ${selectedScenarioIds.includes(s.id) ? 'bg-indigo-500/20 text-indigo-600 dark:text-indigo-400' : 'bg-gray-200 dark:bg-gray-800 text-gray-600'}`}>{s.testCaseCount ?? (s.testCases || s.test_cases || []).length} TestCases</span>
                 </div>
                 <button
                   onClick={(e) => { e.stopPropagation(); setViewingDetailScenarioId(s.id); }}
@@ -413,7 +440,7 @@ const GeneratorDashboard: React.FC<GeneratorDashboardProps> = ({
             </div>
 
             <div className="p-8 border-t border-gray-200 dark:border-gray-800 bg-gray-50/50 dark:bg-gray-950/40 flex items-center justify-between gap-4 transition-colors">
-              <div className="text-[9px] font-black text-gray-500 dark:text-gray-600 uppercase tracking-tighter transition-colors">Total Nodes: {(detailScenario.testCases || detailScenario.test_cases || []).length}</div>
+              <div className="text-[9px] font-black text-gray-500 dark:text-gray-600 uppercase tracking-tighter transition-colors">Total Nodes: {detailScenario.testCaseCount ?? (detailScenario.testCases || detailScenario.test_cases || []).length}</div>
               <div className="flex gap-3">
                 <button
                   onClick={() => setViewingDetailScenarioId(null)}
@@ -7,7 +7,7 @@ import {
    Hash, Layers, Tag, Target, Save, Wand2, Code2
 } from 'lucide-react';
 import { TestHistory, Project, ExecutionTrigger, TestScript, ScriptOrigin } from '../types';
-import api from '../api/client';
+import api, { stepScreenshotSrc } from '../api/client';
 import { testApi } from '../api/test';
 import TestDashboard from './TestDashboard';
 import LiveExecutionModal from './LiveExecutionModal';
@@ -46,6 +46,8 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
    const [selectedContext, setSelectedContext] = useState<string>('All Contexts');
    const [selectedReport, setSelectedReport] = useState<TestHistory | null>(null);
    const [expandedScreenshot, setExpandedScreenshot] = useState<string | null>(null);
+   const [reportLogs, setReportLogs] = useState<{ items: any[]; total: number } | null>(null);
+   const [isLoadingLogs, setIsLoadingLogs] = useState(false);
 
    // Date Filter State
    const [startDate, setStartDate] = useState<string>('');
@@ -238,10 +240,26 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
    const [executingScript, setExecutingScript] = useState<TestScript | null>(null);
    const [executionStatus, setExecutionStatus] = useState<'idle' | 'running' | 'success' | 'error'>('idle');
    const [selectedHealedAsset, setSelectedHealedAsset] = useState<any>(null);
+   // Failure analysis and original steps of the selected healed asset (not part of list rows)
+   const [healedContext, setHealedContext] = useState<{ analysis?: any; originalSteps: any[] }>({ originalSteps: [] });
    const [jiraTarget, setJiraTarget] = useState<TestHistory | null>(null);
 
-   const openJiraModal = (item: TestHistory) => {
-      setJiraTarget(item);
+   // History list rows leave out step_results / failure_analysis / logs; reports show the detail
+   const loadReportDetail = async (item: TestHistory): Promise<TestHistory> => {
+      try {
+         return await testApi.getHistoryDetail(item.id);
+      } catch (e) {
+         console.error("Failed to fetch history details", e);
+         return item;
+      }
+   };
+
+   const openReport = async (item: TestHistory) => {
+      setSelectedReport(await loadReportDetail(item));
+   };
+
+   const openJiraModal = async (item: TestHistory) => {
+      setJiraTarget(await loadReportDetail(item));
    };
 
    const selectedScriptPriority = useMemo(() => {
@@ -265,6 +283,19 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
       }
    }, [activeTab, defectSubTab]);
 
+   React.useEffect(() => {
+      setHealedContext({ originalSteps: [] });
+      if (!selectedHealedAsset) return;
+      let cancelled = false;
+      Promise.all([
+         selectedHealedAsset.history_id ? testApi.getHistoryDetail(selectedHealedAsset.history_id).catch(() => null) : null,
+         selectedHealedAsset.script_id ? testApi.getScriptDetail(selectedHealedAsset.script_id).catch(() => null) : null,
+      ]).then(([detail, script]) => {
+         if (!cancelled) setHealedContext({ analysis: detail?.failureAnalysis, originalSteps: script?.steps || [] });
+      });
+      return () => { cancelled = true; };
+   }, [selectedHealedAsset]);
+
    // Polling for self-healing status (Improved 3s Timeout pattern)
    React.useEffect(() => {
       const activeIds = Object.entries(healingTasks)
@@ -312,16 +343,17 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
       const defect = defects.find(d => d.id === historyId);
       if (!defect) return;
 
-      const script = scripts.find(s => s.id === defect.scriptId);
-      if (!script) {
+      const listed = scripts.find(s => s.id === defect.scriptId);
+      if (!listed) {
          alert("Original script not found.");
          return;
       }
 
-      setExecutingScript(script);
+      setExecutingScript(listed);
       setExecutionStatus('running');
 
       try {
+         const script = await testApi.withScriptBody(listed);
          if (script.steps && script.steps.length > 0) {
             const { run_id } = await testApi.runActiveSteps({
                steps: script.steps,
@@ -374,6 +406,30 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
       }
    };
 
+   // Logs are stored separately from the history row; fetch them page by page
+   const LOG_PAGE_SIZE = 500;
+   const loadReportLogs = async (historyId: string, offset: number) => {
+      setIsLoadingLogs(true);
+      try {
+         const page = await testApi.getHistoryLogs(historyId, { offset, limit: LOG_PAGE_SIZE });
+         setReportLogs(prev => ({
+            items: offset > 0 && prev ? [...prev.items, ...page.items] : page.items,
+            total: page.total
+         }));
+      } catch (e) {
+         console.error("Failed to fetch history logs", e);
+      } finally {
+         setIsLoadingLogs(false);
+      }
+   };
+
+   React.useEffect(() => {
+      setReportLogs(null);
+      if (selectedReport?.id) {
+         loadReportLogs(selectedReport.id, 0);
+      }
+   }, [selectedReport?.id]);
+
    const refreshReport = async () => {
       if (selectedReport) {
          try {
@@ -477,7 +533,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                      history={history}
                      activeProject={activeProject}
                      onViewDetail={(report) => {
-                        setSelectedReport(report);
+                        openReport(report);
                         // We don't automatically switch tabs, just show the modal
                      }}
                   />
@@ -641,19 +697,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                               {paginatedHistory.map((item) => (
                                  <tr
                                     key={item.id}
-                                    onClick={async () => {
-                                       if (item.trigger === 'ai_exploration') {
-                                          try {
-                                             const detail = await testApi.getHistoryDetail(item.id);
-                                             setSelectedReport(detail);
-                                          } catch (e) {
-                                             console.error("Failed to fetch history details", e);
-                                             setSelectedReport(item);
-                                          }
-                                       } else {
-                                          setSelectedReport(item);
-                                       }
-                                    }}
+                                    onClick={() => openReport(item)}
                                     className="hover:bg-gray-50 dark:hover:bg-indigo-500/5 transition-all group cursor-pointer"
                                  >
                                     <td className="px-6 py-5">
@@ -869,7 +913,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                                                 </span>
                                              </div>
 
-                                             <h3 className="text-xl font-black text-gray-900 dark:text-white mb-2 tracking-tight group-hover:text-red-600 dark:group-hover:text-red-400 transition-colors cursor-pointer" onClick={() => setSelectedReport(defect)}>
+                                             <h3 className="text-xl font-black text-gray-900 dark:text-white mb-2 tracking-tight group-hover:text-red-600 dark:group-hover:text-red-400 transition-colors cursor-pointer" onClick={() => openReport(defect)}>
                                                 {defect.scriptName}
                                              </h3>
                                              <p className="text-xs text-gray-500 dark:text-gray-400 mb-6 font-medium transition-colors">
@@ -1412,13 +1456,13 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                                                    )}
                                                 </div>
 
-                                                {step.screenshot_data && (
+                                                {stepScreenshotSrc(step) && (
                                                    <div
                                                       className="w-32 h-48 flex-shrink-0 rounded-xl overflow-hidden border border-gray-200 dark:border-gray-800 shadow-sm transition-all hover:ring-4 hover:ring-indigo-500/20 cursor-zoom-in bg-gray-100 dark:bg-gray-900 relative group/img"
-                                                      onClick={() => setExpandedScreenshot(step.screenshot_data)}
+                                                      onClick={() => setExpandedScreenshot(stepScreenshotSrc(step))}
                                                    >
                                                       <img
-                                                         src={`data:image/jpeg;base64,${step.screenshot_data}`}
+                                                         src={stepScreenshotSrc(step)!}
                                                          alt={`Step ${step.step_number}`}
                                                          className="w-full h-full object-cover"
                                                       />
@@ -1450,15 +1494,24 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                                  </button>
                               </div>
                               <div className="bg-white dark:bg-[#0c0e12] border border-gray-200 dark:border-gray-800 rounded-3xl p-6 mono text-[11px] space-y-3 shadow-inner custom-scrollbar overflow-y-auto max-h-[400px] transition-colors">
-                                 {selectedReport.logs?.map((log, i) => (
+                                 {(reportLogs?.items ?? selectedReport.logs)?.map((log: any, i: number) => (
                                     <div key={i} className="flex gap-4">
-                                       <span className="text-gray-400 dark:text-gray-700 select-none">[{i + 1}]</span>
+                                       <span className="text-gray-400 dark:text-gray-700 select-none">[{log.line ?? i + 1}]</span>
                                        <span className={`${log.type === 'success' ? 'text-green-600 dark:text-green-500' : ''} ${log.type === 'error' ? 'text-red-600 dark:text-red-500 font-bold' : ''} ${log.type === 'cmd' ? 'text-indigo-600 dark:text-indigo-400' : 'text-gray-600 dark:text-gray-400'}`}>
                                           {log.type === 'cmd' && <span className="text-gray-400 dark:text-gray-700 mr-2">$</span>}
                                           {log.msg}
                                        </span>
                                     </div>
                                  ))}
+                                 {reportLogs && reportLogs.items.length < reportLogs.total && (
+                                    <button
+                                       onClick={() => loadReportLogs(selectedReport.id, reportLogs.items.length)}
+                                       disabled={isLoadingLogs}
+                                       className="text-[10px] font-bold text-indigo-600 dark:text-indigo-400 hover:underline disabled:opacity-50"
+                                    >
+                                       {isLoadingLogs ? 'LOADING...' : `LOAD MORE (${reportLogs.items.length} / ${reportLogs.total})`}
+                                    </button>
+                                 )}
                               </div>
                            </div>
                         </>
@@ -1500,7 +1553,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                      <X className="w-8 h-8" />
                   </button>
                   <img
-                     src={`data:image/jpeg;base64,${expandedScreenshot}`}
+                     src={expandedScreenshot}
                      alt="Step Execution Evidence"
                      className="max-w-full max-h-[85vh] object-contain rounded-xl shadow-2xl ring-1 ring-white/10"
                   />
@@ -1554,8 +1607,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                            <span className="text-[10px] font-black text-amber-600 dark:text-amber-400 uppercase tracking-widest">Original Failure Analysis (Context)</span>
                         </div>
                         {(() => {
-                           const relatedHistory = history.find(h => h.id === selectedHealedAsset?.history_id);
-                           const analysis = relatedHistory?.failureAnalysis;
+                           const analysis = healedContext.analysis;
                            if (!analysis) return <p className="text-sm text-amber-700/60 dark:text-amber-400/60 italic">No detailed analysis available for this failure.</p>;
                            return (
                               <div className="space-y-3">
@@ -1593,8 +1645,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                               </div>
                               <div className="space-y-2">
                                  {(() => {
-                                    const originalScript = scripts.find(s => s.id === selectedHealedAsset.script_id);
-                                    const originalSteps = originalScript?.steps || [];
+                                    const originalSteps = healedContext.originalSteps;
                                     return originalSteps.map((step: any, idx: number) => (
                                        <div key={idx} className="p-4 bg-gray-50 dark:bg-gray-900/40 border border-gray-100 dark:border-gray-800 rounded-xl flex items-start gap-3 opacity-60">
                                           <span className="text-[10px] font-bold text-gray-400 bg-gray-100 dark:bg-gray-800 px-1.5 py-0.5 rounded">{idx + 1}</span>
@@ -1616,8 +1667,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({ history, activeProject, onRef
                               </div>
                               <div className="space-y-2">
                                  {selectedHealedAsset.modified_steps?.map((step: any, idx: number) => {
-                                    const originalScript = scripts.find(s => s.id === selectedHealedAsset.script_id);
-                                    const originalSteps = originalScript?.steps || [];
+                                    const originalSteps = healedContext.originalSteps;
                                     const origStep = originalSteps[idx];
                                     const isModified = !origStep ||
                                        origStep.action !== step.action ||
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { X, Layers, Save, Loader2 } from 'lucide-react';
 import { TestHistory } from '../types';
 import { testApi } from '../api/test';
+import { stepScreenshotSrc } from '../api/client';
 
 interface JiraSyncModalProps {
   targetItem: TestHistory;
@@ -25,7 +26,7 @@ const JiraSyncModal: React.FC<JiraSyncModalProps> = ({ targetItem, onClose, onSu
     prepareJiraData();
   }, [targetItem]);
 
-  const prepareJiraData = () => {
+  const prepareJiraData = async () => {
     const item = targetItem;
     const assetName = item.scriptName;
     const platform = item.scriptOrigin || 'WEB';
@@ -33,8 +34,17 @@ const JiraSyncModal: React.FC<JiraSyncModalProps> = ({ targetItem, onClose, onSu
 
     // 1. Logs
     let logsText = "";
-    if (item.logs && item.logs.length > 0) {
-      const logLines = item.logs.slice(-10).map(l => `[${l.type.toUpperCase()}] ${l.msg}`).join('\n');
+    let lastLogs = item.logs || [];
+    if (lastLogs.length === 0) {
+      // Logs live in chunked storage; only the tail is needed here
+      try {
+        lastLogs = (await testApi.getHistoryLogs(item.id, { tail: 10 })).items;
+      } catch (e) {
+        console.error("Failed to fetch history logs", e);
+      }
+    }
+    if (lastLogs.length > 0) {
+      const logLines = lastLogs.slice(-10).map(l => `[${l.type.toUpperCase()}] ${l.msg}`).join('\n');
       logsText = `{panel:title=Execution Trace (Last 10 Lines)|titleBGColor=#F7F9F9|borderStyle=solid}\n{code:theme=RDark|linenumbers=false}\n${logLines}\n{code}\n{panel}`;
     }
 
@@ -78,9 +88,9 @@ _Generated by Q-ONE AI Automation_`;
     // 3. Find latest screenshot from failed steps
     let screenshot = null;
     if (item.step_results) {
-      const failedStep = [...item.step_results].reverse().find(s => s.status === 'failed' && s.screenshot_data);
+      const failedStep = [...item.step_results].reverse().find(s => s.status === 'failed' && stepScreenshotSrc(s));
       if (failedStep) {
-        screenshot = failedStep.screenshot_data;
+        screenshot = stepScreenshotSrc(failedStep);
       }
     }
 
@@ -148,7 +148,7 @@ const MainConsole: React.FC<MainConsoleProps> = ({
             id: s.id || '',
             type: 'GENERATOR',
             title: `Scenario Draft: ${s.title}`,
-            description: s.description || `${s.testCases?.length || 0} cases generated.`,
+            description: s.description || `${s.testCaseCount ?? s.testCases?.length ?? 0} cases generated.`,
             timestamp: s.created_at ? new Date(s.created_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }) : 'New',
             urgency: 'medium'
           });
@@ -539,7 +539,8 @@ const MainConsole: React.FC<MainConsoleProps> = ({
                   }
                 }
               } else {
-                const asset = searchSimilarAsset(textToSend, assets);
+                // Asset list rows carry no code/steps/dataset
+                const asset = await testApi.withScriptBody(searchSimilarAsset(textToSend, assets));
                 lastScriptId = asset.id;
                 const devices = await deviceFarmApi.getDevices();
                 const targetDevice = devices.find(d => d.status === 'Available') || devices[0];
@@ -824,9 +825,13 @@ const MainConsole: React.FC<MainConsoleProps> = ({
 
                 const historyList = await testApi.getHistory(activeProject.id);
                 // Find the exact entry matching our run_id. ONLY IF run_id exists for this mission.
-                const latestEntry = lastRunId
+                const latestListed = lastRunId
                   ? (historyList.find(h => h.runId === lastRunId) || historyList[0])
                   : null;
+                // failure_analysis is only on the history detail
+                const latestEntry = latestListed
+                  ? await testApi.getHistoryDetail(latestListed.id).catch(() => latestListed)
+                  : null;
 
                 if (latestEntry) {
                   const resultHeader = `Result: ${latestEntry.status?.toUpperCase() || 'UNKNOWN'}`;
@@ -146,7 +146,7 @@ const PipelineWatcher: React.FC<PipelineWatcherProps> = ({ activeProject, script
          const runResult = await testApi.runActiveSteps({
             script_id: scriptId,
             project_id: activeProject.id,
-            steps: targetScript.steps || []
+            steps: (await testApi.withScriptBody(targetScript)).steps || []
          });
          setRunId(runResult.run_id);
          setRunStats({ total: 1, passed: 0, failed: 0, analyzing: 1 });
@@ -152,11 +152,8 @@ const ReportDashboard: React.FC<ReportDashboardProps> = ({ history, scripts, act
       defectRelatedRuns.forEach(h => {
          const assetId = h.scriptId || (h as any).ai_summary || h.id;
          if (!defectAssetsMap.has(assetId)) {
-            let detailedError = '';
-            if (h.step_results && Array.isArray(h.step_results)) {
-               const failedStep = h.step_results.find((s: any) => s.status === 'failed' || s.error_message);
-               if (failedStep && failedStep.error_message) detailedError = failedStep.error_message;
-            }
+            // List rows carry the first failed step's error, not step_results
+            let detailedError = h.failedStepError || '';
             // Attempt to extract detailed error from ai_session steps (ai)
             if (!detailedError && (h as any).ai_session?.steps_data && Array.isArray((h as any).ai_session.steps_data)) {
                const failedAIStep = (h as any).ai_session.steps_data.find((s: any) => s.status === 'failed' || s.error_message);
@@ -187,11 +184,7 @@ const ReportDashboard: React.FC<ReportDashboardProps> = ({ history, scripts, act
             if (new Date(h.runDate) > new Date(existing.lastFailureDate)) {
                existing.lastFailureDate = h.runDate;
 
-               let detailedError = '';
-               if (h.step_results && Array.isArray(h.step_results)) {
-                  const failedStep = h.step_results.find((s: any) => s.status === 'failed' || s.error_message);
-                  if (failedStep && failedStep.error_message) detailedError = failedStep.error_message;
-               }
+               let detailedError = h.failedStepError || '';
                if (!detailedError && (h as any).ai_session?.steps_data && Array.isArray((h as any).ai_session.steps_data)) {
                   const failedAIStep = (h as any).ai_session.steps_data.find((s: any) => s.status === 'failed' || s.error_message);
                   if (failedAIStep && failedAIStep.error_message) detailedError = failedAIStep.error_message;
@@ -259,6 +259,8 @@ export interface Scenario {
   try_count?: number;
   enable_ai_test?: boolean;
   priority?: string;
+  // List rows leave out testCases (load with getScenarioDetail); count only
+  testCaseCount?: number;
 }
 
 export interface TestCase {
@@ -282,6 +284,8 @@ export interface TestScript {
   lastRun: string;
   runCount: number;
   successRate: number;
+  passRate7?: number | null;  // Pass rate over the last 7 runs
+  passRate30?: number | null; // Pass rate over the last 30 runs
   code: string;
   category?: string;
   origin: ScriptOrigin;
@@ -297,6 +301,9 @@ export interface TestScript {
   try_count?: number;
   enable_ai_test?: boolean;
   priority?: string;
+  // List rows leave out code/steps/dataset (load with testApi.getScriptDetail); counts only
+  stepCount?: number;
+  datasetCount?: number;
 }
 
 export interface LogEntry {
@@ -320,7 +327,8 @@ export interface TestHistory {
   aiSummary?: string;
   failureAnalysis?: any;
   logs: LogEntry[];
-  step_results?: any[]; // Universal step results
+  step_results?: any[]; // Universal step results (detail only; lists carry failedStepError)
+  failedStepError?: string | null; // Error of the first failed step, from list rows
   deploymentVersion?: string;
   commitHash?: string;
   scheduleId?: string;